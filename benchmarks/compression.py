@@ -0,0 +1,82 @@
+"""
+Степень сжатия и стоимость кодирования/декодирования текстов, которые хранятся
+в sessions.summary и session_documents.text.
+
+    python benchmarks/compression.py [--docs 500] [--chars 4000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from time import perf_counter
+
+from stream_summarization.adapters.compression import (
+    compress_text,
+    configure_compression,
+    decompress_text,
+    train_dictionary,
+)
+
+WORDS = (
+    "экономика инфляция рост цен центральный банк ключевая ставка рынок инвесторы компания выручка "
+    "прибыль квартал отчёт правительство министерство бюджет налог экспорт импорт нефть газ рубль "
+    "доллар курс биржа акции облигации спрос предложение производство потребители регион проект "
+    "заявил сообщил отметил по данным агентства в пресс-службе по словам эксперта в текущем году"
+).split()
+
+
+def _article(rng: random.Random, chars: int) -> str:
+    sentences = []
+    size = 0
+    while size < chars:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def _measure(name: str, docs: list[str]) -> None:
+    started = perf_counter()
+    stored = [compress_text(doc) for doc in docs]
+    encode = perf_counter() - started
+    started = perf_counter()
+    for value in stored:
+        decompress_text(value)
+    decode = perf_counter() - started
+    raw_bytes = sum(len(doc.encode("utf-8")) for doc in docs)
+    stored_bytes = sum(len(value) for value in stored)
+    print(
+        f"{name:<10} ratio={raw_bytes / stored_bytes:5.2f} "
+        f"encode={encode / len(docs) * 1e6:8.1f} us/doc "
+        f"decode={decode / len(docs) * 1e6:8.1f} us/doc "
+        f"decode={raw_bytes / decode / 2 ** 20:8.1f} MiB/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--chars", type=int, default=4000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    docs = [_article(rng, args.chars) for _ in range(args.docs)]
+    training = [_article(rng, args.chars) for _ in range(200)]
+
+    configure_compression("none", 0)
+    _measure("none", docs)
+    configure_compression("zlib", 6)
+    _measure("zlib-6", docs)
+    configure_compression("zstd", 3)
+    _measure("zstd-3", docs)
+    try:
+        dictionary = train_dictionary(training, size=32_768)
+    except RuntimeError as error:
+        print(f"zstd+dict  skipped: {error}")
+        return
+    configure_compression("zstd", 3, dictionary)
+    _measure("zstd+dict", docs)
+
+
+if __name__ == "__main__":
+    main()
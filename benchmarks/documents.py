@@ -0,0 +1,94 @@
+"""
+CPU на разбор документов запроса /create: от JSON тела до записей session_documents
+и обратно в JSON ответа /chat_session/{session_id}.
+
+    python benchmarks/documents.py [--docs 1000] [--chars 2000] [--repeat 20]
+
+legacy повторяет прежний путь: model_dump и strip в обработчике, ещё один проход
+в Session.update_docs, json.dumps при сохранении и jsonable_encoder в ответе.
+current включает подсчёт content_hash, которого в прежнем пути не было.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from time import perf_counter
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+
+from stream_summarization.domain.document import SessionDocument
+from stream_summarization.domain.session import Session
+from stream_summarization.entrypoints.schemas.session import CreateSessionRequest, SessionInfo
+
+FIELDS = ("text", "title", "url", "date", "source")
+
+
+def _payload(rng: random.Random, docs: int, chars: int) -> bytes:
+    words = "инфляция цены банк ставка рынок выручка прибыль бюджет экспорт нефть курс акции".split()
+    documents = []
+    for index in range(docs):
+        text = " ".join(rng.choice(words) for _ in range(chars // 8))
+        documents.append({
+            "text": f"  {text[:chars]}  ",
+            "title": f" Документ {index} ",
+            "url": f"https://example.com/{index}",
+            "date": "2025-01-01",
+            "source": "agency",
+        })
+    return json.dumps({"title": "bench", "documents": documents, "report_index": 0}).encode("utf-8")
+
+
+def _strip(item: Dict[str, Any]) -> Dict[str, str]:
+    return {field: str(item.get(field, "")).strip() for field in FIELDS}
+
+
+def legacy(body: bytes) -> bytes:
+    request = CreateSessionRequest.model_validate(json.loads(body))
+    docs = [_strip(item.model_dump()) for item in request.documents]
+    stored = json.dumps([_strip(doc) for doc in docs], ensure_ascii=False)
+    documents = [_strip(doc) for doc in json.loads(stored)]
+    info = SessionInfo(
+        session_id="s", version=0, title="t", documents=documents, summary="", inserted_at=0.0, updated_at=0.0
+    )
+    return json.dumps(jsonable_encoder(info), ensure_ascii=False).encode("utf-8")
+
+
+def current(body: bytes) -> bytes:
+    request = CreateSessionRequest.model_validate(json.loads(body))
+    docs = Session.normalize_docs(request.documents)
+    rows = [SessionDocument.from_record(position, doc) for position, doc in enumerate(docs)]
+    documents = [row.to_dict() for row in rows]
+    info = SessionInfo(
+        session_id="s", version=0, title="t", documents=documents, summary="", inserted_at=0.0, updated_at=0.0
+    )
+    return info.model_dump_json().encode("utf-8")
+
+
+def _measure(name: str, run: Callable[[bytes], bytes], body: bytes, repeat: int) -> float:
+    run(body)
+    started = perf_counter()
+    for _ in range(repeat):
+        run(body)
+    elapsed = (perf_counter() - started) / repeat
+    print(f"{name:<8} {elapsed * 1e3:8.2f} ms/request")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--chars", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    body = _payload(random.Random(0), args.docs, args.chars)
+    print(f"payload: {args.docs} documents, {len(body) / 2 ** 20:.1f} MiB")
+    before = _measure("legacy", legacy, body, args.repeat)
+    after = _measure("current", current, body, args.repeat)
+    print(f"saved    {(before - after) * 1e3:8.2f} ms/request ({before / after:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
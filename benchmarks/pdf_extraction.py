@@ -0,0 +1,77 @@
+"""
+Извлечение текста из PDF на 10/100/1000 страниц: последовательный extract_text
+(прежний путь) и ExtractionPool, который делит PDF длиннее --split-pages страниц на диапазоны
+по числу процессов (но не больше числа ядер). first page — сколько ждать первой страницы
+в потоковом режиме /load_documents?stream=true.
+
+    python benchmarks/pdf_extraction.py [--pages 10 100 1000] [--workers 4] [--split-pages 200]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+from time import perf_counter
+
+from fpdf import FPDF
+
+from stream_summarization.services.config import settings
+from stream_summarization.services.extraction import ExtractionPool, extract_text
+
+
+def _write_pdf(path: str, pages: int) -> None:
+    pdf = FPDF()
+    pdf.set_font("Helvetica", size=10)
+    for index in range(pages):
+        pdf.add_page()
+        pdf.multi_cell(0, 5, f"Page {index}. " + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40)
+    pdf.output(path)
+
+
+async def _pooled(pool: ExtractionPool, path: str) -> tuple[float, float]:
+    started = perf_counter()
+    first = None
+    async for _ in pool.iter_pages(path, "pdf"):
+        if first is None:
+            first = perf_counter() - started
+    return first or 0.0, perf_counter() - started
+
+
+async def _run(pages: list[int], workers: int, split_pages: int, directory: str) -> None:
+    pool = ExtractionPool(workers=workers, timeout=600.0, memory_mb=0, split_pages=split_pages)
+    try:
+        # Запуск процессов пула не входит в замеры
+        warmup = os.path.join(directory, "warmup.pdf")
+        _write_pdf(warmup, 1)
+        await asyncio.gather(*(pool.extract(warmup, "pdf") for _ in range(workers)))
+        for count in pages:
+            path = os.path.join(directory, f"{count}.pdf")
+            _write_pdf(path, count)
+
+            started = perf_counter()
+            extract_text(path, "pdf")
+            sequential = perf_counter() - started
+
+            first, pooled = await _pooled(pool, path)
+            print(
+                f"{count:5d} pages  sequential {sequential * 1e3:9.1f} ms  "
+                f"pool {pooled * 1e3:9.1f} ms ({count / pooled:7.1f} pages/s)  first page {first * 1e3:8.1f} ms"
+            )
+    finally:
+        pool.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--split-pages", type=int, default=settings.STREAM_SUMMARIZATION_EXTRACT_SPLIT_PAGES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(_run(args.pages, args.workers, args.split_pages, directory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Стоимость /chat_session/search на одном пользователе: прежний перебор сессий с
+SequenceMatcher и BM25-индекс (построение один раз, затем только запросы). Холодное
+построение из сохранённых sessions.search_tokens не токенизирует текст заново.
+
+    python benchmarks/search.py [--sessions 100] [--docs 20] [--chars 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from difflib import SequenceMatcher
+from time import perf_counter
+
+from stream_summarization.services.search.bm25 import Bm25Index, decode_counts, encode_counts
+from stream_summarization.services.search.tokenizer import tokenize
+
+WORDS = (
+    "экономика инфляция рост цен центральный банк ключевая ставка рынок инвесторы компания выручка "
+    "прибыль квартал отчёт правительство министерство бюджет налог экспорт импорт нефть газ рубль "
+    "доллар курс биржа акции облигации спрос предложение производство потребители регион проект"
+).split()
+QUERIES = ("ключевая ставка", "рост цен на нефть", "выручка компании за квартал", "облигации")
+
+
+def _legacy_score(blob: str, query: str) -> float:
+    normalized_blob = " ".join(blob.lower().split())
+    normalized_query = " ".join(query.lower().split())
+    matcher_score = SequenceMatcher(None, normalized_blob, normalized_query).ratio()
+    query_tokens = set(normalized_query.split())
+    overlap_score = len(set(normalized_blob.split()) & query_tokens) / len(query_tokens)
+    return max(matcher_score, overlap_score)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--chars", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    blobs = {
+        f"s{index}": " | ".join(
+            " ".join(rng.choice(WORDS) for _ in range(args.chars // 8)) for _ in range(args.docs)
+        )
+        for index in range(args.sessions)
+    }
+    print(f"{args.sessions} sessions, {sum(map(len, blobs.values())) / 2 ** 20:.1f} MiB of text")
+
+    started = perf_counter()
+    for query in QUERIES:
+        sorted(((_legacy_score(blob, query), session_id) for session_id, blob in blobs.items()), reverse=True)
+    print(f"legacy scan   {(perf_counter() - started) / len(QUERIES) * 1e3:10.2f} ms/query")
+
+    started = perf_counter()
+    index = Bm25Index()
+    for session_id, blob in blobs.items():
+        index.add(session_id, tokenize(blob))
+    print(f"bm25 build    {(perf_counter() - started) * 1e3:10.2f} ms (once per user)")
+
+    stored = {session_id: encode_counts(tokenize(blob)) for session_id, blob in blobs.items()}
+    started = perf_counter()
+    cold = Bm25Index()
+    for session_id, value in stored.items():
+        cold.add_counts(session_id, decode_counts(value))
+    print(f"stored build  {(perf_counter() - started) * 1e3:10.2f} ms (from search_tokens)")
+
+    started = perf_counter()
+    for query in QUERIES:
+        index.search(tokenize(query), args.sessions)
+    print(f"bm25 query    {(perf_counter() - started) / len(QUERIES) * 1e3:10.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
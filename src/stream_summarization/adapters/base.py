@@ -1,5 +1,4 @@
 import abc
-import abc
 from typing import Optional
 
 from stream_summarization.domain.base import IDomain
@@ -13,3 +12,13 @@ class IRepository(abc.ABC):
     @abc.abstractmethod
     def get(self, object_id: str) -> IDomain:
         raise NotImplementedError
+
+
+class IAsyncRepository(abc.ABC):
+    @abc.abstractmethod
+    def add(self, data: IDomain, foreign_key: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get(self, object_id: str) -> IDomain:
+        raise NotImplementedError
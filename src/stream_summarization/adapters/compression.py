@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import logging
+import threading
+import zlib
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+# Сжатое значение начинается с NUL и идентификатора кодека; обычный текст с NUL не начинается,
+# поэтому строки, записанные до включения сжатия, читаются без миграции данных.
+MARKER = b"\x00"
+# Несжимаемое значение хранится как есть, но с маркером — recompress_existing_rows его пропускает
+RAW = 0
+ZLIB = 1
+ZSTD = 2
+ZSTD_DICT = 3
+MIN_COMPRESS_BYTES = 128
+
+
+class _Codec:
+    def __init__(self) -> None:
+        self.codec = "zlib"
+        self.level = 6
+        self.dictionary: bytes | None = None
+        self._local = threading.local()
+
+    def configure(self, codec: str, level: int, dictionary: bytes | None) -> None:
+        codec = (codec or "zlib").lower()
+        if codec == "zstd":
+            try:
+                import zstandard  # type: ignore  # noqa: F401
+            except ImportError:
+                logger.warning("zstandard is not installed; compressing stored text with zlib.")
+                codec = "zlib"
+        self.codec = codec
+        self.level = level
+        self.dictionary = dictionary
+        self._local = threading.local()
+
+    def _zstd(self):
+        # Объекты zstandard нельзя делить между потоками — держим свои в каждом потоке
+        local = self._local
+        if not hasattr(local, "compressor"):
+            import zstandard  # type: ignore
+
+            dict_data = zstandard.ZstdCompressionDict(self.dictionary) if self.dictionary else None
+            local.compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dict_data)
+            local.decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+            local.plain_decompressor = zstandard.ZstdDecompressor()
+        return local
+
+    def compress(self, value: str) -> bytes:
+        raw = value.encode("utf-8")
+        if self.codec == "none" or len(raw) < MIN_COMPRESS_BYTES:
+            return raw
+        if self.codec == "zstd":
+            codec_id = ZSTD_DICT if self.dictionary else ZSTD
+            payload = self._zstd().compressor.compress(raw)
+        else:
+            codec_id = ZLIB
+            payload = zlib.compress(raw, self.level)
+        if len(payload) + 2 >= len(raw):
+            return MARKER + bytes((RAW,)) + raw
+        return MARKER + bytes((codec_id,)) + payload
+
+    def decompress(self, value: bytes | str) -> str:
+        if isinstance(value, str):
+            return value
+        value = bytes(value)
+        if value[:1] != MARKER:
+            return value.decode("utf-8")
+        codec_id, payload = value[1], value[2:]
+        if codec_id == RAW:
+            return payload.decode("utf-8")
+        if codec_id == ZLIB:
+            return zlib.decompress(payload).decode("utf-8")
+        if codec_id in (ZSTD, ZSTD_DICT):
+            if codec_id == ZSTD_DICT and not self.dictionary:
+                raise RuntimeError("Значение сжато zstd со словарём, но словарь не настроен")
+            try:
+                local = self._zstd()
+            except ImportError as exc:
+                raise RuntimeError("Библиотека zstandard не установлена") from exc
+            decompressor = local.decompressor if codec_id == ZSTD_DICT else local.plain_decompressor
+            return decompressor.decompress(payload).decode("utf-8")
+        raise ValueError(f"Unknown compression codec: {codec_id}")
+
+
+codec = _Codec()
+
+
+def configure_compression(name: str, level: int, dictionary: bytes | None = None) -> None:
+    codec.configure(name, level, dictionary)
+
+
+def compress_text(value: str) -> bytes:
+    return codec.compress(value)
+
+
+def decompress_text(value: bytes | str) -> str:
+    return codec.decompress(value)
+
+
+def train_dictionary(samples: Iterable[str], size: int = 112_640) -> bytes:
+    """
+    Обучает zstd-словарь на образцах текстов (статьи, сводки).
+    Словарь нельзя менять после записи данных: без него их не прочитать.
+    """
+    try:
+        import zstandard  # type: ignore
+    except ImportError as exc:
+        raise RuntimeError("Библиотека zstandard не установлена") from exc
+    encoded = [sample.encode("utf-8") for sample in samples if sample]
+    return zstandard.train_dictionary(size, encoded).as_bytes()
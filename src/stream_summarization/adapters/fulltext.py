@@ -0,0 +1,171 @@
+"""
+Полнотекстовый поиск сессий средствами БД: tsvector + GIN в PostgreSQL, FTS5 в SQLite.
+
+Текст сессий хранится сжатым, поэтому БД не может построить индекс из колонок сама:
+документ индекса считается при записи из распакованного текста и кладётся рядом со
+штампом (version, updated_at), по которому видно, что сессию пора переиндексировать.
+"""
+from __future__ import annotations
+
+import abc
+import logging
+import re
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+from stream_summarization.domain.session import Session
+from stream_summarization.services.search.tokenizer import tokenize
+
+logger = logging.getLogger(__name__)
+
+TEXT_SEARCH_CONFIG = "russian"
+# tsvector ограничен 1 МБ, поэтому в индекс идёт только начало очень длинных документов
+MAX_INDEXED_CHARS = 1 << 20
+
+_QUERY_WORD = re.compile(r"[^\W_]+")
+
+
+def session_search_fields(session: Session) -> Tuple[str, str, str]:
+    """(title, summary, body) сессии; body — заголовки, источники и текст документов."""
+    parts: List[str] = []
+    for doc in session.doc_texts:
+        parts.extend(part for part in (doc.title, doc.source, doc.url, doc.date, doc.text) if part)
+    return session.title or "", session.summary or "", "\n".join(parts)[:MAX_INDEXED_CHARS]
+
+
+class FulltextDialect(abc.ABC):
+    name = ""
+
+    @abc.abstractmethod
+    def create_schema(self, connection) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def index_statements(self, search_id: int, session: Session) -> List[Tuple[Any, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def search_statement(self, user_id: str, query: str, limit: int) -> Tuple[Any, Dict[str, Any]] | None:
+        raise NotImplementedError
+
+
+class PostgresFulltext(FulltextDialect):
+    """
+    Колонка document tsvector с весами A/B/C для заголовка, сводки и документов,
+    GIN-индекс по ней и ранжирование ts_rank_cd.
+    """
+
+    name = "postgresql"
+
+    def create_schema(self, connection) -> None:
+        connection.execute(text("ALTER TABLE session_search ADD COLUMN IF NOT EXISTS document tsvector"))
+        connection.execute(
+            text("CREATE INDEX IF NOT EXISTS ix_session_search_document ON session_search USING GIN (document)")
+        )
+
+    def index_statements(self, search_id, session):
+        title, summary, body = session_search_fields(session)
+        stmt = text(
+            "UPDATE session_search SET document = "
+            "setweight(to_tsvector(CAST(:config AS regconfig), :title), 'A') || "
+            "setweight(to_tsvector(CAST(:config AS regconfig), :summary), 'B') || "
+            "setweight(to_tsvector(CAST(:config AS regconfig), :body), 'C') "
+            "WHERE search_id = :search_id"
+        )
+        params = {"config": TEXT_SEARCH_CONFIG, "title": title, "summary": summary, "body": body}
+        return [(stmt, {**params, "search_id": search_id})]
+
+    def search_statement(self, user_id, query, limit):
+        words = _QUERY_WORD.findall(query)
+        if not words:
+            return None
+        # Любое из слов запроса, как у BM25-индекса; to_tsquery сам приводит слова к основе
+        stmt = text(
+            "SELECT s.session_id, s.version, s.title, s.inserted_at, s.updated_at "
+            "FROM session_search f JOIN sessions s ON s.session_id = f.session_id, "
+            "to_tsquery(CAST(:config AS regconfig), :query) q "
+            "WHERE s.user_id = :user_id AND f.document @@ q "
+            "ORDER BY ts_rank_cd(f.document, q) DESC, s.updated_at DESC LIMIT :limit"
+        )
+        params = {"config": TEXT_SEARCH_CONFIG, "query": " | ".join(words), "user_id": user_id, "limit": limit}
+        return stmt, params
+
+
+class SqliteFulltext(FulltextDialect):
+    """
+    Виртуальная таблица FTS5 с rowid = session_search.search_id. В SQLite нет русской
+    морфологии, поэтому в FTS5 пишутся основы слов из services/search/tokenizer.py.
+    """
+
+    name = "sqlite"
+
+    def create_schema(self, connection) -> None:
+        connection.execute(
+            text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS session_search_fts "
+                "USING fts5(title, summary, body, tokenize = 'unicode61')"
+            )
+        )
+        # Строка session_search удаляется каскадом вместе с сессией — FTS5 внешних ключей не знает
+        connection.execute(
+            text(
+                "CREATE TRIGGER IF NOT EXISTS session_search_fts_delete AFTER DELETE ON session_search "
+                "BEGIN DELETE FROM session_search_fts WHERE rowid = old.search_id; END"
+            )
+        )
+
+    def index_statements(self, search_id, session):
+        title, summary, body = (" ".join(tokenize(field)) for field in session_search_fields(session))
+        return [
+            (text("DELETE FROM session_search_fts WHERE rowid = :search_id"), {"search_id": search_id}),
+            (
+                text(
+                    "INSERT INTO session_search_fts (rowid, title, summary, body) "
+                    "VALUES (:search_id, :title, :summary, :body)"
+                ),
+                {"search_id": search_id, "title": title, "summary": summary, "body": body},
+            ),
+        ]
+
+    def search_statement(self, user_id, query, limit):
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return None
+        stmt = text(
+            "SELECT s.session_id, s.version, s.title, s.inserted_at, s.updated_at "
+            "FROM session_search_fts "
+            "JOIN session_search f ON f.search_id = session_search_fts.rowid "
+            "JOIN sessions s ON s.session_id = f.session_id "
+            "WHERE session_search_fts MATCH :match AND s.user_id = :user_id "
+            "ORDER BY bm25(session_search_fts, 3.0, 2.0, 1.0), s.updated_at DESC LIMIT :limit"
+        )
+        match = " OR ".join(f'"{term}"' for term in terms)
+        return stmt, {"match": match, "user_id": user_id, "limit": limit}
+
+
+FULLTEXT_DIALECTS: Dict[str, FulltextDialect] = {
+    dialect.name: dialect for dialect in (PostgresFulltext(), SqliteFulltext())
+}
+
+
+def fulltext_dialect(name: str) -> FulltextDialect:
+    return FULLTEXT_DIALECTS[name]
+
+
+def create_fulltext_schema(engine: Engine) -> bool:
+    """Создаёт индекс полнотекстового поиска; False, если СУБД его не поддерживает."""
+
+    dialect = FULLTEXT_DIALECTS.get(engine.dialect.name)
+    if dialect is None:
+        logger.warning("Full-text search is not supported for %s", engine.dialect.name)
+        return False
+    try:
+        with engine.begin() as connection:
+            dialect.create_schema(connection)
+    except DBAPIError as exc:
+        logger.warning("Unable to create full-text search index (%s)", exc)
+        return False
+    return True
@@ -1,13 +1,57 @@
-from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, MetaData, String, Table, Text
-from sqlalchemy.orm import registry, relationship
+import logging
 
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+    inspect,
+    select,
+    event,
+    text,
+    type_coerce,
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import deferred, registry, relationship
+from sqlalchemy.types import TypeDecorator
+
+from stream_summarization.adapters.compression import MARKER, MIN_COMPRESS_BYTES, compress_text, decompress_text
+
+from stream_summarization.domain.document import SessionDocument
 from stream_summarization.domain.report import ReportTemplate
 from stream_summarization.domain.session import Session
 from stream_summarization.domain.user import User
 
+logger = logging.getLogger(__name__)
+
 metadata = MetaData()
 mapper_registry = registry()
 
+
+class CompressedText(TypeDecorator):
+    """Текст, который хранится сжатым (zstd/zlib, см. adapters/compression.py); домен видит str."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
+
+
 report_templates = Table(
     "report_templates",
     metadata,
@@ -33,12 +77,157 @@ sessions = Table(
     Column("user_id", String, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False),
     Column("version", Integer, nullable=False),
     Column("title", String, nullable=False),
-    Column("text", Text, nullable=False),
-    Column("summary", Text, nullable=False),
+    Column("text", CompressedText, nullable=False),
+    Column("summary", CompressedText, nullable=False),
     Column("inserted_at", Float, nullable=False),
     Column("updated_at", Float, nullable=False),
+    # Основы слов с частотами («основа:tf» через пробел) для поиска; считаются при записи сессии
+    Column("search_tokens", CompressedText, nullable=True),
+)
+
+session_documents = Table(
+    "session_documents",
+    metadata,
+    Column("session_id", String, ForeignKey("sessions.session_id", ondelete="CASCADE"), primary_key=True),
+    Column("position", Integer, primary_key=True, autoincrement=False),
+    Column("content_hash", String(64), nullable=False),
+    Column("text", CompressedText, nullable=False),
+    Column("title", String, nullable=False, default=""),
+    Column("url", String, nullable=False, default=""),
+    Column("date", String, nullable=False, default=""),
+    Column("source", String, nullable=False, default=""),
+)
+
+# Штамп (version, updated_at), с которым сессия попала в полнотекстовый индекс (adapters/fulltext.py)
+session_search = Table(
+    "session_search",
+    metadata,
+    Column("search_id", Integer, primary_key=True, autoincrement=True),
+    Column(
+        "session_id",
+        String,
+        ForeignKey("sessions.session_id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    ),
+    Column("version", Integer, nullable=False),
+    Column("updated_at", Float, nullable=False),
+)
+
+# Keyset-пагинация /fetch_page: WHERE user_id = ? AND (updated_at, session_id) < (?, ?)
+sessions_keyset_index = Index(
+    "ix_sessions_user_id_updated_at",
+    sessions.c.user_id,
+    sessions.c.updated_at.desc(),
+    sessions.c.session_id.desc(),
+)
+
+COMPRESSED_COLUMNS = (
+    (sessions, "text"),
+    (sessions, "summary"),
+    (session_documents, "text"),
+    (sessions, "search_tokens"),
 )
 
+# Колонки, добавленные в существующие таблицы; create_all их не создаёт
+ADDED_COLUMNS = ((sessions, "search_tokens"),)
+# Индексы, добавленные к существующим таблицам; create_all создаёт их только вместе с таблицей
+ADDED_INDEXES = (sessions_keyset_index,)
+
+
+def migrate_added_columns(engine: Engine) -> None:
+    """Добавляет в существующие таблицы nullable-колонки из ADDED_COLUMNS, которых там ещё нет."""
+
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.begin() as connection:
+        for table, column in ADDED_COLUMNS:
+            if not inspector.has_table(table.name):
+                continue
+            if column in {item["name"] for item in inspector.get_columns(table.name)}:
+                continue
+            logger.info("Adding column %s.%s", table.name, column)
+            column_type = table.c[column].type.compile(dialect=engine.dialect)
+            connection.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column)} {column_type}"))
+
+
+def migrate_added_indexes(engine: Engine) -> None:
+    """Создаёт индексы из ADDED_INDEXES, которых ещё нет в существующих таблицах."""
+
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for index in ADDED_INDEXES:
+            if not inspector.has_table(index.table.name):
+                continue
+            if index.name in {item["name"] for item in inspector.get_indexes(index.table.name)}:
+                continue
+            logger.info("Creating index %s on %s", index.name, index.table.name)
+            index.create(connection)
+
+
+def migrate_compressed_columns(engine: Engine) -> None:
+    """Переводит колонки, созданные как TEXT, в bytea (PostgreSQL); SQLite хранит байты в TEXT как есть."""
+
+    if engine.dialect.name != "postgresql":
+        return
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.begin() as connection:
+        for table, column in COMPRESSED_COLUMNS:
+            if not inspector.has_table(table.name):
+                continue
+            types = {item["name"]: item["type"] for item in inspector.get_columns(table.name)}
+            if isinstance(types.get(column), LargeBinary):
+                continue
+            logger.info("Migrating %s.%s to bytea for compressed storage", table.name, column)
+            connection.execute(
+                text(
+                    f"ALTER TABLE {quote(table.name)} ALTER COLUMN {quote(column)} "
+                    f"TYPE bytea USING convert_to({quote(column)}, 'UTF8')"
+                )
+            )
+
+
+def recompress_existing_rows(engine: Engine, batch_size: int = 500) -> int:
+    """
+    Сжимает значения, записанные до включения сжатия. Короче MIN_COMPRESS_BYTES значения
+    не сжимаются и пропускаются, несжимаемые записываются с маркером и больше не читаются.
+    Возвращает число обновлённых строк.
+    """
+
+    updated = 0
+    for table, column in COMPRESSED_COLUMNS:
+        keys = list(table.primary_key.columns)
+        raw = type_coerce(table.c[column], LargeBinary).label("raw")
+        with engine.connect() as reader:
+            result = reader.execution_options(stream_results=True, yield_per=batch_size).execute(select(*keys, raw))
+            for batch in result.partitions(batch_size):
+                pending = []
+                for row in batch:
+                    value = row.raw.encode("utf-8") if isinstance(row.raw, str) else bytes(row.raw or b"")
+                    if len(value) < MIN_COMPRESS_BYTES or value[:1] == MARKER:
+                        continue
+                    payload = compress_text(value.decode("utf-8"))
+                    # Без маркера значение осталось как есть (сжатие выключено): обновлять нечего
+                    if payload[:1] == MARKER:
+                        pending.append((row, payload))
+                if not pending:
+                    continue
+                with engine.begin() as writer:
+                    for row, payload in pending:
+                        # Значение уже сжато: пишем байты мимо CompressedText
+                        writer.execute(
+                            table.update()
+                            .where(*(key == row._mapping[key] for key in keys))
+                            .values({column: type_coerce(payload, LargeBinary)})
+                        )
+                updated += len(pending)
+    return updated
+
+
+def _invalidate_session_docs(target, *args) -> None:
+    target.invalidate_docs()
+
 
 def start_mappers():
     mapper_registry.map_imperatively(ReportTemplate, report_templates)
@@ -55,4 +244,23 @@ def start_mappers():
             )
         },
     )
-    mapper_registry.map_imperatively(Session, sessions)
+    mapper_registry.map_imperatively(SessionDocument, session_documents)
+    mapper_registry.map_imperatively(
+        Session,
+        sessions,
+        properties={
+            # Тяжёлые колонки грузим только когда нужна полная сессия (undefer_group("content"))
+            "text": deferred(sessions.c.text, group="content"),
+            "summary": deferred(sessions.c.summary, group="content"),
+            "search_tokens": deferred(sessions.c.search_tokens, group="search"),
+            "documents": relationship(
+                SessionDocument,
+                order_by=session_documents.c.position,
+                cascade="all, delete-orphan",
+                passive_deletes=True,
+            ),
+        },
+    )
+    # Кэш разобранных документов сбрасывается, когда сессия перечитывается из БД
+    event.listen(Session, "refresh", _invalidate_session_docs)
+    event.listen(Session, "expire", _invalidate_session_docs)
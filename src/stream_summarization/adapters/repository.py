@@ -1,9 +1,119 @@
+from typing import TYPE_CHECKING, Any, Collection, Dict, List, Tuple
+
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.orm import selectinload, undefer_group
+
+from stream_summarization.adapters.fulltext import fulltext_dialect
+from stream_summarization.adapters.orm import session_search, sessions
+
+from stream_summarization.domain.document import SessionDocument
 from stream_summarization.domain.report import ReportTemplate
 from stream_summarization.domain.session import Session
 from stream_summarization.domain.user import User
 from stream_summarization.services.config import Session as DB
 
-from .base import IRepository
+from .base import IAsyncRepository, IRepository
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _session_for_user_stmt(user_id: str, session_id: str, full: bool = False):
+    stmt = select(Session).filter_by(session_id=session_id, user_id=user_id)
+    if full:
+        stmt = stmt.options(undefer_group("content"), selectinload(Session.documents))
+    return stmt
+
+
+def _sessions_for_user_stmt(
+    user_id: str,
+    full: bool = False,
+    session_ids: Collection[str] | None = None,
+    search_tokens: bool = False,
+):
+    stmt = select(Session).filter_by(user_id=user_id).order_by(Session.updated_at.desc())
+    if session_ids is not None:
+        stmt = stmt.where(Session.session_id.in_(session_ids))
+    if full:
+        stmt = stmt.options(undefer_group("content"), selectinload(Session.documents))
+    if search_tokens:
+        stmt = stmt.options(undefer_group("search"))
+    return stmt
+
+
+def _documents_page_stmt(user_id: str, session_id: str, offset: int, limit: int):
+    # position плотный и входит в первичный ключ, поэтому смещение — это диапазон по индексу
+    return (
+        select(SessionDocument)
+        .join(Session, Session.session_id == SessionDocument.session_id)
+        .where(
+            Session.user_id == user_id,
+            SessionDocument.session_id == session_id,
+            SessionDocument.position >= offset,
+        )
+        .order_by(SessionDocument.position)
+        .limit(limit)
+    )
+
+
+def _short_sessions_stmt(user_id: str, limit: int, after: Tuple[float, str] | None = None):
+    """Короткие поля сессий по убыванию (updated_at, session_id), начиная после ключа after."""
+    stmt = select(
+        Session.session_id,
+        Session.version,
+        Session.title,
+        Session.inserted_at,
+        Session.updated_at,
+    ).where(Session.user_id == user_id)
+    if after is not None:
+        updated_at, session_id = after
+        stmt = stmt.where(
+            or_(
+                Session.updated_at < updated_at,
+                and_(Session.updated_at == updated_at, Session.session_id < session_id),
+            )
+        )
+    return stmt.order_by(Session.updated_at.desc(), Session.session_id.desc()).limit(limit)
+
+
+def _session_stamps_stmt(user_id: str):
+    return select(Session.session_id, Session.version, Session.updated_at).where(Session.user_id == user_id)
+
+
+def _search_stale_stmt(user_id: str):
+    """Сессии пользователя, которых нет в полнотекстовом индексе или которые изменились после индексации."""
+    return (
+        select(sessions.c.session_id, session_search.c.search_id)
+        .outerjoin(session_search, session_search.c.session_id == sessions.c.session_id)
+        .where(
+            sessions.c.user_id == user_id,
+            or_(
+                session_search.c.search_id.is_(None),
+                session_search.c.version != sessions.c.version,
+                session_search.c.updated_at != sessions.c.updated_at,
+            ),
+        )
+    )
+
+
+def _search_stamp_stmt(session: Session, search_id: int | None):
+    stamp = {"version": session.version, "updated_at": session.updated_at}
+    if search_id is None:
+        return insert(session_search).values(session_id=session.session_id, **stamp)
+    return update(session_search).where(session_search.c.search_id == search_id).values(**stamp)
+
+
+def _delete_session_stmt(user_id: str, session_id: str):
+    return delete(Session).filter_by(session_id=session_id, user_id=user_id)
+
+
+def _update_if_version_stmt(user_id: str, session_id: str, expected_version: int, values: Dict[str, Any]):
+    return (
+        update(Session)
+        .filter_by(user_id=user_id, session_id=session_id, version=expected_version)
+        .values(**values, version=expected_version + 1)
+        .execution_options(synchronize_session=False)
+    )
 
 
 class UserRepository(IRepository):
@@ -24,6 +134,11 @@ class UserRepository(IRepository):
     def list(self):
         return self.db.query(User).all()
 
+    def update_time(self, user_id: str, last_used_at: float) -> None:
+        self.db.query(User).filter_by(user_id=user_id).update(
+            {"last_used_at": last_used_at}, synchronize_session=False
+        )
+
 
 class SessionRepository(IRepository):
     def __init__(self, db: DB):
@@ -35,8 +150,59 @@ class SessionRepository(IRepository):
     def get(self, object_id: str):
         return self.db.query(Session).filter_by(session_id=object_id).first()
 
-    def list_for_user(self, user_id: str):
-        return self.db.query(Session).filter_by(user_id=user_id).all()
+    def get_for_user(self, user_id: str, session_id: str, full: bool = False) -> Session | None:
+        return self.db.scalars(_session_for_user_stmt(user_id, session_id, full)).first()
+
+    def delete_for_user(self, user_id: str, session_id: str) -> bool:
+        return self.db.execute(_delete_session_stmt(user_id, session_id)).rowcount == 1
+
+    def list_for_user(
+        self,
+        user_id: str,
+        full: bool = False,
+        session_ids: Collection[str] | None = None,
+        search_tokens: bool = False,
+    ):
+        return self.db.scalars(_sessions_for_user_stmt(user_id, full, session_ids, search_tokens)).all()
+
+    def list_stamps(self, user_id: str) -> Dict[str, Tuple[int, float]]:
+        """session_id -> (version, updated_at): по ним видно, какие сессии изменились."""
+        rows = self.db.execute(_session_stamps_stmt(user_id)).all()
+        return {session_id: (version, updated_at) for session_id, version, updated_at in rows}
+
+    def list_search_stale(self, user_id: str) -> Dict[str, int | None]:
+        """session_id -> search_id (None, если сессия ещё не индексировалась) для устаревших записей индекса."""
+        return dict(self.db.execute(_search_stale_stmt(user_id)).all())
+
+    def index_for_search(self, session: Session, search_id: int | None) -> None:
+        result = self.db.execute(_search_stamp_stmt(session, search_id))
+        if search_id is None:
+            search_id = result.inserted_primary_key[0]
+        for stmt, params in fulltext_dialect(self.db.get_bind().dialect.name).index_statements(search_id, session):
+            self.db.execute(stmt, params)
+
+    def search_fulltext(self, user_id: str, query: str, limit: int) -> List[Dict[str, Any]]:
+        search = fulltext_dialect(self.db.get_bind().dialect.name).search_statement(user_id, query, limit)
+        if search is None:
+            return []
+        return [dict(row) for row in self.db.execute(*search).mappings().all()]
+
+    def list_documents(self, user_id: str, session_id: str, offset: int, limit: int) -> List[SessionDocument]:
+        return self.db.scalars(_documents_page_stmt(user_id, session_id, offset, limit)).all()
+
+    def list_short(
+        self, user_id: str, limit: int, after: Tuple[float, str] | None = None
+    ) -> List[Dict[str, Any]]:
+        rows = self.db.execute(_short_sessions_stmt(user_id, limit, after)).mappings().all()
+        return [dict(row) for row in rows]
+
+    def update_if_version(self, user_id: str, session_id: str, expected_version: int, **values) -> bool:
+        """
+        Атомарный compare-and-swap: UPDATE ... WHERE version = :expected_version.
+        Возвращает False, если сессию успели изменить или удалить.
+        """
+        stmt = _update_if_version_stmt(user_id, session_id, expected_version, values)
+        return self.db.execute(stmt).rowcount == 1
 
 
 class ReportTemplateRepository(IRepository):
@@ -58,3 +224,109 @@ class ReportTemplateRepository(IRepository):
             .filter_by(report_index=report_index)
             .all()
         )
+
+    def delete_all(self) -> None:
+        self.db.query(ReportTemplate).delete()
+
+
+class AsyncUserRepository(IAsyncRepository):
+    def __init__(self, db: "AsyncSession"):
+        self.db = db
+
+    def add(self, data: User) -> None:
+        self.db.add(data)
+
+    async def get(self, object_id: str):
+        return (await self.db.scalars(select(User).filter_by(user_id=object_id))).first()
+
+    async def delete(self, user_id: str) -> None:
+        user = await self.get(user_id)
+        if user:
+            await self.db.delete(user)
+
+    async def list(self):
+        return (await self.db.scalars(select(User))).all()
+
+    async def update_time(self, user_id: str, last_used_at: float) -> None:
+        await self.db.execute(
+            update(User)
+            .filter_by(user_id=user_id)
+            .values(last_used_at=last_used_at)
+            .execution_options(synchronize_session=False)
+        )
+
+
+class AsyncSessionRepository(IAsyncRepository):
+    def __init__(self, db: "AsyncSession"):
+        self.db = db
+
+    def add(self, data: Session) -> None:
+        self.db.add(data)
+
+    async def get(self, object_id: str):
+        return (await self.db.scalars(select(Session).filter_by(session_id=object_id))).first()
+
+    async def get_for_user(self, user_id: str, session_id: str, full: bool = False) -> Session | None:
+        return (await self.db.scalars(_session_for_user_stmt(user_id, session_id, full))).first()
+
+    async def delete_for_user(self, user_id: str, session_id: str) -> bool:
+        return (await self.db.execute(_delete_session_stmt(user_id, session_id))).rowcount == 1
+
+    async def list_for_user(
+        self,
+        user_id: str,
+        full: bool = False,
+        session_ids: Collection[str] | None = None,
+        search_tokens: bool = False,
+    ):
+        return (await self.db.scalars(_sessions_for_user_stmt(user_id, full, session_ids, search_tokens))).all()
+
+    async def list_stamps(self, user_id: str) -> Dict[str, Tuple[int, float]]:
+        rows = (await self.db.execute(_session_stamps_stmt(user_id))).all()
+        return {session_id: (version, updated_at) for session_id, version, updated_at in rows}
+
+    async def list_search_stale(self, user_id: str) -> Dict[str, int | None]:
+        return dict((await self.db.execute(_search_stale_stmt(user_id))).all())
+
+    async def index_for_search(self, session: Session, search_id: int | None) -> None:
+        result = await self.db.execute(_search_stamp_stmt(session, search_id))
+        if search_id is None:
+            search_id = result.inserted_primary_key[0]
+        for stmt, params in fulltext_dialect(self.db.get_bind().dialect.name).index_statements(search_id, session):
+            await self.db.execute(stmt, params)
+
+    async def search_fulltext(self, user_id: str, query: str, limit: int) -> List[Dict[str, Any]]:
+        search = fulltext_dialect(self.db.get_bind().dialect.name).search_statement(user_id, query, limit)
+        if search is None:
+            return []
+        return [dict(row) for row in (await self.db.execute(*search)).mappings().all()]
+
+    async def list_documents(self, user_id: str, session_id: str, offset: int, limit: int) -> List[SessionDocument]:
+        return (await self.db.scalars(_documents_page_stmt(user_id, session_id, offset, limit))).all()
+
+    async def list_short(
+        self, user_id: str, limit: int, after: Tuple[float, str] | None = None
+    ) -> List[Dict[str, Any]]:
+        rows = (await self.db.execute(_short_sessions_stmt(user_id, limit, after))).mappings().all()
+        return [dict(row) for row in rows]
+
+    async def update_if_version(self, user_id: str, session_id: str, expected_version: int, **values) -> bool:
+        stmt = _update_if_version_stmt(user_id, session_id, expected_version, values)
+        return (await self.db.execute(stmt)).rowcount == 1
+
+
+class AsyncReportTemplateRepository(IAsyncRepository):
+    def __init__(self, db: "AsyncSession"):
+        self.db = db
+
+    def add(self, data: ReportTemplate) -> None:
+        self.db.add(data)
+
+    async def get(self, object_id: str):
+        return (await self.db.scalars(select(ReportTemplate).filter_by(template_id=object_id))).first()
+
+    async def list(self):
+        return (await self.db.scalars(select(ReportTemplate))).all()
+
+    async def list_by_report_types(self, report_index: int):
+        return (await self.db.scalars(select(ReportTemplate).filter_by(report_index=report_index))).all()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, NamedTuple
+
+from .base import IDomain
+
+DOC_FIELDS = ("text", "title", "url", "date", "source")
+
+
+class DocRecord(NamedTuple):
+    """
+    Неизменяемое представление документа сессии: кортеж вместо словаря из пяти ключей.
+    Поля уже очищены от пробелов, поэтому запись передаётся от API до хранилища без копий.
+    """
+
+    text: str
+    title: str = ""
+    url: str = ""
+    date: str = ""
+    source: str = ""
+
+    @classmethod
+    def coerce(cls, item: Any) -> DocRecord | None:
+        """Приводит DocRecord | DocText | dict | str к DocRecord; документ без текста даёт None."""
+        if isinstance(item, DocRecord):
+            record = item
+        elif hasattr(item, "to_record"):
+            record = item.to_record()
+        elif isinstance(item, Mapping):
+            record = cls(*(str(item.get(field, "")).strip() for field in DOC_FIELDS))
+        else:
+            record = cls(str(item).strip())
+        return record if record.text else None
+
+    def to_dict(self) -> Dict[str, str]:
+        return self._asdict()
+
+
+def document_hash(doc: DocRecord) -> str:
+    digest = hashlib.sha256()
+    for value in doc:
+        digest.update(value.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+@dataclass
+class SessionDocument(IDomain):
+    position: int
+    content_hash: str
+    text: str
+    title: str = ""
+    url: str = ""
+    date: str = ""
+    source: str = ""
+
+    @classmethod
+    def from_record(cls, position: int, doc: DocRecord) -> SessionDocument:
+        return cls(position, document_hash(doc), *doc)
+
+    def assign(self, doc: DocRecord, content_hash: str) -> None:
+        self.content_hash = content_hash
+        for field, value in zip(DOC_FIELDS, doc):
+            setattr(self, field, value)
+
+    def to_record(self) -> DocRecord:
+        return DocRecord(self.text, self.title, self.url, self.date, self.source)
+
+    def to_dict(self) -> Dict[str, str]:
+        return {
+            "text": self.text,
+            "title": self.title,
+            "url": self.url,
+            "date": self.date,
+            "source": self.source,
+        }
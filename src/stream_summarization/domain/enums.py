@@ -27,3 +27,9 @@ class StatusType(Enum):
     SUCCESS = "SUCCESS"
     NOT_FOUND = "NOT_FOUND"
     ERROR = "ERROR"
+
+
+class SearchMode(Enum):
+    LEXICAL = "LEXICAL"
+    SEMANTIC = "SEMANTIC"
+    HYBRID = "HYBRID"
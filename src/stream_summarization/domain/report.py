@@ -1,10 +1,19 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import NamedTuple
 
 from .base import IDomain
 
 
+class TemplateRecord(NamedTuple):
+    """Неизменяемый шаблон отчёта из report_types.json."""
+
+    report_index: int
+    report_type: str
+    prompt: str
+
+
 @dataclass
 class ReportTemplate(IDomain):
     template_id: str
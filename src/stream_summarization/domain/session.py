@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import json
-from typing import Iterable, List, Dict, Any, Sequence, Mapping
+from typing import Iterable, List, Any, Tuple
 
 from .base import IDomain
+from .document import DocRecord, SessionDocument, document_hash
 
 
 class Session(IDomain):
@@ -20,26 +21,42 @@ class Session(IDomain):
         self.session_id = session_id
         self.version = version
         self.title = title
+        self.documents: List[SessionDocument] = []
         self.update_docs(text)
         self.summary = summary
         self.inserted_at = inserted_at
         self.updated_at = updated_at
+        self.search_tokens: str | None = None
 
 
     def __str__(self) -> str:
         first = ""
         docs = self.doc_texts
         if docs:
-            first = (docs[0].get("title") or docs[0].get("text") or "")[:40]
+            first = (docs[0].title or docs[0].text or "")[:40]
         preview_source = self.title or first
         return (preview_source or "").strip()[:40]
 
     @property
-    def doc_texts(self) -> List[Dict[str, str]]:
+    def doc_texts(self) -> Tuple[DocRecord, ...]:
         """
-        Возвращает нормализованный List[DocText] как список словарей:
-        {text, title, url, date, source}
+        Возвращает нормализованные документы как кортеж DocRecord(text, title, url, date, source).
+        Результат кэшируется до update_docs или перезагрузки сессии из БД.
         """
+        cached = getattr(self, "_doc_cache", None)
+        if cached is None:
+            cached = self._parse_docs()
+            self._doc_cache = cached
+        return cached
+
+    def invalidate_docs(self) -> None:
+        self._doc_cache = None
+
+    def _parse_docs(self) -> Tuple[DocRecord, ...]:
+        documents = getattr(self, "documents", None)
+        if documents:
+            return tuple(document.to_record() for document in documents)
+        # Сессии, сохранённые до появления таблицы session_documents, хранят JSON в text
         raw = getattr(self, "text", "")
         if isinstance(raw, list):
             payload = raw
@@ -51,49 +68,32 @@ class Session(IDomain):
         else:
             payload = []
 
-        out: List[Dict[str, str]] = []
-        for item in payload:
-            if isinstance(item, Mapping):
-                text = str(item.get("text", "")).strip()
-                if not text:
-                    continue
-                out.append({
-                    "text": text,
-                    "title": str(item.get("title", "")).strip(),
-                    "url": str(item.get("url", "")).strip(),
-                    "date": str(item.get("date", "")).strip(),
-                    "source": str(item.get("source", "")).strip(),
-                })
-            else:
-                s = str(item).strip()
-                if s:
-                    out.append({"text": s, "title": "", "url": "", "date": "", "source": ""})
-        return out
+        return tuple(self.normalize_docs(payload))
 
     @property
     def text_chunks(self) -> List[str]:
         """Legacy: только тексты для обратной совместимости."""
-        return [d["text"] for d in self.doc_texts]
+        return [d.text for d in self.doc_texts]
 
     def update_docs(self, docs: Iterable[Any]) -> None:
         """
-        Принимает List[DocText | dict | str] и сохраняет JSON.
+        Принимает List[DocRecord | DocText | dict | str] и обновляет документы по позициям:
+        меняются только строки с другим content_hash, лишние удаляются.
         """
-        norm: List[Dict[str, str]] = []
-        for item in docs:
-            if isinstance(item, Mapping):
-                txt = str(item.get("text", "")).strip()
-                if not txt:
-                    continue
-                norm.append({
-                    "text": txt,
-                    "title": str(item.get("title", "")).strip(),
-                    "url": str(item.get("url", "")).strip(),
-                    "date": str(item.get("date", "")).strip(),
-                    "source": str(item.get("source", "")).strip(),
-                })
-            else:
-                s = str(item).strip()
-                if s:
-                    norm.append({"text": s, "title": "", "url": "", "date": "", "source": ""})
-        self.text = json.dumps(norm, ensure_ascii=False)
+        norm = self.normalize_docs(docs)
+        existing = list(self.documents)
+        for position, doc in enumerate(norm):
+            if position >= len(existing):
+                self.documents.append(SessionDocument.from_record(position, doc))
+                continue
+            content_hash = document_hash(doc)
+            if existing[position].content_hash != content_hash:
+                existing[position].assign(doc, content_hash)
+        del self.documents[len(norm):]
+        self.text = ""
+        self._doc_cache = tuple(norm)
+
+    @staticmethod
+    def normalize_docs(docs: Iterable[Any]) -> List[DocRecord]:
+        """Нормализует List[DocRecord | DocText | dict | str]; готовые DocRecord не копируются."""
+        return [record for record in map(DocRecord.coerce, docs) if record is not None]
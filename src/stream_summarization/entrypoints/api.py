@@ -1,13 +1,32 @@
+from stream_summarization.services.startup import startup_profile  # noqa: I001 - засекает время импорта первым
+
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from stream_summarization.entrypoints.routers import report, session, user
 from stream_summarization.services import config
+from stream_summarization.services.extraction import extraction_cache, extraction_pool
+from stream_summarization.services.templates import template_registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with startup_profile.stage("database"):
+        config.init_database()
+    with startup_profile.stage("report_templates"):
+        template_registry.start_watching()
+    startup_profile.ready()
+    yield
+    template_registry.stop_watching()
+    extraction_pool.shutdown()
+    await config.dispose_database()
 
 
 class API(FastAPI):
     def __init__(self) -> None:
-        super().__init__(title="FastAPI", description="Stream Summarization API")
+        super().__init__(title="FastAPI", description="Stream Summarization API", lifespan=lifespan)
 
         self.add_middleware(
             CORSMiddleware,
@@ -21,9 +40,18 @@ class API(FastAPI):
         async def health():
             return {"status": "ok"}
 
+        @self.get("/health/startup", summary="Профиль запуска сервиса")
+        async def startup():
+            return startup_profile.report()
+
+        @self.get("/health/extraction_cache", summary="Статистика кэша извлечённого текста")
+        async def extraction_cache_stats():
+            return extraction_cache.stats()
+
 
 app = API()
 prefix = config.settings.STREAM_SUMMARIZATION_URL_PREFIX
 app.include_router(user.router, prefix=f"{prefix}/user", tags=["users"])
 app.include_router(session.router, prefix=f"{prefix}/chat_session", tags=["sessions"])
 app.include_router(report.router, prefix=f"{prefix}/reports", tags=["reports"])
+startup_profile.imports_finished()
@@ -1,38 +1,129 @@
-from pathlib import Path
-from typing import List
+import json
+from contextlib import AsyncExitStack
+from typing import AsyncGenerator, List
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-from stream_summarization.entrypoints.schemas.report import ReportTypesResponse, LoadDocumentResponse
+from stream_summarization.entrypoints.schemas.report import (
+    LoadDocumentResponse,
+    ReloadTemplatesResponse,
+    ReportTypesResponse,
+)
+from stream_summarization.services.config import authorization, settings
 from stream_summarization.services.data.unit_of_work import ReportTemplateUoW
-from stream_summarization.services.handlers.report import extract_text, get_report_types
+from stream_summarization.services.handlers.report import (
+    check_format,
+    get_report_types,
+    load_documents,
+    reload_report_templates,
+    stream_documents,
+)
+from stream_summarization.services.uploads import SpooledUpload, UploadTooLarge, spooled_uploads
 
 router = APIRouter()
 
 
-@router.post("/load_documents", response_model=LoadDocumentResponse, status_code=200, summary="Загрузить документы")
-async def load_document(
-    documents: List[UploadFile] = File(...),
-) -> LoadDocumentResponse:
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
 
-    contents: List[str] = []
+# Тело разбирается потоково (services/uploads.py), поэтому схема запроса описана вручную
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["documents"],
+                    "properties": {"documents": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                }
+            }
+        },
+    }
+}
 
-    for document in documents:
-        filename = document.filename or "document.txt"
-        suffix = Path(filename).suffix or ".txt"
-        try:
-            content = await document.read()
-            text = extract_text(content, suffix)
-        except ValueError as error:
-            raise HTTPException(status_code=400, detail=f"{error}") from error
-        except RuntimeError as error:
-            raise HTTPException(status_code=500, detail=f"{error}") from error
-        contents.append(text)
 
-    return LoadDocumentResponse(contents=contents)
+async def _ndjson_documents(uploads: List[SpooledUpload], max_pages: int | None) -> AsyncGenerator[bytes, None]:
+    files = [(upload.path, upload.suffix) for upload in uploads]
+    async for item in stream_documents(files, max_pages):
+        item["filename"] = uploads[item["document"]].filename
+        yield json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+async def _close_stream(body: AsyncGenerator[bytes, None], stack: AsyncExitStack) -> None:
+    # Ответ отдан или клиент отключился: генератор закрывается (недочитанные файлы
+    # больше не разбираются), затем удаляются временные файлы загрузки
+    try:
+        await body.aclose()
+    finally:
+        await stack.aclose()
+
+
+@router.post(
+    "/load_documents",
+    response_model=LoadDocumentResponse,
+    status_code=200,
+    summary="Загрузить документы",
+    description=(
+        "stream=true — текст отдаётся построчно в NDJSON по мере извлечения: строка на страницу "
+        "(document, filename, page, text) и строка done с числом страниц и ошибкой в конце каждого файла. "
+        "preview_pages — извлечь только первые страницы PDF."
+    ),
+    openapi_extra=UPLOAD_OPENAPI,
+)
+async def load_document(
+    request: Request,
+    stream: bool = Query(default=False),
+    preview_pages: int | None = Query(default=None, ge=1),
+) -> LoadDocumentResponse:
+    try:
+        async with AsyncExitStack() as stack:
+            uploads, _ = await stack.enter_async_context(
+                spooled_uploads(request.headers, request.stream(), "documents", check=check_format)
+            )
+            if stream:
+                body = _ndjson_documents(uploads, preview_pages)
+                # Временные файлы живут, пока не отдана последняя строка ответа
+                cleanup = BackgroundTask(_close_stream, body, stack.pop_all())
+                return StreamingResponse(body, media_type="application/x-ndjson", background=cleanup)
+            contents, errors = await load_documents([(upload.path, upload.suffix) for upload in uploads], preview_pages)
+    except UploadTooLarge as error:
+        raise HTTPException(status_code=413, detail=f"{error}") from error
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=f"{error}") from error
+    return LoadDocumentResponse(contents=contents, errors=errors)
 
 
 @router.get("/report_types", response_model=ReportTypesResponse, status_code=200, summary="Получить типы отчётов")
-async def report_types() -> ReportTypesResponse:
-    types = get_report_types(ReportTemplateUoW())
-    return ReportTypesResponse(report_types=types)
+async def report_types(
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+) -> ReportTypesResponse:
+    body, etag = get_report_types(ReportTemplateUoW())
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.post(
+    "/reload_templates",
+    response_model=ReloadTemplatesResponse,
+    status_code=200,
+    summary="Перечитать шаблоны отчётов",
+)
+async def reload_templates(
+    auth: str = Header(default=None, alias=authorization),
+) -> ReloadTemplatesResponse:
+    if auth is None:
+        raise HTTPException(status_code=400, detail="Authorization header is required")
+    admins = settings.STREAM_SUMMARIZATION_TEMPLATE_ADMINS
+    if admins and auth not in admins:
+        raise HTTPException(status_code=403, detail="Reloading templates is not allowed for this user")
+    return ReloadTemplatesResponse(**await run_in_threadpool(reload_report_templates))
@@ -1,10 +1,14 @@
+import asyncio
 import base64
 import mimetypes
-from typing import Literal
+from typing import Any, Callable, Literal
 
-from fastapi import APIRouter, Header, HTTPException, Query
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
+from pydantic import BaseModel
 
+from stream_summarization.domain.enums import SearchMode
 from stream_summarization.entrypoints.schemas.session import (
     CreateSessionRequest,
     CreateSessionResponse,
@@ -12,6 +16,7 @@ from stream_summarization.entrypoints.schemas.session import (
     DeleteSessionResponse,
     FetchSessionResponse,
     SearchSessionsResponse,
+    SessionDocumentsResponse,
     SessionInfo,
     ShortSessionInfo,
     SessionSearchResult,
@@ -20,42 +25,92 @@ from stream_summarization.entrypoints.schemas.session import (
     UpdateSessionTitleRequest,
     UpdateSessionTitleResponse,
 )
+from stream_summarization.services import config
 from stream_summarization.services.config import authorization
-from stream_summarization.services.data.unit_of_work import ReportTemplateUoW, UserUoW
+from stream_summarization.services.data.unit_of_work import AsyncUserUoW, ReportTemplateUoW, UserUoW
+from stream_summarization.services.deadline import Deadline, DeadlineExceeded, RequestCancelled
+from stream_summarization.services.handlers.report import check_format, load_document_records
 from stream_summarization.services.handlers.session import (
+    aget_session_info,
+    aget_session_list,
     create_new_session,
     delete_exist_session,
     download_session_file,
+    get_session_documents,
     get_session_list,
     search_similarity_sessions,
     update_session_summarization,
     update_title_session,
     get_session_info
 )
+from stream_summarization.services.uploads import UploadTooLarge, spooled_uploads
 
 router = APIRouter()
 
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
+def _model_response(model: BaseModel) -> Response:
+    """
+    Сериализует ответ с документами сразу в JSON средствами pydantic-core,
+    минуя повторную валидацию response_model, jsonable_encoder и json.dumps.
+    """
+
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+async def _run_cancellable(raw_request: Request, deadline: Deadline, handler: Callable[..., Any], **kwargs: Any) -> Any:
+    """Выполняет обработчик в пуле потоков и отменяет его, если клиент отключился."""
+
+    task = asyncio.ensure_future(run_in_threadpool(handler, deadline=deadline, **kwargs))
+    while not task.done():
+        await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+        if not task.done() and await raw_request.is_disconnected():
+            deadline.cancel()
+            break
+    try:
+        return await task
+    except RequestCancelled as error:
+        raise HTTPException(status_code=499, detail=str(error))
+    except DeadlineExceeded as error:
+        raise HTTPException(status_code=504, detail=str(error))
+
 
 @router.get("/fetch_page", response_model=FetchSessionResponse, status_code=200, summary="Получить список сессий")
-async def fetch_page(auth: str = Header(default=None, alias=authorization)) -> FetchSessionResponse:
+async def fetch_page(
+        limit: int | None = Query(default=None, ge=1),
+        cursor: str | None = Query(default=None),
+        auth: str = Header(default=None, alias=authorization),
+) -> FetchSessionResponse:
     if auth is None:
         raise HTTPException(status_code=400, detail="Authorization header is required")
     try:
-        sessions = [ShortSessionInfo(**session) for session in get_session_list(user_id=auth, uow=UserUoW())]
+        if config.async_session_factory is not None:
+            page, next_cursor = await aget_session_list(user_id=auth, uow=AsyncUserUoW(), limit=limit, cursor=cursor)
+        else:
+            page, next_cursor = await run_in_threadpool(
+                get_session_list, user_id=auth, uow=UserUoW(), limit=limit, cursor=cursor
+            )
     except ValueError as error:
         raise HTTPException(status_code=400, detail=str(error))
-    return FetchSessionResponse(sessions=sessions)
+    sessions = [ShortSessionInfo(**session) for session in page]
+    return FetchSessionResponse(sessions=sessions, next_cursor=next_cursor)
 
 
 @router.post("/create", response_model=CreateSessionResponse, status_code=200, summary="Создать сессию")
 async def create(
         request: CreateSessionRequest,
+        raw_request: Request,
         auth: str = Header(default=None, alias=authorization),
+        request_deadline: str | None = Header(default=None, alias="X-Request-Deadline"),
 ) -> CreateSessionResponse:
     if auth is None:
         raise HTTPException(status_code=400, detail="Authorization header is required")
     try:
-        session_id, summary, error = create_new_session(
+        session_id, summary, error = await _run_cancellable(
+            raw_request,
+            Deadline.from_header(request_deadline),
+            create_new_session,
             user_id=auth,
             title=request.title,
             documents=request.documents,
@@ -69,15 +124,102 @@ async def create(
         raise HTTPException(status_code=400, detail=str(error))
 
 
+# Тело разбирается потоково (services/uploads.py), поэтому схема запроса описана вручную
+CREATE_FROM_FILES_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["documents", "report_index"],
+                    "properties": {
+                        "documents": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                        "title": {"type": "string", "default": ""},
+                        "report_index": {"type": "integer"},
+                        "temporary": {"type": "boolean", "default": False},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@router.post(
+    "/create_from_files",
+    response_model=CreateSessionResponse,
+    status_code=200,
+    summary="Создать сессию из файлов",
+    description=(
+        "То же, что /create, но документы загружаются файлами: текст извлекается на сервере "
+        "и сразу идёт в суммаризацию, не возвращаясь клиенту. title документа — имя файла."
+    ),
+    openapi_extra=CREATE_FROM_FILES_OPENAPI,
+)
+async def create_from_files(
+        raw_request: Request,
+        auth: str = Header(default=None, alias=authorization),
+        request_deadline: str | None = Header(default=None, alias="X-Request-Deadline"),
+) -> CreateSessionResponse:
+    if auth is None:
+        raise HTTPException(status_code=400, detail="Authorization header is required")
+    try:
+        # Бюджет запроса включает приём файлов и извлечение текста, на суммаризацию идёт остаток
+        deadline = Deadline.from_header(request_deadline)
+        async with spooled_uploads(
+            raw_request.headers,
+            raw_request.stream(),
+            "documents",
+            check=check_format,
+            fields=("title", "report_index", "temporary"),
+        ) as (uploads, fields):
+            try:
+                report_index = int(fields.get("report_index", ""))
+            except ValueError:
+                raise ValueError("report_index must be an integer") from None
+            try:
+                documents = await asyncio.wait_for(
+                    load_document_records([(upload.filename, upload.path, upload.suffix) for upload in uploads]),
+                    deadline.timeout(),
+                )
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("Превышен срок выполнения запроса на этапе extraction") from None
+        session_id, summary, error = await _run_cancellable(
+            raw_request,
+            deadline,
+            create_new_session,
+            user_id=auth,
+            title=fields.get("title", ""),
+            documents=documents,
+            report_index=report_index,
+            temporary=fields.get("temporary", "").strip().lower() in ("1", "true", "on", "yes"),
+            user_uow=UserUoW(),
+            report_uow=ReportTemplateUoW(),
+        )
+    except UploadTooLarge as error:
+        raise HTTPException(status_code=413, detail=str(error))
+    except DeadlineExceeded as error:
+        raise HTTPException(status_code=504, detail=str(error))
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return CreateSessionResponse(session_id=session_id, summary=summary, error=error)
+
+
 @router.post("/update_summarization", response_model=UpdateSessionSummarizationResponse, status_code=200, summary="Обновить сессии")
 async def update_summarization(
         request: UpdateSessionSummarizationRequest,
+        raw_request: Request,
         auth: str = Header(default=None, alias=authorization),
+        request_deadline: str | None = Header(default=None, alias="X-Request-Deadline"),
 ) -> UpdateSessionSummarizationResponse:
     if auth is None:
         raise HTTPException(status_code=400, detail="Authorization header is required")
     try:
-        summary, error = update_session_summarization(
+        summary, error = await _run_cancellable(
+            raw_request,
+            Deadline.from_header(request_deadline),
+            update_session_summarization,
             user_id=auth,
             session_id=request.session_id,
             documents=request.documents,
@@ -99,7 +241,8 @@ async def update_title(
     if auth is None:
         raise HTTPException(status_code=400, detail="Authorization header is required")
     try:
-        session = update_title_session(
+        session = await run_in_threadpool(
+            update_title_session,
             user_id=auth,
             session_id=request.session_id,
             title=request.title,
@@ -108,23 +251,24 @@ async def update_title(
         )
     except ValueError as error:
         raise HTTPException(status_code=400, detail=str(error))
-    return UpdateSessionTitleResponse(**session)
+    return _model_response(UpdateSessionTitleResponse(**session))
 
 
 @router.get("/search", response_model=FetchSessionResponse, status_code=200, summary="Поиск сессий")
 async def similarity_sessions(
         query: str = Query(..., min_length=1),
+        mode: str = Query(SearchMode.LEXICAL, description="LEXICAL, SEMANTIC или HYBRID"),
         auth: str = Header(default=None, alias=authorization),
 ) -> FetchSessionResponse:
     if auth is None:
         raise HTTPException(status_code=400, detail="Authorization header is required")
     try:
-        sessions = [
-            ShortSessionInfo(**session) for session
-            in search_similarity_sessions(user_id=auth, query=query, uow=UserUoW())
-        ]
+        results = await run_in_threadpool(search_similarity_sessions, user_id=auth, query=query, uow=UserUoW(), mode=mode)
+        sessions = [ShortSessionInfo(**session) for session in results]
     except ValueError as error:
         raise HTTPException(status_code=400, detail=str(error))
+    except RuntimeError as error:
+        raise HTTPException(status_code=500, detail=str(error))
     return FetchSessionResponse(sessions=sessions)
 
 
@@ -137,10 +281,37 @@ async def session_info(
     if user_id is None:
         raise HTTPException(status_code=400, detail="Bad Request")
     try:
-        session = get_session_info(session_id=session_id, user_id=user_id, user_uow=UserUoW())
+        if config.async_session_factory is not None:
+            session = await aget_session_info(session_id=session_id, user_id=user_id, user_uow=AsyncUserUoW())
+        else:
+            session = await run_in_threadpool(get_session_info, session_id=session_id, user_id=user_id, user_uow=UserUoW())
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return _model_response(SessionInfo(**session))
+
+
+@router.get(
+    "/{session_id}/documents",
+    response_model=SessionDocumentsResponse,
+    status_code=200,
+    summary="Документы сессии постранично",
+)
+async def session_documents(
+        session_id: str,
+        offset: int = Query(default=0, ge=0),
+        limit: int | None = Query(default=None, ge=1),
+        auth: str = Header(default=None, alias=authorization),
+) -> SessionDocumentsResponse:
+    if auth is None:
+        raise HTTPException(status_code=400, detail="Authorization header is required")
+    try:
+        documents, next_offset = await run_in_threadpool(
+            get_session_documents,
+            session_id=session_id, user_id=auth, uow=UserUoW(), offset=offset, limit=limit
+        )
     except ValueError as error:
         raise HTTPException(status_code=400, detail=str(error))
-    return SessionInfo(**session)
+    return _model_response(SessionDocumentsResponse(documents=documents, next_offset=next_offset))
 
 
 @router.get(
@@ -179,7 +350,8 @@ async def download_file(
         raise HTTPException(status_code=400, detail="Bad Request")
 
     try:
-        path = download_session_file(
+        path = await run_in_threadpool(
+            download_session_file,
             session_id=session_id,
             format=format,
             user_id=user_id,
@@ -193,8 +365,7 @@ async def download_file(
         media_type = guessed_type or ("application/pdf" if format.lower() == "pdf" else "application/octet-stream")
 
         if "application/json" in (accept or ""):
-            with path.open("rb") as file_handle:
-                payload = base64.b64encode(file_handle.read()).decode("ascii")
+            payload = base64.b64encode(await run_in_threadpool(path.read_bytes)).decode("ascii")
             return JSONResponse(
                 content={"filename": filename, "content_type": media_type, "data": payload},
                 headers={"X-Served-For-User": user_id or "", "Access-Control-Expose-Headers": "*"},
@@ -220,7 +391,7 @@ async def delete(
     if auth is None:
         raise HTTPException(status_code=400, detail="Authorization header is required")
     try:
-        status = delete_exist_session(session_id=request.session_id, user_id=auth, uow=UserUoW())
+        status = await run_in_threadpool(delete_exist_session, session_id=request.session_id, user_id=auth, uow=UserUoW())
     except ValueError as error:
         raise HTTPException(status_code=400, detail=str(error))
     return DeleteSessionResponse(status=status)
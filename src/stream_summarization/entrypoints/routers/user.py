@@ -7,6 +7,7 @@ from stream_summarization.entrypoints.schemas.user import (
     UsersResponse,
 )
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from stream_summarization.services.data.unit_of_work import UserUoW
 from stream_summarization.services.handlers.user import create_new_user, delete_exist_user, get_user_list
 
@@ -16,7 +17,7 @@ router = APIRouter()
 @router.get("/get_users", response_model=UsersResponse, status_code=200, summary="Получить пользователей")
 async def get_users() -> UsersResponse:
     try:
-        users = [UserInfo(**user) for user in get_user_list(uow=UserUoW())]
+        users = [UserInfo(**user) for user in await run_in_threadpool(get_user_list, uow=UserUoW())]
         return UsersResponse(users=users)
     except Exception as error:  # pragma: no cover - defensive branch
         raise HTTPException(status_code=500, detail=str(error))
@@ -25,7 +26,7 @@ async def get_users() -> UsersResponse:
 @router.post("/create_user", response_model=CreateUserResponse, status_code=200, summary="Создать пользователя")
 async def create_user(request: CreateUserRequest) -> CreateUserResponse:
     try:
-        status = create_new_user(user_id=request.user_id, temporary=request.temporary, uow=UserUoW())
+        status = await run_in_threadpool(create_new_user, user_id=request.user_id, temporary=request.temporary, uow=UserUoW())
         return CreateUserResponse(status=status)
     except Exception as error:  # pragma: no cover - defensive branch
         raise HTTPException(status_code=500, detail=str(error))
@@ -34,7 +35,7 @@ async def create_user(request: CreateUserRequest) -> CreateUserResponse:
 @router.delete("/delete_user", response_model=DeleteUserResponse, status_code=200, summary="Удалить пользователя")
 async def delete_user(request: DeleteUserRequest) -> DeleteUserResponse:
     try:
-        status = delete_exist_user(request.user_id, UserUoW())
+        status = await run_in_threadpool(delete_exist_user, request.user_id, UserUoW())
         return DeleteUserResponse(status=status)
     except Exception as error:  # pragma: no cover - defensive branch
         raise HTTPException(status_code=500, detail=str(error))
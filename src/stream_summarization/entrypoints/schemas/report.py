@@ -1,15 +1,21 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
 
 class LoadDocumentResponse(BaseModel):
     contents: List[str]
+    # Ошибка извлечения по каждому файлу (None — успешно); у файла с ошибкой contents — пустая строка
+    errors: List[Optional[str]] = []
 
 class ReportTypesResponse(BaseModel):
     report_types: List[str]
 
+class ReloadTemplatesResponse(BaseModel):
+    version: str
+    report_types: List[str]
+
 class ReportErrorResponse(BaseModel):
     detail: str
@@ -1,7 +1,8 @@
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
+from stream_summarization.domain.document import DocRecord
 from stream_summarization.domain.enums import StatusType
 
 
@@ -25,12 +26,18 @@ class ShortSessionInfo(BaseModel):
     updated_at: float
 
 class DocText(BaseModel):
+    # Пробелы обрезаются при валидации, дальше документ идёт как DocRecord без повторной очистки
+    model_config = ConfigDict(str_strip_whitespace=True)
+
     text: str
     title: str = ""
     url: str = ""
     date: str = ""
     source: str = ""
 
+    def to_record(self) -> DocRecord:
+        return DocRecord(self.text, self.title, self.url, self.date, self.source)
+
 class SessionInfo(BaseModel):
     session_id: str
     version: int
@@ -41,8 +48,14 @@ class SessionInfo(BaseModel):
     updated_at: float
 
 
+class SessionDocumentsResponse(BaseModel):
+    documents: List[DocText]
+    next_offset: int | None = None
+
+
 class FetchSessionResponse(BaseModel):
     sessions: List[ShortSessionInfo]
+    next_cursor: str | None = None
 
 class CreateSessionRequest(BaseModel):
     title: str = ""
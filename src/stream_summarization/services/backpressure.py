@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable
+
+from stream_summarization.services.config import settings
+
+logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Backpressure:
+    """
+    Состояние LLM-бэкенда: глубина очереди запросов и автомат-предохранитель.
+
+    После failure_threshold подряд неудачных вызовов цепь размыкается на cooldown
+    секунд. Затем она полуоткрыта: try_acquire пропускает ровно один пробный вызов,
+    остальные получают отказ до его исхода. Успех пробы замыкает цепь, сбой снова
+    размыкает её на cooldown.
+    """
+
+    def __init__(self, max_inflight: int, failure_threshold: int, cooldown: float) -> None:
+        self.max_inflight = max_inflight
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._failures = 0
+        self._opened_at: float | None = None
+        # Поток, которому выдан пробный вызов полуоткрытой цепи
+        self._probe: int | None = None
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def circuit_open(self) -> bool:
+        """Цепь разомкнута или полуоткрыта; чтение состояние не меняет."""
+
+        return self._opened_at is not None
+
+    def try_acquire(self) -> bool:
+        """Занимает место под вызов LLM, если бэкенд не перегружен; после успеха обязателен release()."""
+
+        with self._lock:
+            if self._inflight >= self.max_inflight:
+                return False
+            if self._opened_at is not None:
+                if self._probe is not None or monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self._probe = threading.get_ident()
+            self._inflight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._inflight -= 1
+            # Проба завершилась без вызова модели (отмена, ошибка настройки): пробует следующий
+            if self._probe == threading.get_ident():
+                self._probe = None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probe == threading.get_ident():
+                logger.warning("LLM circuit probe failed, reopening the circuit")
+                self._opened_at = monotonic()
+                self._probe = None
+            elif self._failures >= self.failure_threshold and self._opened_at is None:
+                logger.warning("LLM circuit opened after %s consecutive failures", self._failures)
+                self._opened_at = monotonic()
+
+
+class LatestJobQueue:
+    """
+    Фоновые задания по ключу, которые выполняет один поток. Ожидает не больше
+    max_pending заданий: новое задание ключа заменяет ещё не начатое, а при
+    переполнении отбрасывается самое старое. Поэтому при долгой перегрузке очередь
+    не растёт, сколько бы заданий ни приходило.
+    """
+
+    def __init__(self, name: str, max_pending: int) -> None:
+        self.name = name
+        self.max_pending = max_pending
+        self._jobs: "OrderedDict[str, Callable[[], None]]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._worker: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._jobs)
+
+    def submit(self, key: str, job: Callable[[], None]) -> None:
+        with self._condition:
+            self._jobs.pop(key, None)
+            self._jobs[key] = job
+            while len(self._jobs) > self.max_pending:
+                dropped, _ = self._jobs.popitem(last=False)
+                logger.warning("%s for %s dropped: %s jobs are already pending", self.name, dropped, self.max_pending)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._jobs:
+                    self._condition.wait()
+                key, job = self._jobs.popitem(last=False)
+            try:
+                job()
+            except Exception:
+                logger.exception("%s for %s failed", self.name, key)
+
+
+llm_backpressure = Backpressure(
+    max_inflight=settings.STREAM_SUMMARIZATION_LLM_MAX_INFLIGHT,
+    failure_threshold=settings.STREAM_SUMMARIZATION_LLM_FAILURE_THRESHOLD,
+    cooldown=settings.STREAM_SUMMARIZATION_LLM_COOLDOWN,
+)
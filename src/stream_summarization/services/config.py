@@ -1,14 +1,20 @@
 from __future__ import annotations
 
-import json
 import logging
 from json import JSONDecodeError
 from pathlib import Path
-from typing import List, Tuple
-from uuid import uuid4
+from typing import TYPE_CHECKING, List, Tuple
 
-from stream_summarization.adapters.orm import metadata, start_mappers
-from stream_summarization.domain.report import ReportTemplate
+from stream_summarization.adapters.compression import configure_compression
+from stream_summarization.adapters.fulltext import create_fulltext_schema
+from stream_summarization.adapters.orm import (
+    metadata,
+    migrate_added_columns,
+    migrate_added_indexes,
+    migrate_compressed_columns,
+    recompress_existing_rows,
+    start_mappers,
+)
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 from pydantic_settings.sources import (
@@ -16,14 +22,18 @@ from pydantic_settings.sources import (
     PydanticBaseSettingsSource,
 )
 from pydantic_settings.sources.providers.dotenv import DotEnvSettingsSource
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.session import Session
+from sqlalchemy.pool import StaticPool
 
 logger = logging.getLogger(__name__)
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
 
 class Settings(BaseSettings):
     @classmethod
@@ -91,19 +101,86 @@ class Settings(BaseSettings):
             formats = [str(item).strip().lower() for item in value if str(item).strip()]
         return tuple(sorted(set(formats), key=formats.index))
 
+    @field_validator("STREAM_SUMMARIZATION_TEMPLATE_ADMINS", mode="before")
+    @classmethod
+    def parse_admins(cls, value: str | List[str] | Tuple[str, ...]) -> Tuple[str, ...]:
+        items = value.split(",") if isinstance(value, str) else value
+        return tuple(str(item).strip() for item in items if str(item).strip())
+
     STREAM_SUMMARIZATION_SUPPORTED_FORMATS: Tuple[str, ...] = Field(
         default=("txt", "doc", "docx", "pdf", "odt"), description="Allowed document formats"
     )
+    STREAM_SUMMARIZATION_MAX_UPLOAD_MB: int = Field(default=50, description="Max size of one uploaded file in MiB")
+    STREAM_SUMMARIZATION_MAX_UPLOAD_FILES: int = Field(default=20, description="Max files per upload request")
+    STREAM_SUMMARIZATION_UPLOAD_DIR: str | None = Field(
+        default=None, description="Directory for spooled uploads; the system temp directory by default"
+    )
+    STREAM_SUMMARIZATION_EXTRACT_WORKERS: int = Field(
+        default=2, description="Processes extracting text from uploaded documents; 0 extracts in threads"
+    )
+    STREAM_SUMMARIZATION_EXTRACT_TIMEOUT: float = Field(
+        default=60.0, description="Seconds allowed for extracting text from one document"
+    )
+    STREAM_SUMMARIZATION_EXTRACT_SPLIT_PAGES: int = Field(
+        default=200, description="PDFs with more pages are split into page ranges parsed by several processes"
+    )
+    STREAM_SUMMARIZATION_EXTRACT_MEMORY_MB: int = Field(
+        default=2048, description="Address space limit of an extraction process in MiB; 0 disables it"
+    )
+    STREAM_SUMMARIZATION_EXTRACT_CACHE_MB: int = Field(
+        default=512, description="Size of the on-disk cache of extracted document text in MiB; 0 disables it"
+    )
+    STREAM_SUMMARIZATION_EXTRACT_CACHE_DIR: str | None = Field(
+        default=None, description="Directory of the extracted text cache; under the system temp directory by default"
+    )
     STREAM_SUMMARIZATION_MAX_SESSIONS: int = Field(default=100, description="Max sessions per user")
     STREAM_SUMMARIZATION_MAX_DOCUMENTS: int = Field(default=1000, description="Max documents per request")
     STREAM_SUMMARIZATION_MAX_CHARS: int = Field(default=100000, description="Max characters per document")
+    STREAM_SUMMARIZATION_SEARCH_BACKEND: str = Field(
+        default="memory",
+        description="Session search backend: memory (BM25 index per process) or database (tsvector / FTS5)",
+    )
+    STREAM_SUMMARIZATION_SEARCH_INDEX_USERS: int = Field(
+        default=256, description="Users whose session search indexes are kept in memory"
+    )
+    STREAM_SUMMARIZATION_EMBEDDER: str = Field(
+        default="hashing",
+        description="Embedder for semantic search: hashing or package.module:factory of a local model",
+    )
+    STREAM_SUMMARIZATION_SEMANTIC_WEIGHT: float = Field(
+        default=0.5, description="Share of semantic similarity in the hybrid search score"
+    )
+    STREAM_SUMMARIZATION_SEMANTIC_MIN_SIMILARITY: float = Field(
+        default=0.25, description="Cosine similarity below which semantic search ignores a session"
+    )
     STREAM_SUMMARIZATION_URL_PREFIX: str = Field(default="/v1", description="API URL prefix")
     STREAM_SUMMARIZATION_REPORT_TYPES_PATH: str = Field(
         default="/app/report_types.json", description="Path to report types configuration"
     )
+    STREAM_SUMMARIZATION_REPORT_TYPES_CHECK_INTERVAL: float = Field(
+        default=5.0, description="Seconds between checks of the report types file for changes"
+    )
+    STREAM_SUMMARIZATION_TEMPLATE_ADMINS: Tuple[str, ...] = Field(
+        default=(), description="Users allowed to call /reload_templates; any authorized user when empty"
+    )
     STREAM_SUMMARIZATION_CONNECTION_TIMEOUT: int = Field(
         default=60, description="Timeout for knowledge base model requests"
     )
+    STREAM_SUMMARIZATION_REQUEST_DEADLINE: int = Field(
+        default=300, description="Default and maximum summarization request deadline in seconds"
+    )
+    STREAM_SUMMARIZATION_LLM_MAX_INFLIGHT: int = Field(
+        default=8, description="LLM requests in flight before falling back to extractive summaries"
+    )
+    STREAM_SUMMARIZATION_LLM_FAILURE_THRESHOLD: int = Field(
+        default=5, description="Consecutive LLM failures that open the circuit"
+    )
+    STREAM_SUMMARIZATION_LLM_COOLDOWN: int = Field(
+        default=30, description="Seconds the LLM circuit stays open before a probe request"
+    )
+    STREAM_SUMMARIZATION_SUMMARY_UPGRADE_QUEUE: int = Field(
+        default=100, description="Pending full-summary upgrades of degraded sessions; the oldest is dropped when full"
+    )
     STREAM_SUMMARIZATION_DB_TYPE: str = Field(default="postgresql", description="DB type")
     STREAM_SUMMARIZATION_DB_HOST: str = Field(default="db", description="DB host")
     STREAM_SUMMARIZATION_DB_PORT: int = Field(default=5432, description="DB port")
@@ -112,6 +189,24 @@ class Settings(BaseSettings):
     STREAM_SUMMARIZATION_DB_PASSWORD: str | None = Field(
         default=None, description="DB password (optional for local development)"
     )
+    STREAM_SUMMARIZATION_DB_ASYNC: bool = Field(
+        default=False, description="Create an async engine (asyncpg/aiosqlite) for async units of work"
+    )
+    STREAM_SUMMARIZATION_DB_POOL_SIZE: int = Field(default=5, description="DB connection pool size")
+    STREAM_SUMMARIZATION_DB_MAX_OVERFLOW: int = Field(default=10, description="DB connections above the pool size")
+    STREAM_SUMMARIZATION_DB_POOL_PRE_PING: bool = Field(
+        default=True, description="Check pooled DB connections before use"
+    )
+    STREAM_SUMMARIZATION_COMPRESSION: str = Field(
+        default="zstd", description="Codec for stored document text and summaries: zstd, zlib or none"
+    )
+    STREAM_SUMMARIZATION_COMPRESSION_LEVEL: int = Field(default=3, description="Compression level")
+    STREAM_SUMMARIZATION_ZSTD_DICT_PATH: str | None = Field(
+        default=None, description="Trained zstd dictionary; must not change once data is written with it"
+    )
+    STREAM_SUMMARIZATION_RECOMPRESS_ON_STARTUP: bool = Field(
+        default=False, description="Compress rows written before compression was enabled at startup"
+    )
     OPENAI_API_HOST: str = Field(
         default="http://localhost:8000/v1", description="OpenAI compatible endpoint"
     )
@@ -141,7 +236,7 @@ def _build_db_uri(config: Settings) -> str:
         logger.warning(
             "Database password is not configured; using an in-memory SQLite database for temporary storage."
         )
-        return "sqlite:///:memory:"
+        return FALLBACK_SQLITE_URI
     return (
         f"{config.STREAM_SUMMARIZATION_DB_TYPE}://{config.STREAM_SUMMARIZATION_DB_USER}:{config.STREAM_SUMMARIZATION_DB_PASSWORD}@"
         f"{config.STREAM_SUMMARIZATION_DB_HOST}:{config.STREAM_SUMMARIZATION_DB_PORT}/{config.STREAM_SUMMARIZATION_DB_NAME}"
@@ -149,12 +244,66 @@ def _build_db_uri(config: Settings) -> str:
 
 
 FALLBACK_SQLITE_URI = "sqlite:///:memory:"
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def _pool_options(uri: str) -> dict:
+    if uri == FALLBACK_SQLITE_URI:
+        # У каждого соединения :memory: своя пустая база: обработчики в пуле потоков
+        # должны работать с тем же единственным соединением, что и create_all
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    if uri.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.STREAM_SUMMARIZATION_DB_POOL_SIZE,
+        "max_overflow": settings.STREAM_SUMMARIZATION_DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.STREAM_SUMMARIZATION_DB_POOL_PRE_PING,
+    }
+
+
+def _build_async_db_uri(uri: str) -> str | None:
+    # In-memory SQLite нельзя разделить между синхронным и асинхронным драйвером
+    if uri == FALLBACK_SQLITE_URI:
+        return None
+    scheme, _, rest = uri.partition("://")
+    driver = ASYNC_DRIVERS.get(scheme.split("+")[0])
+    return f"{driver}://{rest}" if driver else None
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, _connection_record) -> None:
+    # Без этого SQLite игнорирует ON DELETE CASCADE для сессий и документов
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _create_engine(uri: str) -> Engine:
+    engine = create_engine(uri, **_pool_options(uri))
+    if uri.startswith("sqlite"):
+        event.listen(engine, "connect", _enable_sqlite_foreign_keys)
+    return engine
+
+
+def _configure_compression(config: Settings) -> None:
+    dictionary = None
+    if config.STREAM_SUMMARIZATION_ZSTD_DICT_PATH:
+        dictionary = Path(config.STREAM_SUMMARIZATION_ZSTD_DICT_PATH).read_bytes()
+    configure_compression(
+        config.STREAM_SUMMARIZATION_COMPRESSION,
+        config.STREAM_SUMMARIZATION_COMPRESSION_LEVEL,
+        dictionary,
+    )
 
 
 def _initialize_engine(primary_uri: str) -> tuple[str, Engine]:
-    engine = create_engine(primary_uri)
+    engine = _create_engine(primary_uri)
     try:
         metadata.create_all(engine)
+        migrate_added_columns(engine)
+        migrate_added_indexes(engine)
+        migrate_compressed_columns(engine)
+        if settings.STREAM_SUMMARIZATION_RECOMPRESS_ON_STARTUP:
+            logger.info("Recompressed %s stored values", recompress_existing_rows(engine))
         return primary_uri, engine
     except OperationalError as exc:
         logger.warning(
@@ -163,53 +312,66 @@ def _initialize_engine(primary_uri: str) -> tuple[str, Engine]:
             exc,
         )
         engine.dispose()
-        fallback_engine = create_engine(FALLBACK_SQLITE_URI)
+        fallback_engine = _create_engine(FALLBACK_SQLITE_URI)
         metadata.create_all(fallback_engine)
         return FALLBACK_SQLITE_URI, fallback_engine
 
 
-DB_URI, engine = _initialize_engine(_build_db_uri(settings))
+def _initialize_async_engine(uri: str) -> "AsyncEngine | None":
+    if not settings.STREAM_SUMMARIZATION_DB_ASYNC:
+        return None
+    async_uri = _build_async_db_uri(uri)
+    if async_uri is None:
+        logger.warning("Async database engine is not available for %s; using the synchronous engine only.", uri)
+        return None
+    try:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        async_engine = create_async_engine(async_uri, **_pool_options(async_uri))
+    except ImportError as exc:
+        logger.warning("Async database driver is not installed (%s); using the synchronous engine only.", exc)
+        return None
+    if async_uri.startswith("sqlite"):
+        event.listen(async_engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+    return async_engine
+
+
 start_mappers()
-session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+# Фабрика создаётся без движка: init_database привязывает её при старте приложения
+session_factory = sessionmaker(expire_on_commit=False)
+DB_URI: str | None = None
+engine: Engine | None = None
+async_engine: "AsyncEngine | None" = None
+async_session_factory = None
+fulltext_search = False
 
 
-def register_report_templates(session: Session = session_factory()):
-    path = Path(settings.STREAM_SUMMARIZATION_REPORT_TYPES_PATH)
-    if not path.exists():
-        session.close()
+def init_database() -> None:
+    """Создаёт движки и схему БД. Вызывается из lifespan приложения, а не при импорте модуля."""
+
+    global DB_URI, engine, async_engine, async_session_factory, fulltext_search
+    if engine is not None:
         return
+    _configure_compression(settings)
+    DB_URI, engine = _initialize_engine(_build_db_uri(settings))
+    session_factory.configure(bind=engine)
+    if settings.STREAM_SUMMARIZATION_SEARCH_BACKEND.lower() == "database":
+        fulltext_search = create_fulltext_schema(engine)
+        if not fulltext_search:
+            logger.warning("Database search backend is not available; searching with the in-memory index.")
+    async_engine = _initialize_async_engine(DB_URI)
+    if async_engine is not None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        async_session_factory = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+
+async def dispose_database() -> None:
+    global engine, async_engine, async_session_factory, fulltext_search
+    if async_engine is not None:
+        await async_engine.dispose()
+    if engine is not None:
+        engine.dispose()
+    engine = async_engine = async_session_factory = None
+    fulltext_search = False
 
-    try:
-        try:
-            payload = json.loads(path.read_text(encoding="utf-8"))
-        except JSONDecodeError as exc:
-            logger.error("Failed to parse report types configuration: %s", exc)
-            return
-
-        session.query(ReportTemplate).delete()
-        session.commit()
-
-        types = payload.get("types", []) if isinstance(payload, dict) else []
-        for report_index, item in enumerate(types):
-            report_type = str(item.get("category", "")).strip()
-            prompt = str(item.get("prompt", "")).strip()
-            if not report_type or not prompt:
-                logger.warning(
-                    "Skipping report template at index %s due to missing category or prompt",
-                    report_index,
-                )
-                continue
-
-            template = ReportTemplate(
-                template_id=str(uuid4()),
-                report_index=report_index,
-                report_type=report_type,
-                prompt=prompt,
-            )
-            session.add(template)
-        session.commit()
-    finally:
-        session.close()
-
-
-register_report_templates()
\ No newline at end of file
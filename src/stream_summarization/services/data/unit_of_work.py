@@ -1,9 +1,19 @@
 from __future__ import annotations
 
 import abc
+import asyncio
 
-from stream_summarization.adapters.repository import ReportTemplateRepository, SessionRepository, UserRepository
-from stream_summarization.services.config import register_report_templates, session_factory
+from stream_summarization.adapters.repository import (
+    AsyncReportTemplateRepository,
+    AsyncSessionRepository,
+    AsyncUserRepository,
+    ReportTemplateRepository,
+    SessionRepository,
+    UserRepository,
+)
+from stream_summarization.services import config
+from stream_summarization.services.config import session_factory
+from stream_summarization.services.templates import template_registry
 
 
 class IUoW(abc.ABC):
@@ -46,7 +56,7 @@ class UserUoW(IUoW):
 
 class ReportTemplateUoW(IUoW):
     def __enter__(self) -> ReportTemplateUoW:
-        register_report_templates()
+        self.snapshot = template_registry.current()
         self.db = self.session_factory()
         self.templates = ReportTemplateRepository(self.db)
         return super().__enter__()
@@ -60,3 +70,65 @@ class ReportTemplateUoW(IUoW):
 
     def rollback(self):
         self.db.rollback()
+
+
+class IAsyncUoW(abc.ABC):
+    def __init__(self, session_factory=None):
+        session_factory = session_factory or config.async_session_factory
+        if session_factory is None:
+            raise RuntimeError("Асинхронный движок БД не настроен (STREAM_SUMMARIZATION_DB_ASYNC)")
+        self.session_factory = session_factory
+
+    async def __aenter__(self) -> IAsyncUoW:
+        return self
+
+    async def __aexit__(self, *args):
+        await self.rollback()
+
+    @abc.abstractmethod
+    async def commit(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def rollback(self):
+        raise NotImplementedError
+
+
+class AsyncUserUoW(IAsyncUoW):
+    async def __aenter__(self) -> AsyncUserUoW:
+        self.db = self.session_factory()
+        self.users = AsyncUserRepository(self.db)
+        self.sessions = AsyncSessionRepository(self.db)
+        self.templates = AsyncReportTemplateRepository(self.db)
+        return await super().__aenter__()
+
+    async def __aexit__(self, *args):
+        await super().__aexit__(*args)
+        await self.db.close()
+
+    async def commit(self):
+        await self.db.commit()
+
+    async def rollback(self):
+        await self.db.rollback()
+
+
+class AsyncReportTemplateUoW(IAsyncUoW):
+    async def __aenter__(self) -> AsyncReportTemplateUoW:
+        if template_registry.stale:
+            self.snapshot = await asyncio.to_thread(template_registry.current)
+        else:
+            self.snapshot = template_registry.current()
+        self.db = self.session_factory()
+        self.templates = AsyncReportTemplateRepository(self.db)
+        return await super().__aenter__()
+
+    async def __aexit__(self, *args):
+        await super().__aexit__(*args)
+        await self.db.close()
+
+    async def commit(self):
+        await self.db.commit()
+
+    async def rollback(self):
+        await self.db.rollback()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+from time import monotonic
+from typing import Any, List
+
+from stream_summarization.services.config import settings
+
+logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class RequestCancelled(DeadlineExceeded):
+    pass
+
+
+class Deadline:
+    """
+    Бюджет времени одного запроса на суммаризацию.
+
+    Проверяется между стадиями пайплайна, задаёт таймауты отдельных вызовов LLM
+    и закрывает зарегистрированные HTTP-клиенты при отмене, чтобы прервать
+    генерацию на стороне модели.
+    """
+
+    def __init__(self, budget: float) -> None:
+        self.budget = max(0.0, float(budget))
+        self.expires_at = monotonic() + self.budget
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._resources: List[Any] = []
+
+    @classmethod
+    def from_header(cls, value: str | None) -> Deadline:
+        default = float(settings.STREAM_SUMMARIZATION_REQUEST_DEADLINE)
+        if value is None or not str(value).strip():
+            return cls(default)
+        try:
+            budget = float(value)
+        except ValueError as error:
+            raise ValueError("Некорректное значение заголовка X-Request-Deadline") from error
+        if budget <= 0:
+            raise ValueError("Некорректное значение заголовка X-Request-Deadline")
+        return cls(min(budget, default))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def timeout(self, cap: float | None = None) -> float:
+        """Таймаут для очередного вызова: остаток бюджета, но не больше cap."""
+
+        remaining = self.remaining()
+        if cap is not None:
+            remaining = min(remaining, float(cap))
+        return max(0.001, remaining)
+
+    def can_fit(self, estimate: float) -> bool:
+        return not self.cancelled and self.remaining() >= estimate
+
+    def check(self, stage: str) -> None:
+        if self.cancelled:
+            raise RequestCancelled(f"Запрос отменён клиентом на этапе {stage}")
+        if self.expired:
+            raise DeadlineExceeded(f"Превышен срок выполнения запроса на этапе {stage}")
+
+    def register(self, resource: Any) -> Any:
+        """Регистрирует объект с методом close(), который будет закрыт при отмене."""
+
+        with self._lock:
+            if not self.cancelled:
+                self._resources.append(resource)
+                return resource
+        _close_quietly(resource)
+        return resource
+
+    def cancel(self) -> None:
+        if self.cancelled:
+            return
+        logger.info("request cancelled, closing %s in-flight clients", len(self._resources))
+        self._cancelled.set()
+        self.release()
+
+    def release(self) -> None:
+        with self._lock:
+            resources, self._resources = self._resources, []
+        for resource in resources:
+            _close_quietly(resource)
+
+
+def _close_quietly(resource: Any) -> None:
+    try:
+        resource.close()
+    except Exception as error:  # pragma: no cover - best effort cleanup
+        logger.warning("Failed to close resource on cancellation: %s", error)
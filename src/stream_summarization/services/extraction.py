@@ -0,0 +1,261 @@
+"""
+Извлечение текста из загруженных документов.
+
+Извлекатели (services/extractors.py) работают в пуле процессов: большой PDF
+не держит event loop и не выстраивает загрузки в очередь. У каждого файла свой таймаут,
+у каждого процесса — ограничение памяти; ошибка одного файла не прерывает остальные.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, List, NamedTuple, Sequence, Tuple, TypeVar
+
+from stream_summarization.services.config import settings
+from stream_summarization.services.extraction_cache import ExtractionCache
+from stream_summarization.services.extractors import extract_pdf_pages, iter_text, pdf_page_count, sniff_format
+
+logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Запас сверх таймаута внутри процесса, после которого процесс считается зависшим
+TIMEOUT_GRACE_SECONDS = 5.0
+# Версия извлечения в ключе кэша: увеличивается, когда меняется текст, который отдают парсеры
+EXTRACTOR_VERSION = 2
+
+
+class ExtractionTimeout(Exception):
+    """Таймаут внутри процесса пула; в отличие от TimeoutError не путается с asyncio.TimeoutError."""
+
+
+class ExtractionResult(NamedTuple):
+    text: str
+    error: str | None = None
+
+
+def check_format(extension: str) -> str:
+    ext = extension.lower().lstrip(".")
+    if ext not in settings.STREAM_SUMMARIZATION_SUPPORTED_FORMATS:
+        raise ValueError("Unsupported document format")
+    return ext
+
+
+def document_format(path: str, extension: str) -> str:
+    """Формат по расширению из списка разрешённых, уточнённый по сигнатуре содержимого файла."""
+
+    ext = check_format(extension)
+    detected = sniff_format(path, ext)
+    return detected if detected in settings.STREAM_SUMMARIZATION_SUPPORTED_FORMATS else ext
+
+
+def extract_text(path: str, extension: str) -> str:
+    """
+    Текст документа из файла path; извлекатели читают файл сами, не загружая его в память целиком.
+    Фрагменты собираются в одну строку здесь, в процессе пула: результат задачи пула передаётся целиком.
+    """
+    return "\n".join(iter_text(path, document_format(path, extension)))
+
+
+def _raise_timeout(signum, frame) -> None:
+    raise ExtractionTimeout("Text extraction timed out")
+
+
+def _init_worker(memory_mb: int) -> None:
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    if memory_mb > 0:
+        import resource
+
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_in_worker(timeout: float, function: Callable[..., T], *args: Any) -> T:
+    # Задачи исполняются в главном потоке процесса, поэтому SIGALRM прерывает именно разбор файла
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return function(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def extraction_error(error: BaseException) -> str:
+    if isinstance(error, (ValueError, RuntimeError, ExtractionTimeout)):
+        return str(error)
+    if isinstance(error, MemoryError):
+        return "Text extraction ran out of memory"
+    if isinstance(error, BrokenProcessPool):
+        return "Text extraction worker crashed"
+    return f"Text extraction failed: {error}"
+
+
+class ExtractionPool:
+    """
+    Пул процессов для extract_text. workers=0 — разбор в пуле потоков без изоляции
+    (без ограничения памяти и принудительного таймаута), например для отладки.
+    cache проверяется до отправки файла в пул.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        timeout: float,
+        memory_mb: int,
+        split_pages: int,
+        cache: ExtractionCache | None = None,
+    ) -> None:
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.split_pages = split_pages
+        self.cache = cache if cache is not None and cache.enabled else None
+        self._executor: ProcessPoolExecutor | None = None
+        # Пулы, убитые из-за зависшего файла: остальные их задачи не виноваты и повторяются
+        self._killed: weakref.WeakSet[ProcessPoolExecutor] = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: форк процесса с потоками uvicorn и наблюдателя шаблонов небезопасен
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.memory_mb,),
+                )
+            return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor, kill: bool = False) -> None:
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            if kill:
+                self._killed.add(executor)
+        logger.warning("Restarting text extraction pool")
+        if kill:
+            # ProcessPoolExecutor не умеет прерывать задачу, поэтому зависшие процессы убиваются напрямую;
+            # незавершённые задачи пула получают BrokenProcessPool
+            for process in list((getattr(executor, "_processes", None) or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, function: Callable[..., T], *args: Any, retry: bool = True) -> T:
+        loop = asyncio.get_running_loop()
+        if self.workers <= 0:
+            return await loop.run_in_executor(None, function, *args)
+        executor = self._pool()
+        # В процесс передаётся только путь: содержимое файла не копируется через pickle
+        future = loop.run_in_executor(executor, _run_in_worker, self.timeout, function, *args)
+        try:
+            return await asyncio.wait_for(future, self.timeout + TIMEOUT_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            # Процесс завис вне Python-кода: пул пересоздаётся для следующих файлов
+            self._restart(executor, kill=True)
+            raise ExtractionTimeout("Text extraction timed out") from None
+        except BrokenProcessPool:
+            if retry and executor in self._killed:
+                # Пул убит из-за чужого зависшего файла: задача повторяется один раз на новом пуле
+                logger.info("Retrying text extraction after the pool was restarted")
+                return await self._run(function, *args, retry=False)
+            self._restart(executor)
+            raise
+
+    async def iter_pages(self, path: str, extension: str, max_pages: int | None = None) -> AsyncIterator[str]:
+        """
+        Текст документа по частям в порядке следования: страницы PDF или весь документ одной частью.
+        PDF длиннее split_pages страниц режется на диапазоны по числу процессов, которые
+        разбираются параллельно; страницы первого диапазона приходят раньше, чем обработан весь файл.
+        max_pages — режим предпросмотра: только первые страницы.
+        """
+
+        ext = await asyncio.to_thread(document_format, path, extension)
+        if self.cache is None:
+            async for page in self._iter_parsed(path, ext, max_pages):
+                yield page
+            return
+        key, pages = await asyncio.to_thread(self.cache.lookup, path, ext)
+        if pages is not None:
+            for page in pages[:max_pages]:
+                yield page
+            return
+        parsed: List[str] = []
+        async for page in self._iter_parsed(path, ext, max_pages):
+            parsed.append(page)
+            yield page
+        # Предпросмотр кэшируется, только если в него вошёл весь документ
+        if max_pages is None or len(parsed) < max_pages:
+            await asyncio.to_thread(self.cache.store, key, parsed)
+
+    async def _iter_parsed(self, path: str, ext: str, max_pages: int | None) -> AsyncIterator[str]:
+        if ext != "pdf":
+            yield await self._run(extract_text, path, ext)
+            return
+        count = await self._run(pdf_page_count, path)
+        stop = count if max_pages is None else min(count, max_pages)
+        # Каждый диапазон заново открывает и разбирает структуру файла, а на одном ядре
+        # параллельного выигрыша нет, поэтому небольшой документ разбирается одной задачей
+        parts = min(self.workers, os.cpu_count() or 1)
+        if stop <= self.split_pages or parts <= 1:
+            for page in await self._run(extract_pdf_pages, path, 0, stop):
+                yield page
+            return
+        size = math.ceil(stop / parts)
+        tasks = [
+            asyncio.ensure_future(self._run(extract_pdf_pages, path, start, min(start + size, stop)))
+            for start in range(0, stop, size)
+        ]
+        try:
+            for task in tasks:
+                for page in await task:
+                    yield page
+        finally:
+            # Отмена снимает с очереди пула ещё не начатые диапазоны; начатые процессы
+            # дорабатывают до конца, поэтому прерванный предпросмотр занимает их до конца диапазона
+            for task in tasks:
+                task.cancel()
+
+    async def extract(self, path: str, extension: str, max_pages: int | None = None) -> ExtractionResult:
+        try:
+            pages = [page async for page in self.iter_pages(path, extension, max_pages)]
+        except Exception as error:
+            logger.warning("Text extraction of a .%s file failed: %s", extension.lstrip("."), error)
+            return ExtractionResult("", extraction_error(error))
+        return ExtractionResult("\n".join(page for page in pages if page))
+
+    async def extract_all(
+        self, files: Sequence[Tuple[str, str]], max_pages: int | None = None
+    ) -> List[ExtractionResult]:
+        """Файлы (path, extension) разбираются параллельно; результаты в порядке files, ошибки — у своего файла."""
+        return list(await asyncio.gather(*(self.extract(path, extension, max_pages) for path, extension in files)))
+
+
+extraction_cache = ExtractionCache(
+    directory=settings.STREAM_SUMMARIZATION_EXTRACT_CACHE_DIR,
+    max_bytes=settings.STREAM_SUMMARIZATION_EXTRACT_CACHE_MB * 1024 * 1024,
+    version=EXTRACTOR_VERSION,
+)
+extraction_pool = ExtractionPool(
+    workers=settings.STREAM_SUMMARIZATION_EXTRACT_WORKERS,
+    timeout=settings.STREAM_SUMMARIZATION_EXTRACT_TIMEOUT,
+    memory_mb=settings.STREAM_SUMMARIZATION_EXTRACT_MEMORY_MB,
+    split_pages=settings.STREAM_SUMMARIZATION_EXTRACT_SPLIT_PAGES,
+    cache=extraction_cache,
+)
@@ -0,0 +1,148 @@
+"""
+Дисковый кэш извлечённого текста по содержимому файла.
+
+Одни и те же PDF и DOCX (пресс-релизы и т. п.) загружают в разные сессии много раз.
+Ключ кэша — SHA-256 файла, формат и версия извлечения, поэтому повторная загрузка
+отдаёт страницы без запуска парсера. Кэш ограничен по размеру и вытесняет записи,
+которые дольше всего не читались; общий каталог могут использовать несколько процессов API.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENTRY_SUFFIX = ".pages"
+
+
+class ExtractionCache:
+    """
+    Страницы документа хранятся файлом <sha256>-<формат>-v<версия>.pages (JSON, сжатый zlib).
+    Порядок вытеснения — по времени последнего чтения: при попадании у файла обновляется mtime.
+    Ошибки кэша не мешают извлечению: запись просто считается промахом.
+    """
+
+    def __init__(self, directory: str | None, max_bytes: int, version: int) -> None:
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "stream-summarization-extract-cache")
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int] | None" = None
+        self._size = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _index(self) -> "OrderedDict[str, int]":
+        # Вызывается под self._lock; каталог читается один раз, дальше индекс ведётся в памяти
+        if self._entries is None:
+            os.makedirs(self.directory, exist_ok=True)
+            found = []
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(ENTRY_SUFFIX):
+                        stat = entry.stat()
+                        found.append((stat.st_mtime, entry.name, stat.st_size))
+            self._entries = OrderedDict((name, size) for _, name, size in sorted(found))
+            self._size = sum(self._entries.values())
+            self._evict()
+        return self._entries
+
+    def _evict(self) -> None:
+        while self._entries and self._size > self.max_bytes:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def key(self, path: str, extension: str) -> str:
+        with open(path, "rb") as source:
+            digest = hashlib.file_digest(source, "sha256").hexdigest()
+        return f"{digest}-{extension}-v{self.version}"
+
+    def lookup(self, path: str, extension: str) -> Tuple[str, List[str] | None]:
+        """(ключ, страницы) для файла path; страницы None при промахе."""
+
+        key = self.key(path, extension)
+        name = key + ENTRY_SUFFIX
+        with self._lock:
+            known = name in self._index()
+        pages = self._read(name) if known else None
+        with self._lock:
+            if pages is None:
+                self.misses += 1
+                if known:
+                    self._forget(name)
+            else:
+                self.hits += 1
+                self.bytes_saved += os.path.getsize(path)
+                if name in self._entries:
+                    self._entries.move_to_end(name)
+        return key, pages
+
+    def _read(self, name: str) -> List[str] | None:
+        entry = os.path.join(self.directory, name)
+        try:
+            with open(entry, "rb") as source:
+                pages = json.loads(zlib.decompress(source.read()))
+            os.utime(entry)
+        except (OSError, ValueError, zlib.error) as exc:
+            # Запись вытеснил другой процесс или файл повреждён
+            logger.warning("Extraction cache entry %s is unreadable: %s", name, exc)
+            return None
+        return pages
+
+    def _forget(self, name: str) -> None:
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self._size -= size
+
+    def store(self, key: str, pages: List[str]) -> None:
+        payload = zlib.compress(json.dumps(pages, ensure_ascii=False).encode("utf-8"))
+        if len(payload) > self.max_bytes:
+            return
+        name = key + ENTRY_SUFFIX
+        try:
+            with self._lock:
+                self._index()
+            # Запись во временный файл и rename: читатели не видят недописанную запись
+            handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(handle, "wb") as target:
+                target.write(payload)
+            os.replace(temporary, os.path.join(self.directory, name))
+        except OSError as exc:
+            logger.warning("Unable to write extraction cache entry %s: %s", name, exc)
+            return
+        with self._lock:
+            self._forget(name)
+            self._entries[name] = len(payload)
+            self._size += len(payload)
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "entries": len(self._entries or ()),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,213 @@
+"""
+Реестр извлекателей текста по форматам документов.
+
+Извлекатель получает путь к файлу и отдаёт текст по фрагментам (строки, абзацы или
+страницы) генератором, не читая файл в память целиком; документ — фрагменты через
+перевод строки. Генераторы работают только внутри процесса пула: через границу процесса
+документ передаётся одной строкой (extraction.extract_text), и нормализация, дедупликация
+и разбиение на части дальше работают с полным текстом.
+
+Формат определяется по сигнатуре содержимого, а расширение файла используется, только
+если сигнатура ничего не сказала: DOCX, сохранённый как .doc, разбирается как DOCX.
+"""
+from __future__ import annotations
+
+import codecs
+import zipfile
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from stream_summarization.services.lazy import load_module
+
+READ_CHUNK_BYTES = 1024 * 1024
+# Сколько байт начала текстового файла смотреть при определении кодировки
+SNIFF_BYTES = 64 * 1024
+# Кодировка по умолчанию для текста не в UTF-8, если charset-normalizer её не распознал
+FALLBACK_ENCODING = "cp1251"
+# Без «ё»: в cp866, прочитанной как cp1251, в «Ё» превращается частая «и»
+RUSSIAN_LETTERS = frozenset("абвгдежзийклмнопрстуфхцчшщъыьэюя")
+# Самые частые буквы русского текста: около 60% букв; в KOI8-R или cp866, прочитанных как cp1251, — до 30%
+FREQUENT_RUSSIAN_LETTERS = frozenset("оеаинтср")
+# Доля русских среди не-ASCII букв образца, прочитанного в FALLBACK_ENCODING
+RUSSIAN_LETTER_SHARE = 0.5
+FREQUENT_LETTER_SHARE = 0.35
+
+PDF_MAGIC = b"%PDF-"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+ZIP_MAGIC = b"PK\x03\x04"
+ODT_MIMETYPE = b"application/vnd.oasis.opendocument.text"
+BOMS: Tuple[Tuple[bytes, str], ...] = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+Extractor = Callable[[str], Iterator[str]]
+
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register_extractor(*formats: str) -> Callable[[Extractor], Extractor]:
+    def register(extractor: Extractor) -> Extractor:
+        for name in formats:
+            EXTRACTORS[name] = extractor
+        return extractor
+
+    return register
+
+
+def sniff_format(path: str, extension: str) -> str:
+    """Формат по сигнатуре файла (pdf, doc, docx, odt) или extension, если сигнатура не распознана."""
+
+    with open(path, "rb") as source:
+        head = source.read(1024)
+    # Заголовок PDF в начале файла (после BOM и пробелов); мусор перед ним в первом килобайте
+    # PDF допускает, но у текстового файла «%PDF-» в середине — просто текст
+    if head.removeprefix(codecs.BOM_UTF8).lstrip().startswith(PDF_MAGIC):
+        return "pdf"
+    if extension != "txt" and PDF_MAGIC in head:
+        return "pdf"
+    if head.startswith(OLE_MAGIC):
+        return "doc"
+    if head.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(path) as archive:
+                names = set(archive.namelist())
+                if "word/document.xml" in names:
+                    return "docx"
+                if "mimetype" in names and archive.read("mimetype").strip() == ODT_MIMETYPE:
+                    return "odt"
+        except zipfile.BadZipFile:
+            pass
+    return extension
+
+
+def iter_text(path: str, extension: str) -> Iterator[str]:
+    extractor = EXTRACTORS.get(extension)
+    if extractor is None:
+        raise ValueError("Unsupported document format")
+    return extractor(path)
+
+
+def _reads_as_russian(sample: bytes, encoding: str) -> bool:
+    """Образец в encoding похож на русский текст: в основном русские буквы с обычной частотой."""
+
+    text = sample.decode(encoding, errors="ignore")
+    # У KOI8-R, прочитанной как cp1251, регистр перевёрнут: «Привет» выглядит как «рТЙЧЕФ»
+    if any(first.islower() and second.isupper() for first, second in zip(text, text[1:])):
+        return False
+    # Латиница одинакова во всех однобайтовых кодировках и ничего не говорит
+    letters = [char for char in text.lower() if char.isalpha() and not char.isascii()]
+    russian = [char for char in letters if char in RUSSIAN_LETTERS]
+    if not russian or len(russian) < RUSSIAN_LETTER_SHARE * len(letters):
+        return False
+    return sum(char in FREQUENT_RUSSIAN_LETTERS for char in russian) >= FREQUENT_LETTER_SHARE * len(russian)
+
+
+def detect_encoding(sample: bytes) -> str:
+    """Кодировка по началу файла: BOM, затем UTF-8, затем charset-normalizer."""
+
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # Инкрементальный декодер не считает ошибкой символ, обрезанный концом образца
+        codecs.getincrementaldecoder("utf-8")().decode(sample)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        best = load_module("charset_normalizer").from_bytes(sample).best()
+    except RuntimeError:
+        best = None
+    if best is None:
+        return FALLBACK_ENCODING
+    # На коротком русском тексте charset-normalizer путает cp1251 с cp1250, cp1125 и даже big5
+    if codecs.lookup(best.encoding).name != codecs.lookup(FALLBACK_ENCODING).name and _reads_as_russian(
+        sample, FALLBACK_ENCODING
+    ):
+        return FALLBACK_ENCODING
+    return best.encoding
+
+
+def _decoded_lines(chunks: Iterator[bytes], encoding: str) -> Iterator[str]:
+    # Инкрементальный декодер не ломает многобайтовые символы на границе кусков
+    decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+    tail = ""
+    for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.removesuffix("\r")
+    yield (tail + decoder.decode(b"", final=True)).removesuffix("\r")
+
+
+def _prepend(first: bytes, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    yield first
+    yield from chunks
+
+
+@register_extractor("txt")
+def _txt_lines(path: str) -> Iterator[str]:
+    with open(path, "rb") as source:
+        sample = source.read(SNIFF_BYTES)
+        encoding = detect_encoding(sample)
+        chunks = iter(lambda: source.read(READ_CHUNK_BYTES), b"")
+        yield from _decoded_lines(_prepend(sample, chunks), encoding)
+
+
+@register_extractor("docx")
+def _docx_paragraphs(path: str) -> Iterator[str]:
+    for paragraph in load_module("docx").Document(path).paragraphs:
+        text = paragraph.text.strip()
+        if text:
+            yield text
+
+
+@register_extractor("odt")
+def _odt_paragraphs(path: str) -> Iterator[str]:
+    teletype = load_module("odf.teletype")
+    P = load_module("odf.text").P
+    for node in load_module("odf.opendocument").load(path).getElementsByType(P):
+        text = teletype.extractText(node).strip()
+        if text:
+            yield text
+
+
+def pdf_page_count(path: str) -> int:
+    """Число страниц PDF: читаются только xref и дерево страниц, без разбора содержимого."""
+
+    return len(load_module("pypdf").PdfReader(path).pages)
+
+
+def extract_pdf_pages(path: str, start: int, stop: int) -> List[str]:
+    """Тексты страниц PDF [start, stop); каждый процесс пула открывает файл сам."""
+
+    reader = load_module("pypdf").PdfReader(path)
+    stop = min(stop, len(reader.pages))
+    return [(reader.pages[index].extract_text() or "").strip() for index in range(start, stop)]
+
+
+@register_extractor("pdf")
+def _pdf_pages(path: str) -> Iterator[str]:
+    reader = load_module("pypdf").PdfReader(path)
+    for page in reader.pages:
+        text = (page.extract_text() or "").strip()
+        if text:
+            yield text
+
+
+@register_extractor("doc")
+def _doc_lines(path: str) -> Iterator[str]:
+    try:
+        textract = load_module("textract")
+    except Exception:
+        yield (
+            "Документ формата .doc успешно получен, однако автоматическое извлечение текста недоступно. "
+            "Пожалуйста, сохраните файл в формате DOCX и повторите загрузку."
+        )
+        return
+    # У сохранённой загрузки нет расширения, поэтому формат передаётся явно
+    raw = textract.process(path, extension="doc")
+    yield from _decoded_lines(iter((raw,)), "utf-8")
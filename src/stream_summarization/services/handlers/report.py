@@ -1,120 +1,94 @@
 from __future__ import annotations
 
-import io
-import json
-import os
-import tempfile
-from collections import OrderedDict
-from json import JSONDecodeError
-from pathlib import Path
-from typing import List
-
-from stream_summarization.services.config import settings
-from stream_summarization.services.data.unit_of_work import ReportTemplateUoW
-
-
-def extract_text(content: bytes, extension: str) -> str:
-    ext = extension.lower().lstrip(".")
-    if ext not in settings.STREAM_SUMMARIZATION_SUPPORTED_FORMATS:
-        raise ValueError("Unsupported document format")
-
-    if ext == "txt":
-        return content.decode("utf-8", errors="ignore")
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Sequence, Tuple
 
-    if ext == "docx":
-        try:
-            from docx import Document  # type: ignore
-        except ImportError as exc:  # pragma: no cover - dependency missing guard
-            raise RuntimeError("Библиотека python-docx не установлена") from exc
-        document = Document(io.BytesIO(content))
-        paragraphs = [paragraph.text.strip() for paragraph in document.paragraphs if paragraph.text.strip()]
-        return "\n".join(paragraphs)
-
-    if ext == "pdf":
-        try:
-            from pypdf import PdfReader  # type: ignore
-        except ImportError as exc:  # pragma: no cover - dependency missing guard
-            raise RuntimeError("Библиотека pypdf не установлена") from exc
-        reader = PdfReader(io.BytesIO(content))
-        fragments: List[str] = []
-        for page in reader.pages:
-            text = page.extract_text() or ""
-            fragments.append(text.strip())
-        return "\n".join(fragment for fragment in fragments if fragment)
-
-    if ext == "odt":
-        try:
-            from odf import teletype  # type: ignore
-            from odf.opendocument import load  # type: ignore
-            from odf.text import P  # type: ignore
-        except ImportError as exc:  # pragma: no cover - dependency missing guard
-            raise RuntimeError("Библиотека odfpy не установлена") from exc
-        document = load(io.BytesIO(content))
-        paragraphs = [
-            teletype.extractText(node).strip()
-            for node in document.getElementsByType(P)
-            if teletype.extractText(node).strip()
-        ]
-        return "\n".join(paragraphs)
-
-    if ext == "doc":
-        try:
-            import textract  # type: ignore
-        except Exception:
-            return (
-                "Документ формата .doc успешно получен, однако автоматическое извлечение текста недоступно. "
-                "Пожалуйста, сохраните файл в формате DOCX и повторите загрузку."
-            )
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".doc") as tmp_file:
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
+from stream_summarization.domain.document import DocRecord
+from stream_summarization.services.data.unit_of_work import ReportTemplateUoW
+from stream_summarization.services.extraction import check_format, extraction_error, extraction_pool
+from stream_summarization.services.templates import template_registry
+
+
+# Сколько страниц может ждать отправки клиенту, прежде чем разбор приостановится
+STREAM_QUEUE_SIZE = 64
+
+
+async def load_documents(
+    files: Sequence[Tuple[str, str]], max_pages: int | None = None
+) -> Tuple[List[str], List[str | None]]:
+    """
+    Тексты файлов (path, extension) и ошибки по файлам в том же порядке.
+    Неподдерживаемый формат отклоняет весь запрос до разбора.
+    """
+
+    for _, extension in files:
+        check_format(extension)
+    results = await extraction_pool.extract_all(files, max_pages)
+    return [result.text for result in results], [result.error for result in results]
+
+
+async def load_document_records(files: Sequence[Tuple[str, str, str]]) -> List[DocRecord]:
+    """
+    Документы новой сессии из файлов (filename, path, extension): текст извлекается параллельно
+    и передаётся в сессию без возврата клиенту, title документа — имя файла. Ошибка извлечения
+    любого файла отклоняет запрос: сводка по части документов выдавалась бы за сводку по всем.
+    """
+
+    contents, errors = await load_documents([(path, extension) for _, path, extension in files])
+    for (filename, _, _), error in zip(files, errors):
+        if error is not None:
+            raise ValueError(f"{filename}: {error}")
+    return [DocRecord(text.strip(), title=filename) for (filename, _, _), text in zip(files, contents)]
+
+
+async def stream_documents(
+    files: Sequence[Tuple[str, str]], max_pages: int | None = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Текст файлов по мере извлечения: {"document", "page", "text"} на страницу
+    и {"document", "done": True, "pages", "error"} в конце каждого файла. Файлы разбираются
+    параллельно, строки разных файлов перемежаются; страницы одного файла идут по порядку.
+    document — номер файла в files.
+    """
+
+    for _, extension in files:
+        check_format(extension)
+    queue: asyncio.Queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+
+    async def produce(document: int, path: str, extension: str) -> None:
+        pages, error = 0, None
         try:
-            raw = textract.process(tmp_file_path)
-            return raw.decode("utf-8", errors="ignore")
-        finally:  # pragma: no cover - system cleanup
-            try:
-                os.remove(tmp_file_path)
-            except OSError:
-                pass
-
-    raise ValueError("Unsupported document format")
-
-
-def _load_report_types_from_file() -> List[str]:
-    path = Path(settings.STREAM_SUMMARIZATION_REPORT_TYPES_PATH)
-    if not path.exists():
-        return []
-
+            async for text in extraction_pool.iter_pages(path, extension, max_pages):
+                await queue.put({"document": document, "page": pages, "text": text})
+                pages += 1
+        except Exception as exc:
+            error = extraction_error(exc)
+        await queue.put({"document": document, "done": True, "pages": pages, "error": error})
+
+    producers = [asyncio.ensure_future(produce(index, *file)) for index, file in enumerate(files)]
     try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
-    except (OSError, JSONDecodeError):
-        return []
-
-    if not isinstance(payload, dict):
-        return []
-
-    report_types: List[str] = []
-    for item in payload.get("types", []):
-        if not isinstance(item, dict):
-            continue
-        category = str(item.get("category", "")).strip()
-        prompt = str(item.get("prompt", "")).strip()
-        if not category or not prompt:
-            continue
-        report_types.append(category)
-    return report_types
+        for _ in range(len(files)):
+            while not (item := await queue.get()).get("done"):
+                yield item
+            yield item
+    finally:
+        # Клиент отключился: недочитанные файлы больше не разбираются
+        for producer in producers:
+            producer.cancel()
 
 
 def get_report_types(
     uow: ReportTemplateUoW,
-) -> List[str]:
-    report_map: "OrderedDict[int, str]" = OrderedDict()
+) -> Tuple[bytes, str]:
+    """JSON типов отчётов и ETag из снимка шаблонов в памяти: без чтения файла и запросов к БД."""
 
     with uow:
-        templates = sorted(uow.templates.list(), key=lambda item: item.report_index)
+        snapshot = uow.snapshot
+    return snapshot.report_types_body, snapshot.etag
+
 
-        for template in templates:
-            report_map.setdefault(template.report_index, template.report_type)
+def reload_report_templates() -> Dict[str, Any]:
+    """Принудительно перечитывает report_types.json; БД обновляется, только если шаблоны изменились."""
 
-    report_types = _load_report_types_from_file() or list(report_map.values())
-    return report_types
+    snapshot = template_registry.reload(force=True)
+    return {"version": snapshot.digest, "report_types": list(snapshot.report_types)}
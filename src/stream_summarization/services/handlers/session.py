@@ -1,24 +1,32 @@
 from __future__ import annotations
 
+import base64
+import json
 import logging
 import math
+import re
 import sys
 import tempfile
+from collections import Counter
 from collections.abc import Iterable, Sequence
-from difflib import SequenceMatcher
 from functools import lru_cache
 from pathlib import Path
-from time import time
+from time import monotonic, sleep, time
 from typing import TYPE_CHECKING, Any, Dict, List, Tuple
 from uuid import uuid4
 
-import httpx
-
-from stream_summarization.domain.enums import StatusType
+from stream_summarization.domain.document import DocRecord
+from stream_summarization.domain.enums import SearchMode, StatusType
 from stream_summarization.domain.session import Session
 from stream_summarization.domain.user import User
+from stream_summarization.services import config
+from stream_summarization.services.backpressure import LatestJobQueue, llm_backpressure
 from stream_summarization.services.config import settings
-from stream_summarization.services.data.unit_of_work import ReportTemplateUoW, IUoW
+from stream_summarization.services.data.unit_of_work import ReportTemplateUoW, IAsyncUoW, IUoW
+from stream_summarization.services.deadline import Deadline, DeadlineExceeded
+from stream_summarization.services.lazy import load_module
+from stream_summarization.services.search.bm25 import session_search_tokens
+from stream_summarization.services.search.index import SessionSearchIndex
 
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,18 +36,90 @@ if TYPE_CHECKING:
 else:
     ChatOpenAI = Any
 
+# Тот же промпт, что у load_summarize_chain(chain_type="map_reduce") по умолчанию
+_CONDENSE_PROMPT = 'Write a concise summary of the following:\n\n\n"{text}"\n\n\nCONCISE SUMMARY:'
+
+DEGRADED_ERROR = (
+    "degraded: сервис суммаризации перегружен, возвращена упрощённая сводка; "
+    "полная сводка будет сохранена в сессии позже"
+)
+EXTRACTIVE_SUMMARY_SENTENCES = 5
+SUMMARY_UPGRADE_ATTEMPTS = 10
+# Сколько полных сессий за раз читается при переиндексации полнотекстового поиска в БД
+SEARCH_INDEX_BATCH = 20
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+")
+_WORD = re.compile(r"\w+")
+
+session_search_index = SessionSearchIndex(
+    max_users=settings.STREAM_SUMMARIZATION_SEARCH_INDEX_USERS,
+    embedder=settings.STREAM_SUMMARIZATION_EMBEDDER,
+    semantic_weight=settings.STREAM_SUMMARIZATION_SEMANTIC_WEIGHT,
+    min_similarity=settings.STREAM_SUMMARIZATION_SEMANTIC_MIN_SIMILARITY,
+)
+# Одно ожидающее обновление на сессию: у более позднего свежее версия и документы
+summary_upgrades = LatestJobQueue("summary-upgrade", settings.STREAM_SUMMARIZATION_SUMMARY_UPGRADE_QUEUE)
 
-def get_session_list(user_id: str, uow: IUoW) -> List[Dict[str, Any]]:
+
+def get_session_list(
+    user_id: str,
+    uow: IUoW,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> Tuple[List[Dict[str, Any]], str | None]:
+    """Страница сессий и курсор следующей страницы (None, если страница последняя)."""
     logger.info("start get_session_list")
-    sessions: List[Dict[str, Any]] = []
+    limit, after = _page_query(limit, cursor)
     with uow:
-        user = uow.users.get(object_id=user_id)
-        if not user:
-            return []
-        for session in user.get_sessions()[: settings.STREAM_SUMMARIZATION_MAX_SESSIONS]:
-            sessions.append(_session_to_dict(session, short=True))
+        sessions = uow.sessions.list_short(user_id, limit=limit + 1, after=after)
     logger.info("finish get_session_list")
-    return sessions
+    return _split_page(sessions, limit)
+
+
+async def aget_session_list(
+    user_id: str,
+    uow: IAsyncUoW,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> Tuple[List[Dict[str, Any]], str | None]:
+    """То же, что get_session_list, через асинхронный движок."""
+    logger.info("start aget_session_list")
+    limit, after = _page_query(limit, cursor)
+    async with uow:
+        sessions = await uow.sessions.list_short(user_id, limit=limit + 1, after=after)
+    logger.info("finish aget_session_list")
+    return _split_page(sessions, limit)
+
+
+def _page_query(limit: int | None, cursor: str | None) -> Tuple[int, Tuple[float, str] | None]:
+    """Размер страницы и позиция (updated_at, session_id), после которой она начинается."""
+    return _page_limit(limit), (_decode_cursor(cursor) if cursor else None)
+
+
+def _page_limit(limit: int | None) -> int:
+    max_sessions = settings.STREAM_SUMMARIZATION_MAX_SESSIONS
+    return max_sessions if limit is None else max(1, min(int(limit), max_sessions))
+
+
+def _split_page(sessions: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], str | None]:
+    if len(sessions) <= limit:
+        return sessions, None
+    sessions = sessions[:limit]
+    return sessions, _encode_cursor(sessions[-1]["updated_at"], sessions[-1]["session_id"])
+
+
+def _encode_cursor(updated_at: float, session_id: str) -> str:
+    raw = json.dumps([updated_at, session_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, session_id = json.loads(raw)
+        return float(updated_at), str(session_id)
+    except (ValueError, TypeError) as error:
+        raise ValueError("Некорректный курсор страницы") from error
 
 
 def create_new_session(
@@ -50,15 +130,17 @@ def create_new_session(
     temporary: bool,
     user_uow: IUoW,
     report_uow: ReportTemplateUoW,
+    deadline: Deadline | None = None,
 ) -> Tuple[str, str, str | None]:
     logger.info("start create_new_session")
     docs = _prepare_doc_texts(documents)
-    cleaned_text = [d["text"] for d in docs]
+    cleaned_text = [d.text for d in docs]
     now = time()
-    summary = _generate_report_types(
-        text=cleaned_text,
+    summary, error = _generate_report_types(
+        text=docs,
         report_index=report_index,
         report_uow=report_uow,
+        deadline=deadline,
     )
 
     title_source = summary.strip() or cleaned_text[0]
@@ -72,6 +154,7 @@ def create_new_session(
         inserted_at=now,
         updated_at=now,
     )
+    session.search_tokens = session_search_tokens(session)
     with user_uow:
         user = user_uow.users.get(object_id=user_id)
         if user is None:
@@ -83,12 +166,16 @@ def create_new_session(
                 sessions=[],
             )
             user_uow.users.add(user)
-        user.sessions.append(session)
+        # Привязка через backref не загружает остальные сессии пользователя
+        session.users = user
+        user_uow.sessions.add(session)
         user.update_time(last_used_at=now)
         user_uow.commit()
+    if error is not None:
+        _schedule_summary_upgrade(user_id, session_id, 0, docs, report_index, user_uow, report_uow)
     logger.info("finish create_new_session")
     response = session.summary
-    return session_id, response, None
+    return session_id, response, error
 
 
 def update_session_summarization(
@@ -99,36 +186,50 @@ def update_session_summarization(
     version: int,
     user_uow: IUoW,
     report_uow: ReportTemplateUoW,
+    deadline: Deadline | None = None,
 ) -> Tuple[str, str | None]:
     logger.info("start update_session_summarization")
+    # Короткая читающая транзакция: только проверки, соединение сразу возвращается в пул
     with user_uow:
         user = user_uow.users.get(object_id=user_id)
         if user is None:
             raise ValueError("User not found")
-        session = user.get_session(session_id)
+        session = user_uow.sessions.get_for_user(user_id, session_id)
         if session is None:
             raise ValueError("Session not found")
         if int(session.version) != int(version):
             raise ValueError("Version mismatch")
-        now = time()
 
-        docs = _prepare_doc_texts(documents)
-        cleaned_text = [d["text"] for d in docs]
+    # Генерация идёт вне транзакции и может занимать минуты
+    docs = _prepare_doc_texts(documents)
+    summary, error = _generate_report_types(
+        text=docs,
+        report_index=report_index,
+        report_uow=report_uow,
+        deadline=deadline,
+    )
 
-        summary = _generate_report_types(
-            text=cleaned_text,
-            report_index=report_index,
-            report_uow=report_uow,
+    now = time()
+    with user_uow:
+        updated = user_uow.sessions.update_if_version(
+            user_id,
+            session_id,
+            int(version),
+            summary=summary,
+            updated_at=now,
         )
+        if not updated:
+            raise ValueError("Version mismatch")
+        # Документы пишутся инкрементально: UPDATE только изменившихся позиций
+        session = user_uow.sessions.get_for_user(user_id, session_id)
         session.update_docs(docs)
-        session.summary = summary
-        session.version = version + 1
-        session.updated_at = now
-        user.update_time(last_used_at=now)
+        session.search_tokens = session_search_tokens(session)
+        user_uow.users.update_time(user_id, last_used_at=now)
         user_uow.commit()
+    if error is not None:
+        _schedule_summary_upgrade(user_id, session_id, version + 1, docs, report_index, user_uow, report_uow)
     logger.info("finish update_session_summarization")
-    response = session.summary
-    return response, None
+    return summary, error
 
 
 def update_title_session(
@@ -143,7 +244,7 @@ def update_title_session(
         user = user_uow.users.get(object_id=user_id)
         if user is None:
             raise ValueError("User not found")
-        session = user.get_session(session_id)
+        session = user_uow.sessions.get_for_user(user_id, session_id, full=True)
         if session is None:
             raise ValueError("Session not found")
         if int(session.version) != int(version):
@@ -152,20 +253,60 @@ def update_title_session(
         session.title = title
         session.version = version + 1
         session.updated_at = now
+        session.search_tokens = session_search_tokens(session)
         user.update_time(last_used_at=now)
         user_uow.commit()
+        payload = _session_to_dict(session)
     logger.info("finish update_title_session")
-    return _session_to_dict(session)
+    return payload
+
 
 def get_session_info(session_id: str, user_id: str, user_uow: IUoW) -> Dict[str, Any]:
     with user_uow:
         user = user_uow.users.get(object_id=user_id)
-        if user is None:
-            raise ValueError("User not found")
-        session = user.get_session(session_id)
+        session = user_uow.sessions.get_for_user(user_id, session_id, full=True) if user is not None else None
+        return _session_info_payload(user, session)
+
+
+async def aget_session_info(session_id: str, user_id: str, user_uow: IAsyncUoW) -> Dict[str, Any]:
+    async with user_uow:
+        user = await user_uow.users.get(object_id=user_id)
+        session = await user_uow.sessions.get_for_user(user_id, session_id, full=True) if user is not None else None
+        return _session_info_payload(user, session)
+
+
+def _session_info_payload(user: User | None, session: Session | None) -> Dict[str, Any]:
+    if user is None:
+        raise ValueError("User not found")
+    if session is None:
+        raise ValueError("Session not found")
+    return _session_to_dict(session)
+
+
+def get_session_documents(
+    session_id: str,
+    user_id: str,
+    uow: IUoW,
+    offset: int = 0,
+    limit: int | None = None,
+) -> Tuple[List[Dict[str, str]], int | None]:
+    """Страница документов сессии и смещение следующей страницы (None, если страница последняя)."""
+    max_documents = settings.STREAM_SUMMARIZATION_MAX_DOCUMENTS
+    limit = max_documents if limit is None else max(1, min(int(limit), max_documents))
+    offset = max(0, int(offset))
+    with uow:
+        session = uow.sessions.get_for_user(user_id, session_id)
         if session is None:
             raise ValueError("Session not found")
-        return _session_to_dict(session)
+        documents = uow.sessions.list_documents(user_id, session_id, offset=offset, limit=limit + 1)
+        if not documents and session.text:
+            # Сессия в старом формате: документы ещё лежат JSON в sessions.text
+            legacy = session.doc_texts
+            end = offset + limit
+            return [doc.to_dict() for doc in legacy[offset:end]], (end if len(legacy) > end else None)
+        payload = [document.to_dict() for document in documents[:limit]]
+    next_offset = offset + limit if len(documents) > limit else None
+    return payload, next_offset
 
 
 def download_session_file(session_id: str, format: str, user_id: str, uow: IUoW) -> Path:
@@ -173,16 +314,14 @@ def download_session_file(session_id: str, format: str, user_id: str, uow: IUoW)
         user = uow.users.get(object_id=user_id)
         if user is None:
             raise ValueError("User not found")
-        session = user.get_session(session_id)
+        session = uow.sessions.get_for_user(user_id, session_id, full=True)
         if session is None:
             raise ValueError("Session not found")
         title = session.title or "Untitled session"
         doc_lines = []
         for i, d in enumerate(session.doc_texts, 1):
-            meta = " | ".join(filter(None, [d.get("title", ""), d.get("source", ""), d.get("date", ""), d.get("url", "")]))
-            header = f"[{i}] {meta}".strip(" |")
-            doc_lines.append(header if header else f"[{i}]")
-            doc_lines.append(d.get("text", ""))
+            doc_lines.append(_doc_header(i, d))
+            doc_lines.append(d.text)
         query = "\n\n".join(doc_lines).strip()
         summary = session.summary or ""
 
@@ -190,7 +329,7 @@ def download_session_file(session_id: str, format: str, user_id: str, uow: IUoW)
     if normalized_format == "pdf":
         import os
 
-        from fpdf import FPDF
+        FPDF = load_module("fpdf").FPDF
 
         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as fp:
             pdf = FPDF()
@@ -219,7 +358,7 @@ def delete_exist_session(session_id: str, user_id: str, uow: IUoW) -> StatusType
         user = uow.users.get(object_id=user_id)
         if user is None:
             return StatusType.ERROR
-        status = user.delete_session(session_id)
+        status = uow.sessions.delete_for_user(user_id, session_id)
         if status:
             uow.commit()
             logger.info("session deleted")
@@ -228,58 +367,41 @@ def delete_exist_session(session_id: str, user_id: str, uow: IUoW) -> StatusType
     return StatusType.NOT_FOUND
 
 
-def search_similarity_sessions(user_id: str, query: str, uow: IUoW) -> List[Dict[str, Any]]:
+def search_similarity_sessions(
+    user_id: str,
+    query: str,
+    uow: IUoW,
+    mode: str = SearchMode.LEXICAL,
+) -> List[Dict[str, Any]]:
     logger.info("start search_similarity_sessions")
     if not query or not query.strip():
         raise ValueError("Request is empty")
-    results: List[Dict[str, Any]] = []
+    mode = mode.upper()
+    if mode not in set(SearchMode):
+        raise ValueError("Unknown search mode")
     with uow:
         user = uow.users.get(object_id=user_id)
         if user is None:
             raise ValueError("User does not have any sessions")
-        for session in user.get_sessions():
-            parts = [session.title or "", session.summary or ""]
-            # Документы: учитываем title/text/source/url/date
-            for d in session.doc_texts:
-                parts.extend([
-                    d.get("title", ""),
-                    d.get("text", ""),
-                    d.get("source", ""),
-                    d.get("url", ""),
-                    d.get("date", ""),
-                ])
-            text_blob = " | ".join(part for part in parts if part)
-            score = _match_score(text_blob, query)
-            if score <= 0:
-                continue
-            results.append((_session_to_dict(session, short=True), score))
-    results.sort(key=lambda item: item[1], reverse=True)
-    results = results[:settings.STREAM_SUMMARIZATION_MAX_SESSIONS]
-    results = [result[0] for result in results]
+        # Полнотекстовый индекс БД только лексический; семантика и гибрид идут через индекс в памяти
+        if config.fulltext_search and mode == SearchMode.LEXICAL:
+            _sync_fulltext_index(user_id, uow)
+            results = uow.sessions.search_fulltext(user_id, query, limit=settings.STREAM_SUMMARIZATION_MAX_SESSIONS)
+            logger.info(f"finish search_similarity_sessions, found={len(results)}")
+            return results
+        results = session_search_index.search(
+            user_id,
+            query,
+            limit=settings.STREAM_SUMMARIZATION_MAX_SESSIONS,
+            stamps=uow.sessions.list_stamps(user_id),
+            load=lambda session_ids, full: _load_for_search(user_id, session_ids, full, uow),
+            to_dict=lambda session: _session_to_dict(session, short=True),
+            mode=mode,
+        )
     logger.info(f"finish search_similarity_sessions, found={len(results)}")
     return results
 
 
-def _normalize_text(value: str) -> str:
-    if not value:
-        return ""
-    return " ".join(value.lower().split())
-
-
-def _match_score(text_blob: str, query: str) -> float:
-    normalized_blob = _normalize_text(text_blob)
-    normalized_query = _normalize_text(query)
-    if not normalized_blob or not normalized_query:
-        return 0.0
-    matcher_score = SequenceMatcher(None, normalized_blob, normalized_query).ratio()
-    blob_tokens = set(normalized_blob.split())
-    query_tokens = set(normalized_query.split())
-    if not query_tokens:
-        return 0.0
-    overlap_score = len(blob_tokens & query_tokens) / len(query_tokens)
-    return float(max(matcher_score, overlap_score))
-
-
 @lru_cache(maxsize=1)
 def _get_context_window(model_name: str) -> int:
     """Fetch the context window for the configured model."""
@@ -288,6 +410,7 @@ def _get_context_window(model_name: str) -> int:
     base_url = settings.OPENAI_API_HOST.rstrip("/")
     model_path = f"{base_url}/models/{model_name}"
     try:
+        httpx = load_module("httpx")
         with httpx.Client(timeout=settings.STREAM_SUMMARIZATION_CONNECTION_TIMEOUT) as client:
             response = client.get(model_path)
             response.raise_for_status()
@@ -328,34 +451,121 @@ def _estimate_token_length(text: str, context_window: int) -> int:
     return min(estimated, len(text)) if context_window else estimated
 
 
-def _apply_map_reduce(text: str, context_window: int) -> str:
-    try:
-        from langchain.chains.summarize import load_summarize_chain  # type: ignore
-        from langchain.docstore.document import Document  # type: ignore
-        from langchain.text_splitter import RecursiveCharacterTextSplitter  # type: ignore
-    except ModuleNotFoundError:
-        logger.warning("LangChain is not installed; skipping map-reduce summarization and returning the original text.")
-        return text
-
-    chunk_size = max(200, context_window * 4)
-    chunk_overlap = max(50, int(chunk_size * 0.1))
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-    )
-    documents = [Document(page_content=chunk) for chunk in splitter.split_text(text)]
-    if len(documents) <= 1:
-        return text
-    llm = _build_llm()
-    chain = load_summarize_chain(llm, chain_type="map_reduce")
-    summary = chain.run(documents)
-    return summary.strip() or text
-
+def _doc_header(index: int, doc: DocRecord) -> str:
+    meta = " | ".join(filter(None, [doc.title, doc.source, doc.date, doc.url]))
+    header = f"[{index}] {meta}".strip(" |")
+    return header if header else f"[{index}]"
+
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    """Режет документ больше корзины по абзацам, затем по предложениям, затем по символам."""
+
+    max_chars = max(1, max_tokens * 4)
+    units: List[str] = []
+    for paragraph in text.split("\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            units.append(paragraph)
+            continue
+        for sentence in _SENTENCE_SPLIT.split(paragraph):
+            while len(sentence) > max_chars:
+                units.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                units.append(sentence)
+
+    pieces: List[str] = []
+    current = ""
+    for unit in units:
+        candidate = f"{current}\n{unit}" if current else unit
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        pieces.append(current)
+        current = unit
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _pack_documents(docs: Sequence[DocRecord], bin_tokens: int, context_window: int) -> List[str]:
+    """
+    Раскладывает целые документы с заголовками метаданных по корзинам размером bin_tokens
+    (first-fit-decreasing). Режутся только документы, которые не помещаются в корзину целиком.
+    """
 
-def _sanitize_prompt_text(text: str) -> str:
+    items: List[Tuple[int, int, str]] = []
+    for index, doc in enumerate(docs, 1):
+        header = _doc_header(index, doc)
+        body_budget = max(1, bin_tokens - _estimate_token_length(header, context_window) - 1)
+        text = doc.text
+        if _estimate_token_length(text, context_window) <= body_budget:
+            pieces = [text]
+        else:
+            pieces = _split_oversized(text, body_budget)
+        for piece in pieces:
+            content = f"{header}\n{piece}"
+            # +1 на разделитель между документами внутри корзины
+            items.append((_estimate_token_length(content, context_window) + 1, len(items), content))
+
+    bins: List[List[Tuple[int, str]]] = []
+    loads: List[int] = []
+    for tokens, position, content in sorted(items, key=lambda item: item[0], reverse=True):
+        for bin_index, load in enumerate(loads):
+            if load + tokens <= bin_tokens:
+                bins[bin_index].append((position, content))
+                loads[bin_index] += tokens
+                break
+        else:
+            bins.append([(position, content)])
+            loads.append(tokens)
+    # Внутри корзины сохраняем исходный порядок документов
+    return ["\n\n".join(content for _, content in sorted(packed)) for packed in bins]
+
+
+def _map_chunks(llm: "ChatOpenAI", chunks: Sequence[str], deadline: Deadline) -> List[str]:
+    partials: List[str] = []
+    spent = 0.0
+    for index, chunk in enumerate(chunks):
+        deadline.check("map")
+        # Не берём новый фрагмент, если до дедлайна не успеть его и финальную свёртку
+        if partials and not deadline.can_fit(2 * spent / len(partials)):
+            raise DeadlineExceeded(
+                f"Превышен срок выполнения запроса: обработано {index} из {len(chunks)} фрагментов"
+            )
+        started = monotonic()
+        result = _invoke_llm(llm, _CONDENSE_PROMPT.format(text=chunk), deadline, stage="map")
+        spent += monotonic() - started
+        partial = _message_text(result)
+        if partial:
+            partials.append(partial)
+    return partials
+
+
+def _apply_map_reduce(docs: Sequence[DocRecord], context_window: int, deadline: Deadline) -> str:
+    bin_tokens = max(50, int(context_window * 0.8) - _estimate_token_length(_CONDENSE_PROMPT, context_window))
+    chunks = _pack_documents(docs, bin_tokens, context_window)
+    if len(chunks) <= 1:
+        return "\n\n".join(doc.text for doc in docs)
+    llm = _build_llm(deadline)
+    partials = _map_chunks(llm, chunks, deadline)
+    # Сворачиваем промежуточные сводки, пока они не поместятся в одну корзину
+    while len(partials) > 1:
+        chunks = _pack_documents([DocRecord(partial) for partial in partials], bin_tokens, context_window)
+        if len(chunks) <= 1 or len(chunks) >= len(partials):
+            break
+        partials = _map_chunks(llm, chunks, deadline)
+    combined = "\n\n".join(partials)
+    summary = _message_text(_invoke_llm(llm, _CONDENSE_PROMPT.format(text=combined), deadline, stage="reduce"))
+    return summary.strip() or combined
+
+
+def _sanitize_prompt_text(docs: Sequence[DocRecord], deadline: Deadline) -> str:
     """Ensure the text passed to the LLM fits inside the model context window."""
 
+    text = "\n\n".join(doc.text for doc in docs)
     if not text:
         return ""
 
@@ -369,7 +579,7 @@ def _sanitize_prompt_text(text: str) -> str:
         return text
 
     logger.info("Condensing prompt text due to context window overflow")
-    condensed = _apply_map_reduce(text, context_window)
+    condensed = _apply_map_reduce(docs, context_window, deadline)
     condensed = condensed or text
 
     # If condensation is still too large, truncate to the safe character budget
@@ -380,8 +590,8 @@ def _sanitize_prompt_text(text: str) -> str:
     return condensed or text[: safe_window * 4]
 
 
-def _extract_message_content(result: Any) -> str:
-    """Normalize LLM responses to plain text and condense oversized payloads."""
+def _message_text(result: Any) -> str:
+    """Normalize LLM responses to plain text."""
 
     if result is None:
         return ""
@@ -401,14 +611,20 @@ def _extract_message_content(result: Any) -> str:
             text = "".join(parts).strip()
         else:
             text = str(content).strip()
+    return text
+
 
+def _extract_message_content(result: Any, deadline: Deadline) -> str:
+    """Normalize LLM responses to plain text and condense oversized payloads."""
+
+    text = _message_text(result)
     if not text:
         return ""
 
     context_window = _get_context_window(settings.OPENAI_MODEL_NAME)
     if _estimate_token_length(text, context_window) > context_window:
         logger.info("Applying map-reduce summarization due to context window overflow")
-        return _apply_map_reduce(text, context_window)
+        return _apply_map_reduce([DocRecord(text)], context_window, deadline)
 
     return text
 
@@ -430,38 +646,51 @@ def _load_prompt(
     report_uow: ReportTemplateUoW,
 ) -> str:
     with report_uow:
-        templates = report_uow.templates.list_by_report_types(report_index)
-        if not templates:
-            raise ValueError("Prompt template not found for the given report types")
-
-        template = min(templates, key=lambda item: item.template_id)
-        prompt = template.prompt
-
-    return prompt
+        template = report_uow.snapshot.get(report_index)
+    if template is None:
+        raise ValueError("Prompt template not found for the given report types")
+    return template.prompt
 
 
-def _build_llm() -> "ChatOpenAI":
+def _build_llm(deadline: Deadline | None = None) -> "ChatOpenAI":
     if not settings.OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY is not configured. Set the environment variable to use the LLM client.")
-    try:
-        from langchain_openai import ChatOpenAI as _ChatOpenAI  # type: ignore
-    except ModuleNotFoundError as exc:  # pragma: no cover - optional dependency path
-        raise RuntimeError(
-            "langchain-openai is required to build the LLM client. Install the 'langchain-openai' package."
-        ) from exc
-
+    _ChatOpenAI = load_module("langchain_openai").ChatOpenAI
+
+    # Собственный HTTP-клиент на запрос: при отмене он закрывается, и соединение
+    # с моделью рвётся, поэтому генерация на сервере тоже прекращается.
+    http_client = None
+    if deadline is not None:
+        httpx = load_module("httpx")
+        http_client = deadline.register(httpx.Client(timeout=settings.STREAM_SUMMARIZATION_CONNECTION_TIMEOUT))
     return _ChatOpenAI(
         base_url=settings.OPENAI_API_HOST,
         api_key=settings.OPENAI_API_KEY,
         model=settings.OPENAI_MODEL_NAME,
         temperature=0,
         timeout=settings.STREAM_SUMMARIZATION_CONNECTION_TIMEOUT,
+        http_client=http_client,
         extra_body={"chat_template_kwargs": {"enable_thinking": False}},
     )
 
-def _prepare_doc_texts(chunks: Iterable[Any]) -> List[Dict[str, str]]:
+
+def _invoke_llm(llm: "ChatOpenAI", prompt: str, deadline: Deadline, stage: str = "generate") -> Any:
+    deadline.check(stage)
+    try:
+        result = llm.invoke(prompt, timeout=deadline.timeout(settings.STREAM_SUMMARIZATION_CONNECTION_TIMEOUT))
+    except Exception:
+        # Ошибка из-за закрытого клиента или истёкшего таймаута — это отмена, а не сбой модели
+        deadline.check(stage)
+        llm_backpressure.record_failure()
+        raise
+    llm_backpressure.record_success()
+    return result
+
+
+def _prepare_doc_texts(chunks: Iterable[Any]) -> List[DocRecord]:
     """
-    Принимает List[DocText | dict | str] и возвращает нормализованный List[dict].
+    Принимает List[DocText | DocRecord | dict | str] и возвращает List[DocRecord].
+    DocText уже очищен при валидации запроса, поэтому здесь документы только проверяются.
     """
     if isinstance(chunks, (str, bytes)) or not isinstance(chunks, Iterable):
         raise ValueError("Текст должен быть передан списком DocText/объектов")
@@ -472,34 +701,15 @@ def _prepare_doc_texts(chunks: Iterable[Any]) -> List[Dict[str, str]]:
     if len(items) > max_docs:
         raise ValueError(f"Превышен лимит документов: {len(items)} > {max_docs}")
 
-    docs: List[Dict[str, str]] = []
+    docs: List[DocRecord] = []
     max_chars = settings.STREAM_SUMMARIZATION_MAX_CHARS
     for item in items:
-        # Поддержка Pydantic v2 (model_dump) и v1 (dict)
-        if hasattr(item, "model_dump"):
-            item = item.model_dump()  # type: ignore[attr-defined]
-        elif hasattr(item, "dict"):
-            item = item.dict()  # type: ignore[attr-defined]
-
-        if isinstance(item, dict):
-            txt = str(item.get("text", "")).strip()
-            if not txt:
-                continue
-            if len(txt) > max_chars:
-                raise ValueError(f"Длина одного документа превышает лимит {max_chars} символов")
-            docs.append({
-                "text": txt,
-                "title": str(item.get("title", "")).strip(),
-                "url": str(item.get("url", "")).strip(),
-                "date": str(item.get("date", "")).strip(),
-                "source": str(item.get("source", "")).strip(),
-            })
-        else:
-            s = str(item).strip()
-            if s:
-                if len(s) > max_chars:
-                    raise ValueError(f"Длина одного документа превышает лимит {max_chars} символов")
-                docs.append({"text": s, "title": "", "url": "", "date": "", "source": ""})
+        record = DocRecord.coerce(item)
+        if record is None:
+            continue
+        if len(record.text) > max_chars:
+            raise ValueError(f"Длина одного документа превышает лимит {max_chars} символов")
+        docs.append(record)
 
     if not docs:
         raise ValueError("Передан пустой текст для суммаризации")
@@ -507,19 +717,135 @@ def _prepare_doc_texts(chunks: Iterable[Any]) -> List[Dict[str, str]]:
 
 
 def _generate_report_types(
-    text: Sequence[str],
+    text: Sequence[DocRecord],
     report_index: int,
     report_uow: ReportTemplateUoW,
-) -> str:
+    deadline: Deadline | None = None,
+) -> Tuple[str, str | None]:
+    """
+    Возвращает (сводка, ошибка). Если LLM-бэкенд перегружен или цепь разомкнута,
+    сразу отдаёт экстрактивную сводку с пометкой DEGRADED_ERROR.
+    """
+    deadline = deadline or Deadline.from_header(None)
     prompt = _load_prompt(report_index, report_uow)
-    llm: ChatOpenAI | None = None
-    if llm is None:
-        llm = _build_llm()
-    combined_text = "\n\n".join(text)
-    sanitized_text = _sanitize_prompt_text(combined_text)
-    message_prompt = f"{prompt.strip()}\n\nТексты:\n{sanitized_text.strip()}"
-    response = _extract_message_content(llm.invoke(message_prompt))
-    return response
+    deadline.check("load_prompt")
+    if not llm_backpressure.try_acquire():
+        logger.warning(
+            "LLM backend saturated (inflight=%s, circuit_open=%s); returning extractive summary",
+            llm_backpressure.inflight,
+            llm_backpressure.circuit_open,
+        )
+        return _extractive_summary([doc.text for doc in text]), DEGRADED_ERROR
+    try:
+        llm = _build_llm(deadline)
+        sanitized_text = _sanitize_prompt_text(text, deadline)
+        message_prompt = f"{prompt.strip()}\n\nТексты:\n{sanitized_text.strip()}"
+        response = _extract_message_content(_invoke_llm(llm, message_prompt, deadline), deadline)
+    finally:
+        llm_backpressure.release()
+        deadline.release()
+    return response, None
+
+
+def _extractive_summary(text: Sequence[str], max_sentences: int = EXTRACTIVE_SUMMARY_SENTENCES) -> str:
+    """Локальная сводка: предложения с наибольшим средним весом частотных слов, в исходном порядке."""
+
+    sentences = [
+        sentence.strip()
+        for chunk in text
+        for sentence in _SENTENCE_SPLIT.split(chunk)
+        if sentence.strip()
+    ]
+    if len(sentences) <= max_sentences:
+        return " ".join(sentences)
+
+    tokenized = [[word for word in _WORD.findall(sentence.lower()) if len(word) > 3] for sentence in sentences]
+    frequencies = Counter(word for words in tokenized for word in words)
+    scores = [
+        sum(frequencies[word] for word in words) / len(words) if words else 0.0
+        for words in tokenized
+    ]
+    top = sorted(range(len(sentences)), key=lambda index: scores[index], reverse=True)[:max_sentences]
+    return " ".join(sentences[index] for index in sorted(top))
+
+
+def _load_for_search(user_id: str, session_ids: List[str], full: bool, uow: IUoW) -> List[Session]:
+    """Сессии с сохранёнными search_tokens; у сессий, записанных до их появления, токены считаются и сохраняются."""
+    sessions = uow.sessions.list_for_user(user_id, full=full, session_ids=session_ids, search_tokens=True)
+    missing = [session for session in sessions if session.search_tokens is None]
+    for session in missing:
+        session.search_tokens = session_search_tokens(session)
+    if missing:
+        uow.commit()
+        logger.info("stored search tokens for %s sessions", len(missing))
+    return sessions
+
+
+def _sync_fulltext_index(user_id: str, uow: IUoW) -> None:
+    """Переиндексирует в БД сессии, изменившиеся с прошлого поиска; полные тексты читаются только для них."""
+    stale = uow.sessions.list_search_stale(user_id)
+    if not stale:
+        return
+    session_ids = list(stale)
+    for start in range(0, len(session_ids), SEARCH_INDEX_BATCH):
+        batch = session_ids[start:start + SEARCH_INDEX_BATCH]
+        for session in uow.sessions.list_for_user(user_id, full=True, session_ids=batch):
+            uow.sessions.index_for_search(session, stale[session.session_id])
+    uow.commit()
+    logger.info("reindexed %s sessions for full-text search", len(session_ids))
+
+
+def _schedule_summary_upgrade(
+    user_id: str,
+    session_id: str,
+    expected_version: int,
+    text: Sequence[DocRecord],
+    report_index: int,
+    user_uow: IUoW,
+    report_uow: ReportTemplateUoW,
+) -> None:
+    docs = list(text)
+    summary_upgrades.submit(
+        session_id,
+        lambda: _upgrade_summary(user_id, session_id, expected_version, docs, report_index, user_uow, report_uow),
+    )
+
+
+def _upgrade_summary(
+    user_id: str,
+    session_id: str,
+    expected_version: int,
+    text: Sequence[DocRecord],
+    report_index: int,
+    user_uow: IUoW,
+    report_uow: ReportTemplateUoW,
+) -> None:
+    """Заменяет экстрактивную сводку полной, когда бэкенд освободится, и повышает version."""
+
+    for _ in range(SUMMARY_UPGRADE_ATTEMPTS):
+        try:
+            summary, degraded = _generate_report_types(text=text, report_index=report_index, report_uow=report_uow)
+        except Exception as error:
+            logger.warning("summary upgrade for session %s failed: %s", session_id, error)
+            return
+        if degraded is None:
+            break
+        sleep(settings.STREAM_SUMMARIZATION_LLM_COOLDOWN)
+    else:
+        logger.warning("summary upgrade for session %s abandoned: LLM backend is still saturated", session_id)
+        return
+
+    with user_uow:
+        updated = user_uow.sessions.update_if_version(
+            user_id, session_id, expected_version, summary=summary, updated_at=time()
+        )
+        if not updated:
+            logger.info("summary upgrade for session %s skipped: session changed", session_id)
+            return
+        session = user_uow.sessions.get_for_user(user_id, session_id, full=True)
+        session.search_tokens = session_search_tokens(session)
+        user_uow.commit()
+    logger.info("summary upgrade for session %s finished", session_id)
 
 
 def _session_to_dict(session: Session, short: bool = False) -> Dict[str, Any]:
@@ -527,13 +853,12 @@ def _session_to_dict(session: Session, short: bool = False) -> Dict[str, Any]:
         "session_id": session.session_id,
         "version": session.version,
         "title": session.title,
-        "documents": session.doc_texts,
-        "summary": session.summary,
         "inserted_at": session.inserted_at,
         "updated_at": session.updated_at,
     }
-    if short:
-        payload.pop("documents", None)
-        payload.pop("summary", None)
+    # Краткая форма не трогает doc_texts и summary: у сессий из проекции они не загружены
+    if not short:
+        payload["documents"] = [doc.to_dict() for doc in session.doc_texts]
+        payload["summary"] = session.summary
     return payload
 
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import importlib
+import sys
+import threading
+from time import perf_counter
+from types import ModuleType
+from typing import Dict
+
+from stream_summarization.services.startup import startup_profile
+
+# Тяжёлые библиотеки, которые нужны только отдельным запросам: модуль верхнего уровня -> пакет
+LAZY_MODULES: Dict[str, str] = {
+    "httpx": "httpx",
+    "langchain_openai": "langchain-openai",
+    "fpdf": "fpdf2",
+    "pypdf": "pypdf",
+    "docx": "python-docx",
+    "odf": "odfpy",
+    "textract": "textract",
+    "numpy": "numpy",
+    "charset_normalizer": "charset-normalizer",
+}
+
+# sys.modules содержит модуль ещё до конца его инициализации, поэтому готовые модули
+# учитываются отдельно, а первый импорт из параллельных потоков идёт под блокировкой
+_loaded: Dict[str, ModuleType] = {}
+_import_lock = threading.Lock()
+
+
+def load_module(name: str) -> ModuleType:
+    """
+    Импортирует модуль из LAZY_MODULES при первом обращении; время импорта попадает
+    в профиль запуска. Отсутствующая библиотека даёт RuntimeError.
+    """
+    module = _loaded.get(name)
+    if module is not None:
+        return module
+    package = LAZY_MODULES.get(name.partition(".")[0])
+    if package is None:
+        raise KeyError(f"Module {name} is not registered for lazy import")
+    with _import_lock:
+        imported = name in sys.modules
+        started = perf_counter()
+        try:
+            module = importlib.import_module(name)
+        except ImportError as exc:
+            raise RuntimeError(f"Библиотека {package} не установлена") from exc
+        if not imported:
+            startup_profile.record_import(name, perf_counter() - started)
+        _loaded[name] = module
+    return module
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import heapq
+import math
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from stream_summarization.domain.session import Session
+from stream_summarization.services.search.tokenizer import tokenize
+
+
+class Bm25Index:
+    """Инвертированный индекс: термин -> {doc_id: tf}; ранжирование Okapi BM25."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}
+        self.total_length = 0
+        self._terms: Dict[str, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, doc_id: str, tokens: Sequence[str]) -> None:
+        self.add_counts(doc_id, Counter(tokens))
+
+    def add_counts(self, doc_id: str, counts: Mapping[str, int]) -> None:
+        self.remove(doc_id)
+        for term, frequency in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+        length = sum(counts.values())
+        self._terms[doc_id] = tuple(counts)
+        self.lengths[doc_id] = length
+        self.total_length += length
+
+    def remove(self, doc_id: str) -> None:
+        for term in self._terms.pop(doc_id, ()):
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(doc_id, 0)
+
+    def search(self, terms: Iterable[str], limit: int) -> List[Tuple[float, str]]:
+        """До limit пар (score, doc_id) по убыванию; просматриваются только списки терминов запроса."""
+
+        count = len(self.lengths)
+        if not count or limit <= 0:
+            return []
+        average_length = self.total_length / count or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self.lengths[doc_id] / average_length)
+                scores[doc_id] += idf * frequency * (self.k1 + 1.0) / (frequency + norm)
+        return heapq.nlargest(limit, ((score, doc_id) for doc_id, score in scores.items()))
+
+
+def session_tokens(session: Session) -> List[str]:
+    parts = [session.title or "", session.summary or ""]
+    for doc in session.doc_texts:
+        parts.extend([doc.title, doc.text, doc.source, doc.url, doc.date])
+    return tokenize(" ".join(part for part in parts if part))
+
+
+def encode_counts(tokens: Iterable[str]) -> str:
+    """Компактная запись «основа:частота» через пробел; токены состоят из букв и цифр, разделители не встречаются."""
+    return " ".join(f"{term}:{count}" for term, count in Counter(tokens).items())
+
+
+def decode_counts(value: str) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for item in value.split():
+        term, _, count = item.rpartition(":")
+        counts[term] = int(count)
+    return counts
+
+
+def session_search_tokens(session: Session) -> str:
+    """Значение sessions.search_tokens: пересчитывается при каждой записи заголовка, сводки или документов."""
+    return encode_counts(session_tokens(session))
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from stream_summarization.domain.enums import SearchMode
+from stream_summarization.domain.session import Session
+from stream_summarization.services.search.bm25 import Bm25Index, decode_counts
+from stream_summarization.services.search.semantic import Embedder, VectorStore, load_embedder, session_passages
+from stream_summarization.services.search.tokenizer import tokenize
+
+Stamp = Tuple[int, float]
+
+
+class _UserIndex(Bm25Index):
+    def __init__(self) -> None:
+        super().__init__()
+        self.lock = threading.Lock()
+        self.stamps: Dict[str, Stamp] = {}
+        self.meta: Dict[str, Dict[str, Any]] = {}
+        # Вектора считаются с первого семантического запроса пользователя
+        self.vectors: VectorStore | None = None
+
+
+class SessionSearchIndex:
+    """
+    Индексы сессий по пользователям (не больше max_users, вытесняются давно не искавшие):
+    BM25 для лексического поиска и вектора пассажей для семантического.
+
+    Перед поиском индекс сверяется с (session_id, version, updated_at) из БД: удалённые
+    сессии убираются, а переиндексируются только новые и изменившиеся. Поэтому индекс
+    остаётся верным, даже если сессию изменил другой процесс.
+
+    load(session_ids, full) возвращает сессии с заполненным search_tokens; полный текст
+    (full=True) нужен только для векторов семантического поиска.
+    """
+
+    def __init__(
+        self,
+        max_users: int,
+        embedder: str = "hashing",
+        semantic_weight: float = 0.5,
+        min_similarity: float = 0.25,
+    ) -> None:
+        self.max_users = max_users
+        self.embedder_spec = embedder
+        self.semantic_weight = semantic_weight
+        self.min_similarity = min_similarity
+        self._embedder: Embedder | None = None
+        self._lock = threading.Lock()
+        self._users: "OrderedDict[str, _UserIndex]" = OrderedDict()
+
+    @property
+    def embedder(self) -> Embedder:
+        if self._embedder is None:
+            self._embedder = load_embedder(self.embedder_spec)
+        return self._embedder
+
+    def _user_index(self, user_id: str) -> _UserIndex:
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is None:
+                index = self._users[user_id] = _UserIndex()
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            self._users.move_to_end(user_id)
+            return index
+
+    def drop(self, user_id: str) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def _sync(
+        self,
+        index: _UserIndex,
+        stamps: Dict[str, Stamp],
+        load: Callable[[List[str], bool], Iterable[Session]],
+        to_dict: Callable[[Session], Dict[str, Any]],
+    ) -> None:
+        for session_id in [session_id for session_id in index.stamps if session_id not in stamps]:
+            index.remove(session_id)
+            del index.stamps[session_id]
+            del index.meta[session_id]
+            if index.vectors is not None:
+                index.vectors.remove(session_id)
+        changed = [
+            session_id for session_id, stamp in stamps.items()
+            if index.stamps.get(session_id) != stamp or (index.vectors is not None and session_id not in index.vectors)
+        ]
+        if not changed:
+            return
+        for session in load(changed, index.vectors is not None):
+            index.add_counts(session.session_id, decode_counts(session.search_tokens))
+            index.stamps[session.session_id] = (session.version, session.updated_at)
+            index.meta[session.session_id] = to_dict(session)
+            if index.vectors is not None:
+                index.vectors.set(session.session_id, self.embedder.embed(session_passages(session)))
+
+    def search(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        stamps: Dict[str, Stamp],
+        load: Callable[[List[str], bool], Iterable[Session]],
+        to_dict: Callable[[Session], Dict[str, Any]],
+        mode: str = SearchMode.LEXICAL,
+    ) -> List[Dict[str, Any]]:
+        index = self._user_index(user_id)
+        with index.lock:
+            if mode != SearchMode.LEXICAL and index.vectors is None:
+                index.vectors = VectorStore()
+            self._sync(index, stamps, load, to_dict)
+            if mode == SearchMode.LEXICAL:
+                hits = index.search(tokenize(query), limit)
+            else:
+                hits = self._semantic_hits(index, query, limit, hybrid=mode == SearchMode.HYBRID)
+            return [index.meta[session_id] for _, session_id in hits]
+
+    def _semantic_hits(self, index: _UserIndex, query: str, limit: int, hybrid: bool) -> List[Tuple[float, str]]:
+        vector = self.embedder.embed([query])[0]
+        if not hybrid:
+            return index.vectors.search(vector, limit, self.min_similarity)
+        # Гибрид: BM25, нормированный на лучший результат, плюс косинусная близость с весом semantic_weight
+        lexical = index.search(tokenize(query), len(index))
+        semantic = index.vectors.search(vector, len(index), self.min_similarity)
+        best = lexical[0][0] if lexical else 1.0
+        scores: Dict[str, float] = {}
+        for score, session_id in lexical:
+            scores[session_id] = (1.0 - self.semantic_weight) * score / best
+        for score, session_id in semantic:
+            scores[session_id] = scores.get(session_id, 0.0) + self.semantic_weight * score
+        return heapq.nlargest(limit, ((score, session_id) for session_id, score in scores.items()))
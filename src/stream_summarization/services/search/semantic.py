@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import importlib
+import math
+import zlib
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, List, Protocol, Sequence, Tuple
+
+from stream_summarization.domain.session import Session
+from stream_summarization.services.lazy import load_module
+from stream_summarization.services.search.tokenizer import tokenize
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Документов больше этого числа склеиваются в пассажи, чтобы вектора сессии занимали ограниченную память
+MAX_PASSAGES = 32
+
+
+class Embedder(Protocol):
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        """Матрица (len(texts), d) float32 с L2-нормированными строками; пустой текст даёт нулевую строку."""
+        ...
+
+
+class HashingEmbedder:
+    """
+    Локальный эмбеддер без модели и сети: основы слов и их символьные триграммы
+    раскладываются знаковым хешированием в dimension корзин с весом 1 + log(tf).
+    Триграммы сближают разные формы и опечатки; синонимы ловит только подключённая модель.
+    """
+
+    def __init__(self, dimension: int = 256) -> None:
+        self.dimension = dimension
+
+    def _features(self, text: str) -> Dict[str, float]:
+        words: Counter = Counter()
+        trigrams: Counter = Counter()
+        for token in tokenize(text):
+            words[token] += 1
+            padded = f"<{token}>"
+            trigrams.update(padded[start:start + 3] for start in range(len(padded) - 2))
+        features = {f"w:{word}": 1.0 + math.log(count) for word, count in words.items()}
+        features.update((f"g:{gram}", 0.5 * (1.0 + math.log(count))) for gram, count in trigrams.items())
+        return features
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        np = load_module("numpy")
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text).items():
+                digest = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, digest % self.dimension] += weight if digest & 0x80000000 else -weight
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+def load_embedder(spec: str) -> Embedder:
+    """Эмбеддер по настройке: hashing или package.module:factory (фабрика без аргументов)."""
+
+    if spec == "hashing":
+        return HashingEmbedder()
+    module_name, _, factory = spec.partition(":")
+    try:
+        return getattr(importlib.import_module(module_name), factory)()
+    except (ImportError, AttributeError, TypeError) as exc:
+        raise RuntimeError(f"Не удалось загрузить эмбеддер {spec}: {exc}") from exc
+
+
+def session_passages(session: Session) -> List[str]:
+    """Заголовок со сводкой и документы сессии; не больше MAX_PASSAGES пассажей."""
+
+    docs = [" ".join(part for part in (doc.title, doc.text) if part) for doc in session.doc_texts]
+    if len(docs) > MAX_PASSAGES - 1:
+        size = math.ceil(len(docs) / (MAX_PASSAGES - 1))
+        docs = [" ".join(docs[start:start + size]) for start in range(0, len(docs), size)]
+    return [f"{session.title or ''} {session.summary or ''}", *docs]
+
+
+class VectorStore:
+    """Вектора пассажей по сессиям; для запроса склеиваются в одну матрицу float32."""
+
+    def __init__(self) -> None:
+        self.vectors: Dict[str, "np.ndarray"] = {}
+        self._matrix: Tuple["np.ndarray", "np.ndarray", List[str]] | None = None
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.vectors
+
+    def set(self, session_id: str, vectors: "np.ndarray") -> None:
+        self.vectors[session_id] = vectors
+        self._matrix = None
+
+    def remove(self, session_id: str) -> None:
+        if self.vectors.pop(session_id, None) is not None:
+            self._matrix = None
+
+    def _stacked(self) -> Tuple["np.ndarray", "np.ndarray", List[str]]:
+        if self._matrix is None:
+            np = load_module("numpy")
+            session_ids = list(self.vectors)
+            blocks = [self.vectors[session_id] for session_id in session_ids]
+            offsets = np.cumsum([0] + [len(block) for block in blocks[:-1]])
+            self._matrix = np.concatenate(blocks), offsets, session_ids
+        return self._matrix
+
+    def search(self, query: "np.ndarray", limit: int, min_score: float) -> List[Tuple[float, str]]:
+        """До limit пар (cosine, session_id) по убыванию; сессия оценивается лучшим пассажем."""
+
+        if not self.vectors or limit <= 0 or not query.any():
+            return []
+        np = load_module("numpy")
+        matrix, offsets, session_ids = self._stacked()
+        scores = np.maximum.reduceat(matrix @ query, offsets)
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[index]), session_ids[index]) for index in top if scores[index] >= min_score]
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import List
+
+_TOKEN = re.compile(r"[^\W_]+")
+_CYRILLIC = re.compile(r"[а-я]")
+_VOWELS = frozenset("аеиоуыэюя")
+
+STOPWORDS = frozenset(
+    """
+    и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по только ее мне было вот
+    от меня еще нет о из ему теперь когда даже ну вдруг ли если уже или ни быть был него до вас нибудь опять
+    уж вам ведь там потом себя ничего ей может они тут где есть надо ней для мы тебя их чем была сам чтоб без
+    будто чего раз тоже себе под будет ж тогда кто этот того потому этого какой совсем ним здесь этом один
+    почти мой тем чтобы нее сейчас были куда зачем всех никогда можно при наконец два об другой хоть после
+    над больше тот через эти нас про всего них какая много разве три эту моя впрочем хорошо свою этой перед
+    иногда лучше чуть том нельзя такой им более всегда конечно всю между это также
+    the a an and or of to in on for is are was were be by with as at from that this it its not
+    """.split()
+)
+
+
+def _suffixes(*words: str) -> tuple:
+    return tuple(sorted(words, key=len, reverse=True))
+
+
+# Snowball Russian: https://snowballstem.org/algorithms/russian/stemmer.html
+_PERFECTIVE_GERUND_1 = _suffixes("в", "вши", "вшись")
+_PERFECTIVE_GERUND_2 = _suffixes("ив", "ивши", "ившись", "ыв", "ывши", "ывшись")
+_ADJECTIVE = _suffixes(
+    "ее", "ие", "ые", "ое", "ими", "ыми", "ей", "ий", "ый", "ой", "ем", "им", "ым", "ом",
+    "его", "ого", "ему", "ому", "их", "ых", "ую", "юю", "ая", "яя", "ою", "ею",
+)
+_PARTICIPLE_1 = _suffixes("ем", "нн", "вш", "ющ", "щ")
+_PARTICIPLE_2 = _suffixes("ивш", "ывш", "ующ")
+_REFLEXIVE = _suffixes("ся", "сь")
+_VERB_1 = _suffixes("ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но", "ет", "ют", "ны", "ть", "ешь", "нно")
+_VERB_2 = _suffixes(
+    "ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей", "уй", "ил", "ыл", "им", "ым", "ен",
+    "ило", "ыло", "ено", "ят", "ует", "уют", "ит", "ыт", "ены", "ить", "ыть", "ишь", "ую", "ю",
+)
+_NOUN = _suffixes(
+    "а", "ев", "ов", "ие", "ье", "е", "иями", "ями", "ами", "еи", "ии", "и", "ией", "ей", "ой", "ий", "й",
+    "иям", "ям", "ием", "ем", "ам", "ом", "о", "у", "ах", "иях", "ях", "ы", "ь", "ию", "ью", "ю", "ия", "ья", "я",
+)
+_SUPERLATIVE = _suffixes("ейш", "ейше")
+_DERIVATIONAL = _suffixes("ост", "ость")
+
+
+def _region_after_vowel_consonant(word: str, start: int) -> int:
+    for index in range(start + 1, len(word)):
+        if word[index] not in _VOWELS and word[index - 1] in _VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _remove(word: str, limit: int, suffixes: tuple) -> str | None:
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= limit:
+            return word[: -len(suffix)]
+    return None
+
+
+def _remove_after_a(word: str, limit: int, suffixes: tuple) -> str | None:
+    """Окончания первой группы снимаются, только если перед ними стоит «а» или «я» внутри RV."""
+    for suffix in suffixes:
+        start = len(word) - len(suffix)
+        if word.endswith(suffix) and start - 1 >= limit:
+            return word[:start] if word[start - 1] in "ая" else None
+    return None
+
+
+def _remove_grouped(word: str, limit: int, first: tuple, second: tuple) -> str | None:
+    # Из двух групп берётся самое длинное совпавшее окончание
+    best_first = next((suffix for suffix in first if word.endswith(suffix)), "")
+    best_second = next((suffix for suffix in second if word.endswith(suffix)), "")
+    if len(best_second) >= len(best_first) and best_second:
+        return _remove(word, limit, (best_second,))
+    if best_first:
+        return _remove_after_a(word, limit, (best_first,))
+    return None
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Стеммер Snowball для русского языка."""
+
+    rv = next((index + 1 for index, char in enumerate(word) if char in _VOWELS), len(word))
+    r1 = _region_after_vowel_consonant(word, 0)
+    r2 = _region_after_vowel_consonant(word, r1)
+
+    # Шаг 1
+    stripped = _remove_grouped(word, rv, _PERFECTIVE_GERUND_1, _PERFECTIVE_GERUND_2)
+    if stripped is not None:
+        word = stripped
+    else:
+        word = _remove(word, rv, _REFLEXIVE) or word
+        stripped = _remove(word, rv, _ADJECTIVE)
+        if stripped is not None:
+            word = _remove_grouped(stripped, rv, _PARTICIPLE_1, _PARTICIPLE_2) or stripped
+        else:
+            stripped = _remove_grouped(word, rv, _VERB_1, _VERB_2)
+            if stripped is None:
+                stripped = _remove(word, rv, _NOUN)
+            word = stripped if stripped is not None else word
+
+    # Шаг 2
+    if word.endswith("и") and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Шаг 3
+    word = _remove(word, r2, _DERIVATIONAL) or word
+
+    # Шаг 4
+    if word.endswith("нн") and len(word) - 2 >= rv:
+        return word[:-1]
+    stripped = _remove(word, rv, _SUPERLATIVE)
+    if stripped is not None:
+        word = stripped
+        if word.endswith("нн") and len(word) - 2 >= rv:
+            word = word[:-1]
+        return word
+    if word.endswith("ь") and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Слова в нижнем регистре без стоп-слов; русские слова приводятся к основе, «ё» — к «е»."""
+
+    tokens: List[str] = []
+    for token in _TOKEN.findall(text.lower().replace("ё", "е")):
+        if token in STOPWORDS or (len(token) < 2 and not token.isdigit()):
+            continue
+        tokens.append(stem(token) if _CYRILLIC.search(token) else token)
+    return tokens
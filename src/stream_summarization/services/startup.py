@@ -0,0 +1,118 @@
+"""
+Профиль холодного старта API: время импорта модулей, стадии инициализации в lifespan
+и отложенные импорты тяжёлых библиотек.
+
+Разбивка импорта в стиле ``python -X importtime``:
+
+    python -m stream_summarization.services.startup [--top 25]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import re
+import subprocess
+import sys
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Tuple
+
+logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+APP_MODULE = "stream_summarization.entrypoints.api"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+
+class StartupProfile:
+    def __init__(self) -> None:
+        self.created_at = perf_counter()
+        self.import_seconds: float | None = None
+        self.ready_seconds: float | None = None
+        self.stages: Dict[str, float] = {}
+        self.lazy_imports: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def imports_finished(self) -> None:
+        self.import_seconds = perf_counter() - self.created_at
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = perf_counter() - started
+
+    def ready(self) -> None:
+        self.ready_seconds = perf_counter() - self.created_at
+        logger.info(
+            "API ready in %.3fs (imports %.3fs, %s)",
+            self.ready_seconds,
+            self.import_seconds or 0.0,
+            ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.stages.items()),
+        )
+
+    def record_import(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.lazy_imports[name] = seconds
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "import_seconds": self.import_seconds,
+            "ready_seconds": self.ready_seconds,
+            "stages": dict(self.stages),
+            "lazy_imports": dict(self.lazy_imports),
+            "loaded_modules": len(sys.modules),
+        }
+
+
+startup_profile = StartupProfile()
+
+
+def importtime_breakdown(module: str = APP_MODULE) -> List[Tuple[str, int, int, int]]:
+    """Импортирует module в чистом интерпретаторе с -X importtime: (модуль, self мкс, cumulative мкс, глубина)."""
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Не удалось импортировать {module}: {completed.stderr.strip().splitlines()[-1:]}")
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default=APP_MODULE)
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    rows = importtime_breakdown(args.module)
+    total = max((cumulative for _, _, cumulative, _ in rows), default=0)
+    print(f"import {args.module}: {total / 1e3:.1f} ms, {len(rows)} modules\n")
+
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.partition(".")[0]] += self_us
+    print(f"{'self ms':>9}  package")
+    for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"{self_us / 1e3:9.1f}  {name}")
+
+    print(f"\n{'cumul ms':>9}  module")
+    for name, _, cumulative_us, depth in sorted(rows, key=lambda row: row[2], reverse=True)[: args.top]:
+        print(f"{cumulative_us / 1e3:9.1f}  {'  ' * depth}{name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sys
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from json import JSONDecodeError
+from pathlib import Path
+from time import monotonic
+from types import MappingProxyType
+from typing import Mapping, Tuple
+from uuid import uuid4
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from stream_summarization.adapters.repository import ReportTemplateRepository
+from stream_summarization.domain.report import ReportTemplate, TemplateRecord
+from stream_summarization.services.config import session_factory, settings
+
+logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TemplateSnapshot:
+    """Неизменяемый индекс шаблонов по report_index; digest — sha256 исходного файла."""
+
+    digest: str
+    templates: Mapping[int, TemplateRecord]
+
+    @cached_property
+    def report_types(self) -> Tuple[str, ...]:
+        return tuple(self.templates[index].report_type for index in sorted(self.templates))
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest[:32]}"'
+
+    @cached_property
+    def report_types_body(self) -> bytes:
+        """JSON ответа /report_types: сериализуется один раз на версию шаблонов."""
+        return json.dumps({"report_types": list(self.report_types)}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def get(self, report_index: int) -> TemplateRecord | None:
+        return self.templates.get(report_index)
+
+
+EMPTY_SNAPSHOT = TemplateSnapshot(digest="", templates=MappingProxyType({}))
+
+
+def parse_templates(raw: bytes) -> Mapping[int, TemplateRecord]:
+    try:
+        payload = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, JSONDecodeError) as exc:
+        raise ValueError(f"Некорректный файл типов отчётов: {exc}") from exc
+
+    templates = {}
+    types = payload.get("types", []) if isinstance(payload, dict) else []
+    for report_index, item in enumerate(types):
+        if not isinstance(item, dict):
+            continue
+        report_type = str(item.get("category", "")).strip()
+        prompt = str(item.get("prompt", "")).strip()
+        if not report_type or not prompt:
+            logger.warning(
+                "Skipping report template at index %s due to missing category or prompt",
+                report_index,
+            )
+            continue
+        templates[report_index] = TemplateRecord(report_index, report_type, prompt)
+    return MappingProxyType(templates)
+
+
+class TemplateRegistry:
+    """
+    Шаблоны отчётов в памяти процесса.
+
+    Файл перечитывается, только если изменились его mtime/размер, и не чаще раза
+    в check_interval секунд; таблица report_templates переписывается, только если
+    её содержимое отличается от файла. После start_watching файл проверяет фоновый
+    поток, и current() не обращается ни к диску, ни к БД.
+    """
+
+    def __init__(self, path: str, check_interval: float, session_factory=session_factory) -> None:
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._snapshot: TemplateSnapshot | None = None
+        self._file_key: Tuple[int, int] | None = None
+        self._checked_at = 0.0
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def stale(self) -> bool:
+        if self._snapshot is None:
+            return True
+        if self._watcher is not None:
+            return False
+        return monotonic() - self._checked_at >= self.check_interval
+
+    def current(self) -> TemplateSnapshot:
+        if self.stale:
+            return self.reload()
+        return self._snapshot
+
+    def reload(self, force: bool = False) -> TemplateSnapshot:
+        with self._lock:
+            self._checked_at = monotonic()
+            previous = self._snapshot or EMPTY_SNAPSHOT
+            try:
+                stat = self.path.stat()
+            except OSError:
+                if self._snapshot is None:
+                    # Файла нет: работаем с шаблонами, сохранёнными в БД при прошлом запуске
+                    previous = self._load_database()
+                self._snapshot = previous
+                return previous
+            file_key = (stat.st_mtime_ns, stat.st_size)
+            if not force and self._snapshot is not None and file_key == self._file_key:
+                return previous
+
+            try:
+                raw = self.path.read_bytes()
+            except OSError as exc:
+                logger.error("Failed to read report types configuration: %s", exc)
+                self._snapshot = previous
+                return previous
+            self._file_key = file_key
+            digest = hashlib.sha256(raw).hexdigest()
+            if not force and digest == previous.digest:
+                return previous
+
+            try:
+                templates = parse_templates(raw)
+            except ValueError as exc:
+                logger.error("Failed to parse report types configuration: %s", exc)
+                self._snapshot = previous
+                return previous
+
+            snapshot = TemplateSnapshot(digest=digest, templates=templates)
+            self._sync_database(snapshot)
+            self._snapshot = snapshot
+            logger.info("Loaded %s report templates (%s)", len(templates), digest[:12])
+            return snapshot
+
+    def start_watching(self) -> None:
+        self.current()
+        if self._watcher is not None or self.check_interval <= 0:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="report-templates-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            self._stop.set()
+            watcher.join()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.reload()
+            except Exception as exc:  # pragma: no cover - поток наблюдения не должен падать
+                logger.error("Report templates watcher failed: %s", exc)
+
+    def _load_database(self) -> TemplateSnapshot:
+        db = self.session_factory()
+        try:
+            records = sorted(
+                TemplateRecord(template.report_index, template.report_type, template.prompt)
+                for template in ReportTemplateRepository(db).list()
+            )
+        except SQLAlchemyError as exc:
+            logger.error("Failed to load report templates from the database: %s", exc)
+            return EMPTY_SNAPSHOT
+        finally:
+            db.close()
+        if not records:
+            return EMPTY_SNAPSHOT
+        digest = hashlib.sha256(repr(records).encode("utf-8")).hexdigest()
+        return TemplateSnapshot(digest=digest, templates=MappingProxyType({record.report_index: record for record in records}))
+
+    def _sync_database(self, snapshot: TemplateSnapshot) -> bool:
+        db = self.session_factory()
+        try:
+            repository = ReportTemplateRepository(db)
+            stored = {
+                TemplateRecord(template.report_index, template.report_type, template.prompt)
+                for template in repository.list()
+            }
+            if stored == set(snapshot.templates.values()):
+                return False
+            repository.delete_all()
+            for record in snapshot.templates.values():
+                repository.add(ReportTemplate(template_id=str(uuid4()), **record._asdict()))
+            db.commit()
+            return True
+        except SQLAlchemyError as exc:
+            db.rollback()
+            logger.error("Failed to sync report templates to the database: %s", exc)
+            return False
+        finally:
+            db.close()
+
+
+template_registry = TemplateRegistry(
+    path=settings.STREAM_SUMMARIZATION_REPORT_TYPES_PATH,
+    check_interval=settings.STREAM_SUMMARIZATION_REPORT_TYPES_CHECK_INTERVAL,
+)
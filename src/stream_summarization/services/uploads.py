@@ -0,0 +1,200 @@
+"""
+Потоковый приём загружаемых файлов.
+
+Тело multipart/form-data читается кусками и сразу пишется во временные файлы на диске;
+размер каждого файла проверяется по мере чтения, так что слишком большой файл отклоняется,
+не дочитав запрос. Обработчики получают пути к файлам, а не bytes, и значения
+небольших текстовых полей формы.
+"""
+from __future__ import annotations
+
+import asyncio
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Callable, Dict, List, Mapping, NamedTuple, Sequence, Tuple
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from stream_summarization.services.config import settings
+
+# Предел одного текстового поля формы (название сессии, номер отчёта)
+MAX_FIELD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class SpooledUpload(NamedTuple):
+    filename: str
+    path: str
+    size: int
+
+    @property
+    def suffix(self) -> str:
+        return Path(self.filename).suffix or ".txt"
+
+
+class SpooledForm(NamedTuple):
+    uploads: List[SpooledUpload]
+    fields: Dict[str, str]
+
+
+class _UploadParser:
+    """
+    Колбэки MultipartParser: файлы поля field пишутся в directory, значения текстовых полей
+    из fields собираются в память, прочие поля пропускаются.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        field: str,
+        max_bytes: int,
+        max_files: int,
+        check: Callable[[str], object] | None,
+        fields: Sequence[str] = (),
+    ) -> None:
+        self.directory = directory
+        self.field = field
+        self.field_names = set(fields)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.check = check
+        self.uploads: List[SpooledUpload] = []
+        self.fields: Dict[str, str] = {}
+        self._value_name: str | None = None
+        self._value = bytearray()
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._file: BinaryIO | None = None
+        self._filename = ""
+        self._size = 0
+        # Колбэки синхронные, поэтому запись откладывается до flush в пуле потоков
+        self._writes: List[Tuple[BinaryIO, bytes]] = []
+        self._finished: List[BinaryIO] = []
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._file = None
+        self._value_name = None
+        self._size = 0
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" not in options:
+            if name in self.field_names:
+                self._value_name = name
+                self._value.clear()
+            return
+        if name != self.field:
+            return
+        if len(self.uploads) >= self.max_files:
+            raise UploadTooLarge(f"Too many files, at most {self.max_files} are allowed")
+        self._filename = Path(options[b"filename"].decode("utf-8", "replace")).name or "document.txt"
+        if self.check is not None:
+            self.check(Path(self._filename).suffix or ".txt")
+        self._file = tempfile.NamedTemporaryFile(dir=self.directory, delete=False)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._value_name is not None:
+            self._value += data[start:end]
+            if len(self._value) > MAX_FIELD_BYTES:
+                raise UploadTooLarge(f"Field {self._value_name} exceeds {MAX_FIELD_BYTES // 1024} KiB")
+            return
+        if self._file is None:
+            return
+        self._size += end - start
+        if self._size > self.max_bytes:
+            raise UploadTooLarge(f"File {self._filename} exceeds {self.max_bytes // (1024 * 1024)} MiB")
+        self._writes.append((self._file, data[start:end]))
+
+    def on_part_end(self) -> None:
+        if self._value_name is not None:
+            self.fields[self._value_name] = self._value.decode("utf-8", "replace")
+            self._value_name = None
+        if self._file is not None:
+            self.uploads.append(SpooledUpload(self._filename, self._file.name, self._size))
+            self._finished.append(self._file)
+            self._file = None
+
+    def flush(self) -> None:
+        """Пишет накопленные куски и закрывает дочитанные файлы; вызывается после каждого куска тела."""
+        for file, data in self._writes:
+            file.write(data)
+        self._writes.clear()
+        for file in self._finished:
+            file.close()
+        self._finished.clear()
+
+    def close(self) -> None:
+        for file in [*self._finished, *(file for file, _ in self._writes)]:
+            file.close()
+        if self._file is not None:
+            self._file.close()
+
+
+@asynccontextmanager
+async def spooled_uploads(
+    headers: Mapping[str, str],
+    stream: AsyncIterator[bytes],
+    field: str,
+    check: Callable[[str], object] | None = None,
+    fields: Sequence[str] = (),
+) -> AsyncIterator[SpooledForm]:
+    """
+    Разбирает multipart-тело запроса, складывая файлы поля field во временный каталог,
+    который удаляется при выходе. check(suffix) вызывается до чтения содержимого файла.
+    Значения текстовых полей из fields отдаются в SpooledForm.fields.
+    """
+
+    max_bytes = settings.STREAM_SUMMARIZATION_MAX_UPLOAD_MB * 1024 * 1024
+    max_files = settings.STREAM_SUMMARIZATION_MAX_UPLOAD_FILES
+    content_type, options = parse_options_header(headers.get("content-type"))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise ValueError("Expected multipart/form-data")
+    content_length = headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes * max_files:
+        raise UploadTooLarge(f"Request exceeds {max_bytes * max_files // (1024 * 1024)} MiB")
+
+    directory = tempfile.mkdtemp(prefix="uploads-", dir=settings.STREAM_SUMMARIZATION_UPLOAD_DIR)
+    upload_parser = _UploadParser(directory, field, max_bytes, max_files, check, fields)
+    parser = MultipartParser(
+        options[b"boundary"],
+        {
+            "on_part_begin": upload_parser.on_part_begin,
+            "on_part_data": upload_parser.on_part_data,
+            "on_part_end": upload_parser.on_part_end,
+            "on_header_field": upload_parser.on_header_field,
+            "on_header_value": upload_parser.on_header_value,
+            "on_header_end": upload_parser.on_header_end,
+            "on_headers_finished": upload_parser.on_headers_finished,
+        },
+    )
+    try:
+        async for chunk in stream:
+            parser.write(chunk)
+            # Запись на диск — в пуле потоков, чтобы не блокировать event loop
+            await asyncio.to_thread(upload_parser.flush)
+        parser.finalize()
+        if not upload_parser.uploads:
+            raise ValueError("No documents uploaded")
+        yield SpooledForm(upload_parser.uploads, upload_parser.fields)
+    finally:
+        upload_parser.close()
+        await asyncio.to_thread(shutil.rmtree, directory, True)
@@ -1,7 +1,10 @@
+import json
 import os
 import re
 import subprocess
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
+from uuid import uuid4
 
 import pytest
 import requests
@@ -126,6 +129,31 @@ class TestAPI:
         assert resp.status_code == 200
         assert resp.json()["status"] in ("created", "exist")
 
+    def _new_user_headers(self):
+        """Заголовки нового пользователя: тест не видит сессий, созданных другими тестами."""
+        user_id = str(uuid4())
+        self._ensure_user(user_id, temporary=True)
+        return self._auth_headers(user_id)
+
+    def _session_ids(self, headers):
+        resp = requests.get(f"{self._api_url}{self._prefix}/chat_session/fetch_page", headers=headers)
+        assert resp.status_code == 200, resp.text
+        return [session["session_id"] for session in resp.json()["sessions"]]
+
+    def _create_session(self, headers, documents, title=""):
+        resp = requests.post(
+            f"{self._api_url}{self._prefix}/chat_session/create",
+            json={"title": title, "documents": documents, "report_index": 0},
+            headers=headers,
+        )
+        assert resp.status_code == 200, resp.text
+        return resp.json()
+
+    def _session_info(self, headers, session_id):
+        resp = requests.get(f"{self._api_url}{self._prefix}/chat_session/{session_id}", headers=headers)
+        assert resp.status_code == 200, resp.text
+        return resp.json()
+
     def _extract_uuid(self, payload: dict) -> str:
         """
         Универсальный поиск UUID в ответе (на случай, если поле называется иначе).
@@ -195,6 +223,26 @@ class TestAPI:
         ids = {self._extract_uuid(s) for s in payload["sessions"]}
         assert session_id in ids
 
+        # documents — постранично
+        resp = requests.get(
+            f"{self._api_url}{self._prefix}/chat_session/{session_id}/documents",
+            params={"limit": 1},
+            headers=h,
+        )
+        assert resp.status_code == 200, resp.text
+        page = resp.json()
+        assert [d["title"] for d in page["documents"]] == ["R1"]
+        assert page["next_offset"] == 1
+        resp = requests.get(
+            f"{self._api_url}{self._prefix}/chat_session/{session_id}/documents",
+            params={"offset": page["next_offset"], "limit": 1},
+            headers=h,
+        )
+        assert resp.status_code == 200, resp.text
+        page = resp.json()
+        assert [d["title"] for d in page["documents"]] == ["R2"]
+        assert page["next_offset"] is None
+
         # search
         resp = requests.get(
             f"{self._api_url}{self._prefix}/chat_session/search",
@@ -283,6 +331,18 @@ class TestAPI:
         assert "report_types" in payload
         assert isinstance(payload["report_types"], list)
 
+    async def test_reports__report_types_not_modified(self):
+        resp = requests.get(f"{self._api_url}{self._prefix}/reports/report_types")
+        assert resp.status_code == 200
+        etag = resp.headers["ETag"]
+
+        resp = requests.get(
+            f"{self._api_url}{self._prefix}/reports/report_types",
+            headers={"If-None-Match": etag},
+        )
+        assert resp.status_code == 304
+        assert resp.headers["ETag"] == etag
+
     async def test_reports__load_documents_txt_ok(self):
         files = [
             ("documents", ("a.txt", b"hello\nworld", "text/plain")),
@@ -322,6 +382,25 @@ class TestAPI:
         assert "sessions" in payload and isinstance(payload["sessions"], list)
         assert len(payload["sessions"]) == 0
 
+    async def test_sessions__fetch_page_cursor(self):
+        h = self._auth_headers("00000000-0000-0000-0000-000000000001")
+        resp = requests.get(
+            f"{self._api_url}{self._prefix}/chat_session/fetch_page",
+            params={"limit": 1},
+            headers=h,
+        )
+        assert resp.status_code == 200
+        payload = resp.json()
+        assert payload["sessions"] == []
+        assert payload["next_cursor"] is None
+
+        resp = requests.get(
+            f"{self._api_url}{self._prefix}/chat_session/fetch_page",
+            params={"cursor": "not-a-cursor"},
+            headers=h,
+        )
+        assert resp.status_code == 400
+
     async def test_sessions__session_info_user_not_found(self):
         resp = requests.get(
             f"{self._api_url}{self._prefix}/chat_session/11111111-1111-1111-1111-111111111111",
@@ -504,3 +583,568 @@ class TestAPI:
         assert "detail" in data, resp.text
         expected = f"Длина одного документа превышает лимит {limits['max_chars']} символов"
         assert data["detail"] == expected, data["detail"]
+
+    # ============================
+    # NEGATIVE: /create_from_files проверяет поля формы и лимиты, как /create
+    # ============================
+    async def test_sessions__create_from_files_validation(self):
+        user_id = self._users[1]["user_id"]
+        self._ensure_user(user_id, temporary=False)
+        h = self._auth_headers(user_id)
+        url = f"{self._api_url}{self._prefix}/chat_session/create_from_files"
+        files = [("documents", ("a.txt", "Привет, мир!".encode("utf-8"), "text/plain"))]
+
+        resp = requests.post(url, files=files, data={"title": "Files"}, headers=h)
+        assert resp.status_code == 400, resp.text
+        assert resp.json()["detail"] == "report_index must be an integer"
+
+        limits = self._limits()
+        long_file = [("documents", ("long.txt", b"a" * (limits["max_chars"] + 1), "text/plain"))]
+        resp = requests.post(url, files=long_file, data={"report_index": "0"}, headers=h)
+        assert resp.status_code == 400, resp.text
+        expected = f"Длина одного документа превышает лимит {limits['max_chars']} символов"
+        assert resp.json()["detail"] == expected
+
+    # ============================
+    # Бюджет запроса (X-Request-Deadline) и отмена при отключении клиента
+    # ============================
+    async def test_sessions__create_deadline_exceeded(self):
+        h = self._new_user_headers()
+        payload = {"documents": [{"text": "Инфляция замедлилась."}], "report_index": 0}
+        url = f"{self._api_url}{self._prefix}/chat_session/create"
+
+        resp = requests.post(url, json=payload, headers={**h, "X-Request-Deadline": "0.001"})
+        assert resp.status_code == 504, resp.text
+        assert "Превышен срок выполнения запроса" in resp.json()["detail"]
+
+        resp = requests.post(url, json=payload, headers={**h, "X-Request-Deadline": "soon"})
+        assert resp.status_code == 400, resp.text
+        assert self._session_ids(h) == []
+
+    async def test_sessions__create_from_files_deadline_covers_extraction(self):
+        h = self._new_user_headers()
+        url = f"{self._api_url}{self._prefix}/chat_session/create_from_files"
+        # Уникальное содержимое: извлечение не должно попасть в кэш
+        files = [("documents", ("a.txt", f"Инфляция замедлилась {uuid4()}.".encode("utf-8"), "text/plain"))]
+
+        resp = requests.post(url, files=files, data={"report_index": "0"}, headers={**h, "X-Request-Deadline": "0.001"})
+        assert resp.status_code == 504, resp.text
+        assert resp.json()["detail"] == "Превышен срок выполнения запроса на этапе extraction"
+        assert self._session_ids(h) == []
+
+    async def test_sessions__create_cancelled_on_client_disconnect(self):
+        """Клиент не дождался ответа: генерация отменяется, сессия не сохраняется."""
+        h = self._new_user_headers()
+        payload = {"documents": [{"text": "Рынок облигаций растёт. " * 1000}], "report_index": 0}
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            requests.post(
+                f"{self._api_url}{self._prefix}/chat_session/create",
+                json=payload,
+                headers=h,
+                timeout=0.5,
+            )
+        # Даём серверу заметить отключение и дольше, чем заняла бы генерация
+        sleep(self._sleep * 5)
+        assert self._session_ids(h) == []
+
+    # ============================
+    # Перегрузка LLM: экстрактивная сводка сразу, полная — позже фоновым обновлением
+    # ============================
+    async def test_sessions__create_degraded_when_llm_saturated(self):
+        h = self._new_user_headers()
+        max_inflight = int(os.environ.get("STREAM_SUMMARIZATION_LLM_MAX_INFLIGHT", 8))
+        sentences = [f"Предложение номер {index} про ключевую ставку." for index in range(20)]
+        documents = [{"text": " ".join(sentences) * 20}]
+
+        with ThreadPoolExecutor(max_workers=2 * max_inflight) as pool:
+            responses = list(pool.map(lambda _: self._create_session(h, documents), range(2 * max_inflight)))
+
+        degraded = [data for data in responses if data["error"]]
+        assert degraded, "no request fell back to the extractive summary"
+        for data in degraded:
+            assert data["error"].startswith("degraded:")
+            # Экстрактивная сводка составлена из предложений документа
+            assert data["summary"]
+            assert set(re.split(r"(?<=\.)\s+", data["summary"])) <= set(sentences)
+
+        # Когда бэкенд освобождается, сводка заменяется полной и version растёт
+        session_id = degraded[0]["session_id"]
+        started = monotonic()
+        while self._session_info(h, session_id)["version"] == 0:
+            assert monotonic() - started < self._timeout * 4, "degraded summary was never upgraded"
+            sleep(self._sleep)
+        assert self._session_info(h, session_id)["summary"] != degraded[0]["summary"]
+
+    # ============================
+    # Map-reduce: документы больше окна контекста суммируются по частям и хранятся целиком
+    # ============================
+    async def test_sessions__create_map_reduce_keeps_documents(self):
+        h = self._new_user_headers()
+        documents = [
+            {"text": f"Документ {index}. " + f"Выручка компании {index} выросла за квартал. " * 100, "title": f"D{index}"}
+            for index in range(30)
+        ]
+        data = self._create_session(h, documents)
+        assert data["error"] is None
+        assert data["summary"].strip()
+
+        info = self._session_info(h, data["session_id"])
+        assert [d["title"] for d in info["documents"]] == [d["title"] for d in documents]
+        assert [d["text"] for d in info["documents"]] == [d["text"].strip() for d in documents]
+
+    # ============================
+    # update_summarization: генерация вне транзакции, запись — только при совпадении version
+    # ============================
+    async def test_sessions__update_summarization_version_conflict(self):
+        h = self._new_user_headers()
+        session_id = self._create_session(h, [{"text": "Инфляция замедлилась."}])["session_id"]
+        url = f"{self._api_url}{self._prefix}/chat_session/update_summarization"
+
+        def update(text):
+            payload = {"session_id": session_id, "documents": [{"text": text}], "report_index": 0, "version": 0}
+            return requests.post(url, json=payload, headers=h)
+
+        # Оба запроса прочитали version 0, сохраниться должен только один
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            responses = list(pool.map(update, ["Ставка снижена.", "Ставка повышена."]))
+        assert sorted(resp.status_code for resp in responses) == [200, 400]
+        rejected = next(resp for resp in responses if resp.status_code == 400)
+        assert rejected.json()["detail"] == "Version mismatch"
+
+        info = self._session_info(h, session_id)
+        assert info["version"] == 1
+        winner = next(text for text, resp in zip(["Ставка снижена.", "Ставка повышена."], responses) if resp.ok)
+        assert [d["text"] for d in info["documents"]] == [winner]
+
+        resp = update("Устаревшее обновление.")
+        assert resp.status_code == 400
+        assert resp.json()["detail"] == "Version mismatch"
+
+    # ============================
+    # fetch_page: список из проекции по (user_id, updated_at), без документов и сводок
+    # ============================
+    async def test_sessions__fetch_page_short_and_ordered(self):
+        h = self._new_user_headers()
+        first = self._create_session(h, [{"text": "Первая сессия."}], title="Первая")["session_id"]
+        second = self._create_session(h, [{"text": "Вторая сессия."}], title="Вторая")["session_id"]
+
+        resp = requests.post(
+            f"{self._api_url}{self._prefix}/chat_session/update_title",
+            json={"session_id": first, "title": "Первая — обновлена", "version": 0},
+            headers=h,
+        )
+        assert resp.status_code == 200, resp.text
+
+        resp = requests.get(f"{self._api_url}{self._prefix}/chat_session/fetch_page", headers=h)
+        assert resp.status_code == 200, resp.text
+        sessions = resp.json()["sessions"]
+        # Последняя изменённая сессия идёт первой
+        assert [s["session_id"] for s in sessions] == [first, second]
+        assert sessions[0]["title"] == "Первая — обновлена"
+        assert sessions[0]["version"] == 1
+        for session in sessions:
+            assert set(session) == {"session_id", "version", "title", "inserted_at", "updated_at"}
+
+    # ============================
+    # Сессия ищется по паре (user_id, session_id): чужой пользователь её не видит и не удалит
+    # ============================
+    async def test_sessions__other_user_cannot_access_session(self):
+        owner = self._new_user_headers()
+        stranger = self._new_user_headers()
+        session_id = self._create_session(owner, [{"text": "Личная сессия."}])["session_id"]
+
+        resp = requests.get(f"{self._api_url}{self._prefix}/chat_session/{session_id}", headers=stranger)
+        assert resp.status_code == 400
+        assert resp.json()["detail"] == "Session not found"
+
+        resp = requests.delete(
+            f"{self._api_url}{self._prefix}/chat_session/delete",
+            json={"session_id": session_id},
+            headers=stranger,
+        )
+        assert resp.status_code == 200
+        assert resp.json()["status"] == "NOT_FOUND"
+        assert self._session_info(owner, session_id)["session_id"] == session_id
+
+        resp = requests.delete(
+            f"{self._api_url}{self._prefix}/chat_session/delete",
+            json={"session_id": session_id},
+            headers=owner,
+        )
+        assert resp.status_code == 200
+        assert resp.json()["status"] != "NOT_FOUND"
+        assert self._session_ids(owner) == []
+
+    # ============================
+    # Чтение (fetch_page, сессия) через async UoW видит то, что записал синхронный
+    # ============================
+    async def test_sessions__reads_see_committed_writes(self):
+        h = self._new_user_headers()
+        documents = [{"text": "Банк сохранил прогноз.", "title": "R1"}, {"text": "Рубль укрепился.", "title": "R2"}]
+        created = self._create_session(h, documents, title="Чтение после записи")
+        session_id = created["session_id"]
+
+        info = self._session_info(h, session_id)
+        assert info["title"] == "Чтение после записи"
+        assert info["summary"] == created["summary"]
+        assert [(d["text"], d["title"]) for d in info["documents"]] == [
+            (d["text"], d["title"]) for d in documents
+        ]
+
+        resp = requests.post(
+            f"{self._api_url}{self._prefix}/chat_session/update_title",
+            json={"session_id": session_id, "title": "Новый заголовок", "version": 0},
+            headers=h,
+        )
+        assert resp.status_code == 200, resp.text
+        assert self._session_info(h, session_id)["title"] == "Новый заголовок"
+        resp = requests.get(f"{self._api_url}{self._prefix}/chat_session/fetch_page", headers=h)
+        assert [(s["session_id"], s["title"], s["version"]) for s in resp.json()["sessions"]] == [
+            (session_id, "Новый заголовок", 1)
+        ]
+
+    # ============================
+    # Сжатие хранимых текстов прозрачно: длинные, короткие и несжимаемые значения читаются как есть
+    # ============================
+    async def test_sessions__compressed_text_round_trip(self):
+        h = self._new_user_headers()
+        documents = [
+            {"text": "Центробанк сохранил ключевую ставку без изменений. " * 200, "title": "long"},
+            {"text": "Коротко.", "title": "short"},
+            {"text": "".join(chr(0x4E00 + (index * 7919) % 20000) for index in range(300)), "title": "noise"},
+        ]
+        created = self._create_session(h, documents)
+
+        info = self._session_info(h, created["session_id"])
+        assert info["summary"] == created["summary"]
+        assert [d["text"] for d in info["documents"]] == [d["text"].strip() for d in documents]
+
+        resp = requests.get(
+            f"{self._api_url}{self._prefix}/chat_session/{created['session_id']}/documents",
+            params={"offset": 2},
+            headers=h,
+        )
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["documents"][0]["text"] == documents[2]["text"]
+
+    # ============================
+    # Разобранные документы сессии кэшируются и сбрасываются при обновлении
+    # ============================
+    async def test_sessions__documents_refreshed_after_update(self):
+        h = self._new_user_headers()
+        created = self._create_session(
+            h,
+            [{"text": "Старый документ 1.", "title": "old1"}, {"text": "Старый документ 2.", "title": "old2"}],
+            title="Обновление документов",
+        )
+        session_id = created["session_id"]
+        assert [d["title"] for d in self._session_info(h, session_id)["documents"]] == ["old1", "old2"]
+
+        resp = requests.post(
+            f"{self._api_url}{self._prefix}/chat_session/update_summarization",
+            json={
+                "session_id": session_id,
+                "documents": [{"text": "Новый документ.", "title": "new"}],
+                "report_index": 0,
+                "version": 0,
+            },
+            headers=h,
+        )
+        assert resp.status_code == 200, resp.text
+
+        info = self._session_info(h, session_id)
+        assert [(d["text"], d["title"]) for d in info["documents"]] == [("Новый документ.", "new")]
+        resp = requests.get(f"{self._api_url}{self._prefix}/chat_session/{session_id}/documents", headers=h)
+        assert resp.status_code == 200, resp.text
+        assert [d["title"] for d in resp.json()["documents"]] == ["new"]
+        assert resp.json()["next_offset"] is None
+
+        resp = requests.get(
+            f"{self._api_url}{self._prefix}/chat_session/search", params={"query": "Старый"}, headers=h
+        )
+        assert resp.status_code == 200, resp.text
+        assert session_id not in {s["session_id"] for s in resp.json()["sessions"]}
+
+    # ============================
+    # Документы нормализуются один раз при валидации: пробелы обрезаны, пустые отброшены
+    # ============================
+    async def test_sessions__create_normalizes_documents(self):
+        h = self._new_user_headers()
+        documents = [
+            {"text": "  Инфляция замедлилась.\n", "title": " Обзор ", "source": " ЦБ "},
+            {"text": "   ", "title": "пустой"},
+        ]
+        created = self._create_session(h, documents, title="Нормализация")
+
+        info = self._session_info(h, created["session_id"])
+        assert [(d["text"], d["title"], d["source"]) for d in info["documents"]] == [
+            ("Инфляция замедлилась.", "Обзор", "ЦБ")
+        ]
+
+        resp = self._post_create(h, [{"text": " "}, {"text": "\n\t"}])
+        assert resp.status_code == 400, resp.text
+        assert resp.json()["detail"] == "Передан пустой текст для суммаризации"
+
+    # ============================
+    # Шаблоны отчётов в памяти: перечитывание без изменений файла не меняет версию и ETag
+    # ============================
+    async def test_reports__reload_templates_stable(self):
+        h = self._new_user_headers()
+        resp = requests.get(f"{self._api_url}{self._prefix}/reports/report_types")
+        assert resp.status_code == 200
+        etag, report_types = resp.headers["ETag"], resp.json()["report_types"]
+
+        versions = []
+        for _ in range(2):
+            resp = requests.post(f"{self._api_url}{self._prefix}/reports/reload_templates", headers=h)
+            assert resp.status_code == 200, resp.text
+            assert resp.json()["report_types"] == report_types
+            versions.append(resp.json()["version"])
+        assert versions[0] == versions[1]
+
+        resp = requests.get(
+            f"{self._api_url}{self._prefix}/reports/report_types",
+            headers={"If-None-Match": etag},
+        )
+        assert resp.status_code == 304
+
+    async def test_reports__reload_templates_requires_auth(self):
+        resp = requests.post(f"{self._api_url}{self._prefix}/reports/reload_templates")
+        assert resp.status_code == 400
+        assert resp.json()["detail"] == "Authorization header is required"
+
+    # ============================
+    # Профиль запуска: стадии lifespan и отложенные импорты тяжёлых библиотек
+    # ============================
+    async def test_health_startup_profile(self):
+        h = self._new_user_headers()
+        self._create_session(h, [{"text": "Профиль запуска."}])
+
+        resp = requests.get(f"{self._api_url}/health/startup")
+        assert resp.status_code == 200
+        profile = resp.json()
+        assert 0 < profile["import_seconds"] <= profile["ready_seconds"]
+        assert {"database", "report_templates"} <= set(profile["stages"])
+        # Клиент модели импортируется при первой суммаризации, а не при старте
+        assert "langchain_openai" in profile["lazy_imports"]
+
+    # ============================
+    # Поиск BM25: сессия с частым термином выше, сессии без термина не возвращаются
+    # ============================
+    async def test_sessions__search_ranks_by_relevance(self):
+        h = self._new_user_headers()
+        strong = self._create_session(
+            h, [{"text": "Нефть подорожала. Экспорт нефть растёт, нефть дорожает."}], title="Сырьё"
+        )["session_id"]
+        weak = self._create_session(
+            h,
+            [{"text": "Обзор рынков: акции, облигации, валюта, золото и немного про нефть. " * 5}],
+            title="Обзор",
+        )["session_id"]
+        other = self._create_session(h, [{"text": "Золото и серебро выросли в цене."}], title="Металлы")["session_id"]
+
+        resp = requests.get(f"{self._api_url}{self._prefix}/chat_session/search", params={"query": "нефть"}, headers=h)
+        assert resp.status_code == 200, resp.text
+        ids = [s["session_id"] for s in resp.json()["sessions"]]
+        assert ids[:2] == [strong, weak]
+        assert other not in ids
+
+    # ============================
+    # Поиск по основам слов: другая словоформа запроса находит сессию
+    # ============================
+    async def test_sessions__search_matches_word_forms(self):
+        h = self._new_user_headers()
+        session_id = self._create_session(
+            h, [{"text": "Торги облигациями федерального займа оживились после снижения ставки."}], title="ОФЗ"
+        )["session_id"]
+
+        for query in ("облигации", "Ставками", "снижение"):
+            resp = requests.get(f"{self._api_url}{self._prefix}/chat_session/search", params={"query": query}, headers=h)
+            assert resp.status_code == 200, resp.text
+            assert [s["session_id"] for s in resp.json()["sessions"]] == [session_id], query
+
+        resp = requests.get(f"{self._api_url}{self._prefix}/chat_session/search", params={"query": "акции"}, headers=h)
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["sessions"] == []
+
+    # ============================
+    # Семантический и гибридный поиск (numpy, локальный эмбеддер) и неизвестный режим
+    # ============================
+    async def test_sessions__search_semantic_and_hybrid_modes(self):
+        h = self._new_user_headers()
+        oil = self._create_session(
+            h, [{"text": "Цены на нефть выросли, экспорт нефти увеличился."}], title="Нефть"
+        )["session_id"]
+        self._create_session(h, [{"text": "Урожай пшеницы оказался рекордным."}], title="Зерно")
+        url = f"{self._api_url}{self._prefix}/chat_session/search"
+
+        for mode in ("semantic", "HYBRID"):
+            resp = requests.get(url, params={"query": "нефть экспорт", "mode": mode}, headers=h)
+            assert resp.status_code == 200, resp.text
+            assert [s["session_id"] for s in resp.json()["sessions"]][:1] == [oil], mode
+
+        resp = requests.get(url, params={"query": "нефть", "mode": "fuzzy"}, headers=h)
+        assert resp.status_code == 400
+        assert resp.json()["detail"] == "Unknown search mode"
+
+    # ============================
+    # Результаты поиска — краткие записи с актуальными заголовком и версией
+    # ============================
+    async def test_sessions__search_returns_current_short_sessions(self):
+        h = self._new_user_headers()
+        session_id = self._create_session(h, [{"text": "Дивиденды банков выросли."}], title="Дивиденды")["session_id"]
+        url = f"{self._api_url}{self._prefix}/chat_session/search"
+        resp = requests.get(url, params={"query": "дивиденды"}, headers=h)
+        assert [s["session_id"] for s in resp.json()["sessions"]] == [session_id]
+
+        resp = requests.post(
+            f"{self._api_url}{self._prefix}/chat_session/update_title",
+            json={"session_id": session_id, "title": "Выплаты акционерам", "version": 0},
+            headers=h,
+        )
+        assert resp.status_code == 200, resp.text
+
+        resp = requests.get(url, params={"query": "акционерам"}, headers=h)
+        assert resp.status_code == 200, resp.text
+        sessions = resp.json()["sessions"]
+        assert [(s["session_id"], s["title"], s["version"]) for s in sessions] == [(session_id, "Выплаты акционерам", 1)]
+        assert set(sessions[0]) == {"session_id", "version", "title", "inserted_at", "updated_at"}
+
+    # ============================
+    # Извлечение в пуле процессов: ошибка одного файла не мешает остальным
+    # ============================
+    async def test_reports__load_documents_per_file_errors(self):
+        files = [
+            ("documents", ("broken.pdf", b"%PDF-1.4\nnot really a pdf", "application/pdf")),
+            ("documents", ("ok.txt", "Текст без ошибок.".encode("utf-8"), "text/plain")),
+        ]
+        resp = requests.post(f"{self._api_url}{self._prefix}/reports/load_documents", files=files)
+        assert resp.status_code == 200, resp.text
+        data = resp.json()
+        assert data["contents"][1] == "Текст без ошибок."
+        assert data["contents"][0] == "" and data["errors"][0]
+        assert data["errors"][1] is None
+
+    # ============================
+    # Загрузка пишется на диск потоком и отклоняется, как только превышен лимит
+    # ============================
+    async def test_reports__load_documents_too_many_files(self):
+        max_files = int(os.environ.get("STREAM_SUMMARIZATION_MAX_UPLOAD_FILES", 20))
+        files = [("documents", (f"{index}.txt", b"text", "text/plain")) for index in range(max_files + 1)]
+        resp = requests.post(f"{self._api_url}{self._prefix}/reports/load_documents", files=files)
+        assert resp.status_code == 413, resp.text
+        assert resp.json()["detail"] == f"Too many files, at most {max_files} are allowed"
+
+        resp = requests.post(f"{self._api_url}{self._prefix}/reports/load_documents", files=files[:max_files])
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["contents"] == ["text"] * max_files
+
+    # ============================
+    # stream=true: NDJSON по страницам PDF и строка done в конце каждого файла
+    # ============================
+    def _minimal_pdf(self, pages):
+        """PDF с одной строкой текста (латиница) на каждой странице."""
+        count = len(pages)
+        objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+        kids = " ".join(f"{4 + 2 * index} 0 R" for index in range(count))
+        objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {count} >>".encode())
+        objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        for index, text in enumerate(pages):
+            objects.append(
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * index} 0 R >>".encode()
+            )
+            stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+            objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        out = b"%PDF-1.4\n"
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+        return out
+
+    async def test_reports__load_documents_stream_ndjson(self):
+        files = [
+            ("documents", ("pages.pdf", self._minimal_pdf(["First page", "Second page"]), "application/pdf")),
+            ("documents", ("note.txt", "Заметка.".encode("utf-8"), "text/plain")),
+        ]
+        resp = requests.post(
+            f"{self._api_url}{self._prefix}/reports/load_documents",
+            params={"stream": "true"},
+            files=files,
+            stream=True,
+        )
+        assert resp.status_code == 200, resp.text
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in resp.iter_lines() if line]
+
+        pdf = [line for line in lines if line["document"] == 0]
+        assert [line["text"] for line in pdf if not line.get("done")] == ["First page", "Second page"]
+        assert pdf[-1] == {"document": 0, "done": True, "pages": 2, "error": None, "filename": "pages.pdf"}
+        txt = [line for line in lines if line["document"] == 1]
+        assert [line["text"] for line in txt if not line.get("done")] == ["Заметка."]
+        assert txt[-1]["done"] and txt[-1]["error"] is None
+
+        resp = requests.post(
+            f"{self._api_url}{self._prefix}/reports/load_documents",
+            params={"preview_pages": 1},
+            files=files[:1],
+        )
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["contents"] == ["First page"]
+
+    # ============================
+    # Кэш извлечённого текста по хэшу содержимого: повторная загрузка не разбирается заново
+    # ============================
+    async def test_reports__load_documents_cache_hit(self):
+        def stats():
+            resp = requests.get(f"{self._api_url}/health/extraction_cache")
+            assert resp.status_code == 200
+            return resp.json()
+
+        if not stats()["enabled"]:
+            pytest.skip("extraction cache is disabled")
+        content = f"Уникальный документ {uuid4()}.".encode("utf-8")
+        url = f"{self._api_url}{self._prefix}/reports/load_documents"
+
+        before = stats()
+        resp = requests.post(url, files=[("documents", ("first.txt", content, "text/plain"))])
+        assert resp.status_code == 200, resp.text
+        first = stats()
+        assert first["misses"] == before["misses"] + 1
+
+        # Имя файла не входит в ключ кэша
+        resp = requests.post(url, files=[("documents", ("second.txt", content, "text/plain"))])
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["contents"] == [content.decode("utf-8")]
+        second = stats()
+        assert second["hits"] == first["hits"] + 1
+        assert second["misses"] == first["misses"]
+
+    # ============================
+    # Формат по сигнатуре и кодировка текстовых файлов
+    # ============================
+    async def test_reports__load_documents_sniffing_and_encoding(self):
+        files = [
+            # «%PDF-» в середине текстового файла — просто текст
+            ("documents", ("notes.txt", "Сигнатура %PDF-1.4 в тексте.".encode("utf-8"), "text/plain")),
+            ("documents", ("short.txt", "Привет, мир!".encode("cp1251"), "text/plain")),
+            ("documents", ("caps.txt", "ПРОТОКОЛ СОБРАНИЯ АКЦИОНЕРОВ".encode("cp1251"), "text/plain")),
+            ("documents", ("mixed.txt", "Отчёт по API v2: latency и SLA.".encode("cp1251"), "text/plain")),
+            # PDF с неверным расширением распознаётся по сигнатуре в начале файла
+            ("documents", ("report.txt", self._minimal_pdf(["Hello PDF"]), "text/plain")),
+        ]
+        resp = requests.post(f"{self._api_url}{self._prefix}/reports/load_documents", files=files)
+        assert resp.status_code == 200, resp.text
+        contents = resp.json()["contents"]
+        assert contents[:4] == [
+            "Сигнатура %PDF-1.4 в тексте.",
+            "Привет, мир!",
+            "ПРОТОКОЛ СОБРАНИЯ АКЦИОНЕРОВ",
+            "Отчёт по API v2: latency и SLA.",
+        ]
+        assert "Hello PDF" in contents[4]
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+import pytest
+
+from stream_summarization.entrypoints.schemas.report import ReportTypesResponse
+from stream_summarization.services.backpressure import Backpressure
+from stream_summarization.services import extraction
+from stream_summarization.services.deadline import Deadline
+from stream_summarization.services.handlers import session as handlers
+from stream_summarization.services.templates import TemplateSnapshot, parse_templates
+
+CALLERS = 16
+
+
+def _acquire_concurrently(backpressure: Backpressure) -> list:
+    barrier = threading.Barrier(CALLERS)
+
+    def acquire(_):
+        barrier.wait()
+        return backpressure.try_acquire()
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        return list(pool.map(acquire, range(CALLERS)))
+
+
+# ============================
+# Автомат-предохранитель LLM: ограничение параллельных вызовов и полуоткрытая цепь
+# ============================
+def test_backpressure__try_acquire_respects_max_inflight():
+    backpressure = Backpressure(max_inflight=2, failure_threshold=3, cooldown=60)
+
+    assert _acquire_concurrently(backpressure).count(True) == 2
+    assert backpressure.inflight == 2
+    backpressure.release()
+    assert backpressure.try_acquire()
+
+
+def test_backpressure__half_open_lets_one_probe_through():
+    cooldown = 0.05
+    backpressure = Backpressure(max_inflight=100, failure_threshold=2, cooldown=cooldown)
+    backpressure.record_failure()
+    backpressure.record_failure()
+    assert backpressure.circuit_open
+    assert not backpressure.try_acquire()
+
+    # Проба занята: остальные получают отказ, чтение circuit_open состояние не меняет
+    sleep(cooldown * 2)
+    assert backpressure.try_acquire()
+    assert _acquire_concurrently(backpressure) == [False] * CALLERS
+    assert backpressure.circuit_open
+
+    # Неудачная проба снова размыкает цепь на cooldown
+    backpressure.record_failure()
+    backpressure.release()
+    assert not backpressure.try_acquire()
+
+    sleep(cooldown * 2)
+    assert backpressure.try_acquire()
+    backpressure.record_success()
+    backpressure.release()
+    assert not backpressure.circuit_open
+    assert _acquire_concurrently(backpressure) == [True] * CALLERS
+
+
+# ============================
+# Ответ модели больше окна контекста сворачивается map-reduce
+# ============================
+def test_extract_message_content__condenses_oversized_reply(monkeypatch):
+    class FakeLLM:
+        def __init__(self):
+            self.prompts = []
+
+        def invoke(self, prompt, timeout=None):
+            self.prompts.append(prompt)
+            return "Сжатый фрагмент."
+
+    llm = FakeLLM()
+    handlers._get_context_window.cache_clear()
+    monkeypatch.setattr(handlers, "_get_context_window", lambda model_name: 200)
+    monkeypatch.setattr(handlers, "_build_llm", lambda deadline=None: llm)
+
+    reply = "Длинный ответ модели о ключевой ставке. " * 200
+    result = handlers._extract_message_content(reply, Deadline(30))
+
+    assert result == "Сжатый фрагмент."
+    # Фрагменты (map) и финальная свёртка (reduce)
+    assert len(llm.prompts) > 2
+    assert handlers._extract_message_content("Короткий ответ.", Deadline(30)) == "Короткий ответ."
+
+
+# ============================
+# Тело /report_types хранится в снимке шаблонов вместе с ETag
+# ============================
+def test_template_snapshot__report_types_body_matches_response_schema():
+    raw = json.dumps(
+        {"types": [{"category": "Сводка «кратко»", "prompt": "p"}, {"category": 'Quote "x"\\', "prompt": "p"}]}
+    ).encode("utf-8")
+    snapshot = TemplateSnapshot(digest="0" * 64, templates=parse_templates(raw))
+
+    expected = ReportTypesResponse(report_types=list(snapshot.report_types)).model_dump_json().encode("utf-8")
+    assert snapshot.report_types_body == expected
+    assert snapshot.report_types_body is snapshot.report_types_body
+
+
+# ============================
+# Длинный PDF: число страниц заранее, все диапазоны сразу в пуле; короткий — одной задачей
+# ============================
+def _recording_pool(monkeypatch, pages: int, split_pages: int) -> tuple:
+    monkeypatch.setattr(extraction.os, "cpu_count", lambda: 4)
+    pool = extraction.ExtractionPool(workers=3, timeout=60, memory_mb=0, split_pages=split_pages)
+    calls = []
+
+    async def run(function, *args, retry=True):
+        calls.append((function.__name__, args[1:]))
+        if function is extraction.pdf_page_count:
+            return pages
+        await asyncio.sleep(0)
+        return [f"page {index}" for index in range(args[1], min(args[2], pages))]
+
+    monkeypatch.setattr(pool, "_run", run)
+    return pool, calls
+
+
+@pytest.mark.asyncio
+async def test_extraction_pool__submits_all_pdf_ranges_at_once(monkeypatch):
+    pool, calls = _recording_pool(monkeypatch, pages=10, split_pages=5)
+
+    parsed = pool._iter_parsed("doc.pdf", "pdf", None)
+    assert await parsed.__anext__() == "page 0"
+    assert calls == [
+        ("pdf_page_count", ()),
+        ("extract_pdf_pages", (0, 4)),
+        ("extract_pdf_pages", (4, 8)),
+        ("extract_pdf_pages", (8, 10)),
+    ]
+    assert [page async for page in parsed] == [f"page {index}" for index in range(1, 10)]
+
+
+@pytest.mark.asyncio
+async def test_extraction_pool__short_pdf_is_one_task(monkeypatch):
+    pool, calls = _recording_pool(monkeypatch, pages=10, split_pages=10)
+
+    assert len([page async for page in pool._iter_parsed("doc.pdf", "pdf", None)]) == 10
+    assert calls == [("pdf_page_count", ()), ("extract_pdf_pages", (0, 10))]
+
+    # Предпросмотр короче порога не делится, даже если документ длинный
+    pool, calls = _recording_pool(monkeypatch, pages=1000, split_pages=10)
+    assert len([page async for page in pool._iter_parsed("doc.pdf", "pdf", 3)]) == 3
+    assert calls == [("pdf_page_count", ()), ("extract_pdf_pages", (0, 3))]